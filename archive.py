@@ -0,0 +1,154 @@
+# WARC-style archive of raw HTTP responses, for offline re-extraction
+
+import glob
+import gzip
+import http.client
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from config import ARCHIVE_FOLDER
+
+
+def request_key(method, url, body=None):
+    """Identifies a request in the archive; POST bodies are part of the key."""
+    key = f"{method} {url}"
+    if body is not None:
+        key += " " + json.dumps(body, sort_keys=True, separators=(',', ':'))
+    return key
+
+
+class ArchivedResponse:
+    """The parts of a ``requests.Response`` the scraper uses."""
+
+    def __init__(self, url, status_code, text):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+
+class ArchiveWriter:
+    """Appends one gzip member per response to ``<folder>/crawl-<time>-<pid>.warc.gz``.
+
+    Each member is a WARC/1.1 ``response`` record, so standard WARC tools can
+    read the file. A ``.cdx`` file next to it holds one JSON line per record
+    with its request key and compressed offset/length for random access.
+    """
+
+    def __init__(self, folder=ARCHIVE_FOLDER):
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime('%Y%m%d%H%M%S')
+        self.path = os.path.join(folder, f"crawl-{stamp}-{os.getpid()}.warc.gz")
+        self.file = open(self.path, 'ab')
+        self.cdx = open(self.path + '.cdx', 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def write(self, kind, method, url, status_code, text, body=None):
+        payload = text.encode('utf-8')
+        reason = http.client.responses.get(status_code, '')
+        block = (f"HTTP/1.1 {status_code} {reason}\r\nContent-Type: text/html; charset=utf-8\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n").encode('utf-8') + payload
+        date = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        headers = [
+            "WARC/1.1",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {date}",
+            f"WARC-Target-URI: {url}",
+            f"X-Crawl-Kind: {kind}",
+            f"X-Request-Method: {method}",
+        ]
+        if body is not None:
+            headers.append(f"X-Request-Body: {json.dumps(body, sort_keys=True, separators=(',', ':'))}")
+        headers += ["Content-Type: application/http; msgtype=response", f"Content-Length: {len(block)}"]
+        record = ("\r\n".join(headers) + "\r\n\r\n").encode('utf-8') + block + b"\r\n\r\n"
+        member = gzip.compress(record)
+
+        with self.lock:
+            offset = self.file.tell()
+            self.file.write(member)
+            self.file.flush()
+            self.cdx.write(json.dumps({
+                'key': request_key(method, url, body),
+                'kind': kind,
+                'uri': url,
+                'status': status_code,
+                'date': date,
+                'offset': offset,
+                'length': len(member),
+            }) + "\n")
+            self.cdx.flush()
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+            self.cdx.close()
+
+
+def _page_order(entry):
+    # Listing pages in page order: '...?page=10' sorts after '...?page=9'
+    match = re.search(r'(\d+)$', entry['uri'])
+    return entry['uri'][:match.start()] if match else entry['uri'], int(match.group(1)) if match else 0
+
+
+class ArchiveReader:
+    """Looks up archived responses by request key using the ``.cdx`` files of a folder.
+
+    The latest capture of a request wins. Records are read by seeking to
+    their gzip member, so the archive is never decompressed as a whole.
+    """
+
+    def __init__(self, folder=ARCHIVE_FOLDER):
+        self.folder = folder
+        self.index = {}
+        for cdx_path in sorted(glob.glob(os.path.join(folder, '*.warc.gz.cdx'))):
+            warc_path = cdx_path[:-len('.cdx')]
+            with open(cdx_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entry['path'] = warc_path
+                        self.index[entry['key']] = entry
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.index)
+
+    def entries(self, kind=None):
+        """Index entries, optionally of one kind ('listing', 'detail', 'builder', 'gallery')."""
+        entries = [entry for entry in self.index.values() if kind is None or entry['kind'] == kind]
+        return sorted(entries, key=_page_order) if kind == 'listing' else entries
+
+    def _read_member(self, entry):
+        with self.lock:
+            if entry['path'] not in self.files:
+                self.files[entry['path']] = open(entry['path'], 'rb')
+            f = self.files[entry['path']]
+            f.seek(entry['offset'])
+            member = f.read(entry['length'])
+        return gzip.decompress(member)
+
+    def get(self, method, url, body=None):
+        """The archived response to a request, or None if it was never captured."""
+        entry = self.index.get(request_key(method, url, body))
+        return self.read(entry) if entry else None
+
+    def read(self, entry):
+        record = self._read_member(entry)
+        warc_head, rest = record.split(b"\r\n\r\n", 1)
+        length = int(re.search(rb'\r\nContent-Length: (\d+)', warc_head).group(1))
+        http_head, payload = rest[:length].split(b"\r\n\r\n", 1)
+        status_code = int(http_head.split(b"\r\n", 1)[0].split(b" ")[1])
+        charset = re.search(rb'charset=([\w-]+)', http_head)
+        text = payload.decode(charset.group(1).decode('ascii') if charset else 'utf-8')
+        return ArchivedResponse(entry['uri'], status_code, text)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
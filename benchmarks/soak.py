@@ -0,0 +1,228 @@
+# Soak benchmark: memory of a long threaded crawl over fixture pages, measured with tracemalloc
+#
+#   python benchmarks/soak.py
+#   python benchmarks/soak.py --properties 5000 --max-peak-mb 64 --max-retained-mb 10
+#
+# Fixture listing, detail, builder and gallery responses are written to a temporary response
+# archive and served through http_fetch's replay mode, so the real pipeline, scraper and output
+# writer run without network access.
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_fetch
+from archive import ArchiveWriter
+from config import BASE_URL, ENCODING
+from normalize import NormalizeStage
+from pipeline import CrawlPipeline
+from record_index import open_output_writer
+from scraper import PropertyScraper
+
+LISTINGS_PER_PAGE = 25
+BUILDERS = 40
+GALLERY_URL = 'https://www.squareyards.com/loadcommongallery'
+
+# Real detail pages carry large inline scripts; this keeps the fixture's parse cost realistic
+SCRIPT_PADDING = "<script>var pageData = {" + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(600)) + "};</script>"
+
+
+def detail_url(pid):
+    return f"https://www.squareyards.com/gurgaon-residential-property/fixture-project-{pid}/{pid}/project"
+
+
+def builder_url(builder):
+    return f"https://www.squareyards.com/builders/fixture-builder-{builder}"
+
+
+def listing_page(pids):
+    tiles = "".join(f"""
+    <div class="npTile">
+      <button class="npFavBtn shortlistcontainerlink" data-projectid="{pid}" data-propstatus="Under Construction"
+              data-image="images/project/{pid}/cover.jpg"></button>
+      <div class="npProjectName"><a href="{detail_url(pid)}"><strong>Fixture Project {pid}</strong></a></div>
+      <div class="npProjectCity">Sector {pid % 110}, Gurgaon</div>
+      <div class="npPriceBox">&#8377; {1 + pid % 5}.2 Cr - {3 + pid % 7}.5 Cr</div>
+    </div>""" for pid in pids)
+    return f"<html><body>{tiles}</body></html>"
+
+
+def detail_page(pid):
+    builder = pid % BUILDERS
+    about = "".join(f"<p>Paragraph {i} about fixture project {pid}, its towers, amenities and location.</p>"
+                    for i in range(20))
+    amenities = "".join(f"""
+      <div class="accordion-item"><div class="accordion-header"><strong>Category {c}</strong></div>
+        <table><tr>{"".join(f'<td><img data-src="https://static.squareyards.com/icons/amenity-{c}-{a}.svg"><span>Amenity {c}-{a}</span></td>' for a in range(6))}</tr></table>
+      </div>""" for c in range(4))
+    specs = "".join(f'<tr><td class="specification-heading"><strong>Spec {i}</strong></td>'
+                    f'<td class="specification-value"><span>Value {i} for {pid}</span></td></tr>' for i in range(8))
+    prices = "".join(f'<tr><td><span>{b} BHK Apartment</span><strong>{1200 + b * 300} - {1500 + b * 300} sq ft</strong></td>'
+                     f'<td><strong>&#8377; {b}.{pid % 9} Cr</strong></td></tr>' for b in range(2, 6))
+    landmarks = "".join(f"""
+      <div class="near-distance-box" data-attribute="Category {c}"><table><tbody>
+        {"".join(f'<tr><td class="distance-title">Landmark {c}-{i}</td><td class="distance"><span>~</span><span>{i}.{c} Km</span></td></tr>' for i in range(5))}
+      </tbody></table></div>""" for c in range(3))
+    faq = "".join(f"<li><strong>Q: Question {i}?</strong><p>Answer {i} for project {pid}.</p></li>" for i in range(6))
+    plans = "".join(f"""
+      <div id="floorPlansSlider_{b}_bhk">{"".join(f'''
+        <div class="floor-plan-item"><div class="floor-plan-title"><strong>{b} BHK</strong><span>({1200 + i * 50} sq ft)</span></div>
+          <div class="unit-cover-bg"><img alt="plan" data-src="https://static.squareyards.com/plans/{pid}-{b}-{i}.jpg?w=400"></div>
+          <div class="price-box"><strong>&#8377; {b}.{i} Cr</strong></div><span class="virtual-badge" planid="{pid}{b}{i}"></span></div>''' for i in range(2))}
+      </div>""" for b in range(2, 5))
+    return f"""<html><head>{SCRIPT_PADDING}</head><body>
+    <div class="left-side"><ul class="status-box"><li></li><li></li><li>
+      <div class="status"><span class="bhk-type">2, 3, 4 BHK</span></div><div class="status"><strong>1200 - 2400 sq ft</strong></div>
+      <div class="status"><strong>{300 + pid % 500}</strong></div><div class="status"><strong>{5 + pid % 20} Acres</strong></div>
+    </li></ul></div>
+    <section class="about-project-section" id="aboutProject"><div class="content-box">{about}</div></section>
+    <div class="amenities-modal">{amenities}</div>
+    <section id="specifications"><table class="specification-table">{specs}</table></section>
+    <section class="price-insight-section" id="dataPriceInsights">
+      <article class="market-supply"><div class="price-insight-info-box">Median asking price</div>
+        <div id="dataPriceInsightsContainer" data-median="{9000 + pid % 4000}" data-medianLabel="per sq ft"><ul><li>Q1</li><li>Q2</li></ul></div></article>
+      <article class="rental-supply"><div class="rental-supply-table"><table><tbody>
+        <tr><td>2 BHK</td><td>12</td><td>34</td></tr><tr><td>3 BHK</td><td>8</td><td>21</td></tr></tbody></table></div></article>
+      <article class="comparable-projects"><div class="comparable-projects-item"><div class="comparable-projects-info">Other Project</div>
+        <div class="comparable-projects-value"><span>&#8377; 11,000</span></div></div></article>
+    </section>
+    <div id="mapLandmarks">{landmarks}</div>
+    <div id="faq"><div class="faq-wrapper"><ul>{faq}</ul></div></div>
+    <div id="priceList"><table><tbody>{prices}</tbody></table></div>
+    <div id="reraDetails"><div class="accordion-item"><div class="accordion-header" data-reraid="RC/{pid}">
+      <strong>RC/REP/HARERA/GGM/{pid} <span>Fixture Project {pid}</span></strong></div></div></div>
+    <div class="qr-box"><div class="qr-content"><ul><li><b>Square Yards RERA:</b> RC/HARERA/GGM/1234</li></ul></div></div>
+    <div id="localtionIntelligence"><div class="key-insights-header"><div class="key-insights-heading">
+      <div class="content-box"><p>Location insights for {pid}.</p></div></div></div>
+      <div class="key-insight-card"><figure><img src="/assets/images/insight.svg"></figure><p>Close to metro</p></div>
+      <div class="keyinside-btn-box"><a href="https://www.squareyards.com/gurgaon/locality">Know more</a></div></div>
+    <div id="floorPlans">{plans}</div>
+    <section class="about-builder-section" id="aboutBuilder"><h2><a href="{builder_url(builder)}">About - Fixture Builder {builder}</a></h2></section>
+    </body></html>"""
+
+
+def builder_page(builder):
+    cities = "".join(f'<div class="mainOfficeAddress" data-name="City {i}" data-lat="28.{i}" data-long="77.{i}">'
+                     f'<div class="mainOfficeLocation"><span><p>Office {i}, Fixture Builder {builder}</p></span></div></div>'
+                     for i in range(6))
+    return f"""<html><head>{SCRIPT_PADDING}</head><body>
+    <div class="description" id="overview"><div class="descriptionBox">Fixture Builder {builder} builds homes.</div></div>
+    <div class="mainOfficeBox"><div class="mainOfficeAddress" data-lat="28.4" data-long="77.0"><strong>Head Office</strong>
+      <span>Gurgaon</span><div class="mainOfficeLocation"><span>Golf Course Road</span></div></div></div>
+    <div class="branchOfficeBox"><div class="branchOfficeBody">{cities}</div></div>
+    <div id="keyServices"><div class="descriptionBox">{"".join(f"<p>Service {i}</p>" for i in range(30))}</div></div>
+    <div id="awards"><div class="awardDescription">{"".join(f"<p>Award {i}</p>" for i in range(30))}</div></div>
+    <div id="contact"><div class="descriptionBox"><span class="telephoneNumber"><a>+91 124 000 0000</a></span></div></div>
+    </body></html>"""
+
+
+def gallery(pid):
+    figures = "".join(f'<figure sub-tab="Tab {t}"><img title="Image {i}" src="https://static.squareyards.com/gallery/{pid}-{t}-{i}.jpg?w=800" alt="img"></figure>'
+                      for t in range(3) for i in range(6))
+    return f'<div class="bxslider">{figures}<figure><video alt="walkthrough"><source src="https://static.squareyards.com/video/{pid}.mp4" type="video/mp4"></video></figure></div>'
+
+
+def write_fixtures(folder, properties):
+    """Archive the responses of a crawl of ``properties`` listings, as http_fetch would have captured them."""
+    writer = ArchiveWriter(folder)
+    pids = list(range(100000, 100000 + properties))
+    pages = [pids[i:i + LISTINGS_PER_PAGE] for i in range(0, len(pids), LISTINGS_PER_PAGE)]
+    for page, page_pids in enumerate(pages, start=1):
+        writer.write('listing', 'GET', BASE_URL + str(page), 200, listing_page(page_pids))
+    writer.write('listing', 'GET', BASE_URL + str(len(pages) + 1), 200, listing_page([]))
+    for pid in pids:
+        writer.write('detail', 'GET', detail_url(pid), 200, detail_page(pid))
+        writer.write('gallery', 'POST', GALLERY_URL, 200, gallery(pid), body={"projectId": str(pid), "type": "Project"})
+    for builder in range(BUILDERS):
+        writer.write('builder', 'GET', builder_url(builder), 200, builder_page(builder))
+    writer.close()
+
+
+def run(properties, workers, folder):
+    http_fetch.enable_replay(os.path.join(folder, 'archive'))
+    output_file = os.path.join(folder, 'soak_properties.jsonl')
+    samples = []
+
+    gc.collect()
+    tracemalloc.start()
+    start_snapshot = tracemalloc.take_snapshot()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+
+    with open_output_writer(output_file, ENCODING) as writer:
+        def write(record):
+            writer.write(record)
+            if writer.count % 100 == 0:
+                samples.append(tracemalloc.get_traced_memory()[0] - baseline)
+
+        sink = NormalizeStage(write)
+        CrawlPipeline(PropertyScraper(), detail_workers=workers, sink=sink).run()
+        sink.flush()
+        written = writer.count
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    end_snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return {
+        'written': written,
+        'seconds': elapsed,
+        'peak': peak - baseline,
+        'retained': current - baseline,
+        'samples': samples,
+        'top': end_snapshot.compare_to(start_snapshot, 'lineno')[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl fixture properties under tracemalloc and check memory budgets")
+    parser.add_argument('--properties', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=5, help="Detail workers")
+    parser.add_argument('--max-peak-mb', type=float, default=48, help="Budget for peak traced memory above the baseline")
+    parser.add_argument('--max-retained-mb', type=float, default=8, help="Budget for memory still held after the crawl")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='soak-')
+    try:
+        print(f"Writing fixtures for {args.properties} properties to {folder}")
+        write_fixtures(os.path.join(folder, 'archive'), args.properties)
+        result = run(args.properties, args.workers, folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    mb = 1024 * 1024
+    samples = result['samples']
+    quarter = max(len(samples) // 4, 1)
+    # Working set at the end of the run vs the start; a steady climb here is a leak
+    growth = (sum(samples[-quarter:]) - sum(samples[:quarter])) / quarter if samples else 0
+
+    print(f"\n{result['written']} records in {result['seconds']:.1f}s")
+    print("Top allocation sites still held:")
+    for stat in result['top']:
+        print(f"  {stat}")
+    print(f"\npeak      {result['peak'] / mb:8.1f} MB  (budget {args.max_peak_mb} MB)")
+    print(f"retained  {result['retained'] / mb:8.1f} MB  (budget {args.max_retained_mb} MB, "
+          f"{result['retained'] / max(result['written'], 1):.0f} bytes per record)")
+    print(f"growth    {growth / mb:8.1f} MB  between the first and last quarter of the run")
+
+    failed = result['written'] < args.properties
+    if failed:
+        print(f"FAILED: only {result['written']} of {args.properties} records written")
+    for name, value, budget in (('peak', result['peak'], args.max_peak_mb),
+                                ('retained', result['retained'], args.max_retained_mb)):
+        if value > budget * mb:
+            print(f"OVER BUDGET: {name} memory")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Startup benchmark: import time of the entry modules in fresh interpreters
+#
+#   python benchmarks/startup.py
+#   python benchmarks/startup.py --runs 10 --max-ms 400
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What short jobs and process-pool workers import
+ENTRY_MODULES = ['scraper', 'process_scraper', 'main', 'orchestrator', 'multi_city', 'replay']
+
+# Modules that should only load when the Selenium backend or a progress bar is actually used
+HEAVY_MODULES = ('selenium', 'webdriver_manager', 'tqdm')
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules if name.startswith({heavy!r})}})
+print(elapsed, ','.join(heavy))
+"""
+
+
+def measure(module, runs):
+    """Median import time in ms over ``runs`` fresh interpreters, plus the heavy modules it pulled in."""
+    timings = []
+    heavy = ''
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]) * 1000)
+        heavy = output[1] if len(output) > 1 else ''
+    return statistics.median(timings), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the scraper's entry modules")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument('--max-ms', type=float, help="Exit non-zero if any module's median exceeds this")
+    parser.add_argument('modules', nargs='*', default=ENTRY_MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<18}{'median ms':>10}  heavy imports")
+    for module in args.modules:
+        median, heavy = measure(module, args.runs)
+        over = args.max_ms is not None and median > args.max_ms
+        failed = failed or over or bool(heavy)
+        print(f"{module:<18}{median:>10.1f}  {heavy or '-'}{'  OVER BUDGET' if over else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Builders written once per output file and referenced from properties by id
+
+import json
+import os
+from builder_information import get_builder_id
+from utils import save_to_json, iter_json_records
+from config import BUILDERS_SUFFIX, ENCODING
+
+
+def builders_path(data_file):
+    """e.g. output/gurgaon_properties.json -> output/gurgaon_properties.builders.json"""
+    return os.path.splitext(data_file)[0] + BUILDERS_SUFFIX
+
+
+def _replace_key(record, old_key, new_key, value):
+    # Rebuilt rather than mutated so the key keeps its position in the output
+    return {new_key if key == old_key else key: value if key == old_key else item for key, item in record.items()}
+
+
+def split_builder(record, builders):
+    """Move ``builder_info`` into ``builders`` and reference it by ``builder_id``.
+
+    Records without an identifiable builder are returned unchanged.
+    """
+    builder_id = get_builder_id(record.get('builder_info'))
+    if not builder_id:
+        return record
+    builders[builder_id] = record['builder_info']
+    return _replace_key(record, 'builder_info', 'builder_id', builder_id)
+
+
+def inline_builder(record, builders):
+    """Inverse of split_builder: put the builder profile back into the record."""
+    if 'builder_id' not in record:
+        return record
+    return _replace_key(record, 'builder_id', 'builder_info', builders.get(record['builder_id']))
+
+
+def load_builders(data_file, encoding=ENCODING):
+    """The builders collection written next to ``data_file``, or {} if there is none."""
+    path = builders_path(data_file)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding=encoding) as f:
+        return json.load(f)
+
+
+def iter_inlined_records(data_file, encoding=ENCODING):
+    """Stream the records of an output file with builder profiles put back inline."""
+    builders = load_builders(data_file, encoding)
+    for record in iter_json_records(data_file, encoding):
+        yield inline_builder(record, builders)
+
+
+class BuilderSplitWriter:
+    """Wraps a JSON/JSONL writer so each builder is written once, to ``<file>.builders.json``."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.builders = {}
+
+    @property
+    def filename(self):
+        return self.writer.filename
+
+    @property
+    def encoding(self):
+        return self.writer.encoding
+
+    @property
+    def count(self):
+        return self.writer.count
+
+    def write(self, record):
+        return self.writer.write(split_builder(record, self.builders))
+
+    def close(self):
+        self.writer.close()
+        save_to_json(self.builders, builders_path(self.writer.filename), self.writer.encoding)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
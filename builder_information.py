@@ -1,5 +1,9 @@
-import requests
+import re
+import http_fetch
+from dedup import builder_cache
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
+from utils import bounded_html
 
 # Set headers and timeout globally (or customize as needed)
 HEADERS = {
@@ -7,31 +11,50 @@ HEADERS = {
 }
 TIMEOUT = 10
 
-def get_soup(url):
-    """Fetch and parse the HTML content from a URL."""
+def get_html(url):
+    """Fetch the raw HTML content from a URL."""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+        response = http_fetch.get(url, 'builder', headers=HEADERS, timeout=TIMEOUT)
         if response.status_code != 200:
             print(f"[ERROR] Failed to fetch page: {url} | Status Code: {response.status_code}")
             return None
-        return BeautifulSoup(response.text, 'html.parser')
+        return response.text
     except Exception as e:
         print(f"[EXCEPTION] While fetching {url}: {e}")
         return None
 
-def extract_builder_information(soupbody, url):
+def get_soup(url):
+    """Fetch and parse the HTML content from a URL."""
+    html = get_html(url)
+    if html is None:
+        return None
+    return BeautifulSoup(html, 'html.parser')
+
+def get_builder_page_url(soupbody, url):
+    """Find the builder page link in the about-builder section of a property page."""
     heading_tag = soupbody.select_one('section.about-builder-section#aboutBuilder h2')
     if not heading_tag:
         print(f"[ERROR] Failed to find builder information section in {url}")
-        return {}
+        return None
 
     link_tag = heading_tag.find('a')
     if not link_tag or not link_tag.get('href'):
         print(f"[ERROR] Builder link not found in h2 tag on {url}")
+        return None
+
+    return link_tag['href']
+
+def extract_builder_information(soupbody, url):
+    builder_page_url = get_builder_page_url(soupbody, url)
+    if not builder_page_url:
         return {}
+    return get_builder_information(builder_page_url)
 
-    builder_page_url = link_tag['href']
+def get_builder_information(builder_page_url):
+    """Builder profile from its page; many projects share a builder, so it is fetched once per crawl."""
+    return builder_cache.get(builder_page_url, fetch_builder_information) or {}
 
+def fetch_builder_information(builder_page_url):
     soup = get_soup(builder_page_url)
     if not soup:
         return {}
@@ -40,7 +63,35 @@ def extract_builder_information(soupbody, url):
     # print(f"[INFO] Extracted head office address: {data}")
     # exit()
     
+    try:
+        return parse_builder_information(soup, builder_page_url)
+    finally:
+        soup.decompose()
+
+def builder_id_from_url(url):
+    """Stable builder id from the builder page URL, e.g. '.../godrej-properties-builder' -> 'godrej-properties-builder'."""
+    if not url:
+        return None
+    slug = urlparse(url).path.rstrip('/').rsplit('/', 1)[-1]
+    return re.sub(r'[^a-z0-9-]+', '-', slug.lower()).strip('-') or None
+
+def get_builder_id(builder_info):
+    """Stable id for a builder_info dict: its page URL slug, or its slugified name."""
+    if not builder_info:
+        return None
+    builder_id = builder_id_from_url(builder_info.get('url'))
+    if not builder_id and builder_info.get('name'):
+        builder_id = re.sub(r'[^a-z0-9]+', '-', builder_info['name'].lower()).strip('-') or None
+    return builder_id
+
+def record_builder_id(record):
+    """Builder id of a property record, whether its builder is inlined or referenced."""
+    return record.get('builder_id') or get_builder_id(record.get('builder_info'))
+
+def parse_builder_information(soup, url=None):
+    """Run all builder page extractors over a parsed builder page."""
     return {
+        "url": url,
         "overview": get_builder_description(soup),
         "head_office_address": get_head_office_address(soup),
         "branch_office_address": get_branch_offices(soup),
@@ -178,14 +229,14 @@ def get_key_service_and_specialities(soup):
     box = soup.select_one('#keyServices .descriptionBox')
     if not box:
         return None
-    return str(box)
+    return bounded_html(box, outer=True)
 
 def get_awards_and_recognition(soup):
     """Extract the full inner HTML of the .descriptionBox section under #keyServices."""
     box = soup.select_one('div#awards .awardDescription')
     if not box:
         return None
-    return str(box)
+    return bounded_html(box, outer=True)
 
 def get_customer_care_number(soup):
     """Extract the customer care number from the contact section."""
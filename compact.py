@@ -0,0 +1,289 @@
+# Compact in-memory property records: slotted record types and string interning
+
+_MISSING = object()
+
+
+class StringPool:
+    """Interning table: equal strings seen through the pool share one object."""
+
+    def __init__(self):
+        self.strings = {}
+
+    def __call__(self, value):
+        return self.strings.setdefault(value, value)
+
+    def __len__(self):
+        return len(self.strings)
+
+
+def _compact(value, pool):
+    """Intern every string (keys included) of a plain JSON value."""
+    if isinstance(value, str):
+        return pool(value)
+    if isinstance(value, dict):
+        return {pool(key): _compact(item, pool) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item, pool) for item in value]
+    return value
+
+
+def _expand(value):
+    """Turn records back into plain dicts, recursively."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    return value
+
+
+class SchemaError(ValueError):
+    """A decoded record does not match the property record schema."""
+
+
+def _validate(kind, value, path):
+    if kind is None or value is None:
+        return
+    if kind is str:
+        if not isinstance(value, (str, int, float)):
+            raise SchemaError(f"{path}: expected a string, got {type(value).__name__}")
+    else:
+        kind.validate(value, path)
+
+
+class ListOf:
+    def __init__(self, record_type):
+        self.record_type = record_type
+
+    def compact(self, value, pool):
+        if not isinstance(value, list):
+            return _compact(value, pool)
+        return [self.record_type.from_dict(item, pool) for item in value]
+
+    def validate(self, value, path):
+        if not isinstance(value, list):
+            raise SchemaError(f"{path}: expected a list, got {type(value).__name__}")
+        for position, item in enumerate(value):
+            self.record_type.validate(item, f"{path}[{position}]")
+
+
+class GroupsOf:
+    """``{category: [record, ...]}``, as used for amenities, landmarks, floor plans and images."""
+
+    def __init__(self, record_type):
+        self.items = ListOf(record_type)
+
+    def compact(self, value, pool):
+        if not isinstance(value, dict):
+            return _compact(value, pool)
+        return {pool(category): self.items.compact(items, pool) for category, items in value.items()}
+
+    def validate(self, value, path):
+        if not isinstance(value, dict):
+            raise SchemaError(f"{path}: expected an object of lists, got {type(value).__name__}")
+        for category, items in value.items():
+            _validate(self.items, items, f"{path}.{category}")
+
+
+class Record:
+    """Base for slotted record types.
+
+    ``FIELDS`` lists ``(attribute, json key, kind)``; ``kind`` is ``str`` for
+    a string (or null), None for any JSON value, a Record subclass, ListOf or
+    GroupsOf. The same declaration drives ``validate``. Keys absent from the
+    source dict stay unset, and unknown keys (e.g. added by normalization)
+    go to ``extra``, so ``to_dict`` reproduces the source dict exactly.
+    """
+
+    __slots__ = ('extra',)
+    FIELDS = ()
+    REQUIRED = ()
+
+    @classmethod
+    def from_dict(cls, data, pool):
+        if not isinstance(data, dict):
+            return _compact(data, pool)
+        known = [key for _, key, _ in cls.FIELDS]
+        positions = [known.index(key) if key in known else len(known) for key in data]
+        if positions != sorted(positions):
+            # Key order differs from the schema; keep the dict so output order is unchanged
+            return _compact(data, pool)
+
+        record = cls.__new__(cls)
+        for attribute, key, kind in cls.FIELDS:
+            if key in data:
+                value = data[key]
+                if kind is None or kind is str:
+                    value = _compact(value, pool)
+                elif isinstance(kind, type):
+                    value = kind.from_dict(value, pool)
+                else:
+                    value = kind.compact(value, pool)
+                setattr(record, attribute, value)
+        extra = {pool(key): _compact(value, pool) for key, value in data.items() if key not in known}
+        record.extra = extra or None
+        return record
+
+    @classmethod
+    def validate(cls, data, path=None):
+        """Raise SchemaError if ``data`` (a plain dict) doesn't match this record type."""
+        path = path or cls.__name__
+        if data is None:
+            return
+        if not isinstance(data, dict):
+            raise SchemaError(f"{path}: expected an object, got {type(data).__name__}")
+        for key in cls.REQUIRED:
+            if data.get(key) is None:
+                raise SchemaError(f"{path}: missing required '{key}'")
+        for _, key, kind in cls.FIELDS:
+            if key in data:
+                _validate(kind, data[key], f"{path}.{key}")
+
+    def to_dict(self):
+        data = {}
+        for attribute, key, _ in self.FIELDS:
+            value = getattr(self, attribute, _MISSING)
+            if value is not _MISSING:
+                data[key] = _expand(value)
+        if self.extra:
+            data.update(_expand(self.extra))
+        return data
+
+
+class Amenity(Record):
+    __slots__ = ('name', 'icon')
+    FIELDS = (('name', 'name', str), ('icon', 'icon', str))
+
+
+class Landmark(Record):
+    __slots__ = ('title', 'distance')
+    FIELDS = (('title', 'distance-title', str), ('distance', 'distance', str))
+
+
+class Specification(Record):
+    __slots__ = ('title', 'value')
+    FIELDS = (('title', 'title', str), ('value', 'value', str))
+
+
+class FaqEntry(Record):
+    __slots__ = ('question', 'answer')
+    FIELDS = (('question', 'question', str), ('answer', 'answer', str))
+
+
+class PriceListItem(Record):
+    __slots__ = ('unit_type', 'price')
+    FIELDS = (('unit_type', 'unit_type', str), ('price', 'price', str))
+
+
+class FloorPlan(Record):
+    __slots__ = ('title', 'attribute', 'src_2d', 'alt', 'src_3d', 'price')
+    FIELDS = (
+        ('title', 'title', str),
+        ('attribute', 'attribute', str),
+        ('src_2d', '2d_src', str),
+        ('alt', 'alt', str),
+        ('src_3d', '3d_src', str),
+        ('price', 'price', str),
+    )
+
+
+class ReraEntry(Record):
+    __slots__ = ('rera_id', 'project_name')
+    FIELDS = (('rera_id', 'rera_id', str), ('project_name', 'project_name', str))
+
+
+class Rera(Record):
+    __slots__ = ('project_rera', 'square_yards_rera')
+    FIELDS = (('project_rera', 'project_rera', ListOf(ReraEntry)), ('square_yards_rera', 'square_yards_rera', str))
+
+
+class Information(Record):
+    __slots__ = ('unit_config', 'size', 'units', 'total_area')
+    FIELDS = (
+        ('unit_config', 'unit_config', str),
+        ('size', 'size', str),
+        ('units', 'units', str),
+        ('total_area', 'total_area', str),
+    )
+
+
+class Image(Record):
+    __slots__ = ('title', 'src', 'alt')
+    FIELDS = (('title', 'title', str), ('src', 'src', str), ('alt', 'alt', str))
+
+
+class Video(Record):
+    __slots__ = ('type', 'src', 'alt')
+    FIELDS = (('type', 'type', str), ('src', 'src', str), ('alt', 'alt', str))
+
+
+class Media(Record):
+    __slots__ = ('images', 'videos')
+    FIELDS = (('images', 'images', GroupsOf(Image)), ('videos', 'videos', ListOf(Video)))
+
+
+class Project(Record):
+    __slots__ = ('name', 'location', 'thumbnail_image', 'price', 'price_insights', 'status', 'information',
+                 'price_list', 'floor_plans', 'amenities', 'specifications', 'about', 'nearby_landmarks',
+                 'location_insights', 'rera')
+    FIELDS = (
+        ('name', 'name', str),
+        ('location', 'location', str),
+        ('thumbnail_image', 'thumbnail_image', str),
+        ('price', 'price', str),
+        ('price_insights', 'price_insights', None),
+        ('status', 'status', str),
+        ('information', 'information', Information),
+        ('price_list', 'price_list', ListOf(PriceListItem)),
+        ('floor_plans', 'floor_plans', GroupsOf(FloorPlan)),
+        ('amenities', 'amenities', GroupsOf(Amenity)),
+        ('specifications', 'specifications', ListOf(Specification)),
+        ('about', 'about', str),
+        ('nearby_landmarks', 'nearby_landmarks', GroupsOf(Landmark)),
+        ('location_insights', 'location_insights', None),
+        ('rera', 'rera', Rera),
+    )
+
+
+class PropertyRecord(Record):
+    __slots__ = ('property_id', 'project', 'builder_info', 'faq', 'all_media')
+    REQUIRED = ('property_id',)
+    FIELDS = (
+        ('property_id', 'property_id', str),
+        ('project', 'project', Project),
+        ('builder_info', 'builder_info', None),
+        ('faq', 'faq', ListOf(FaqEntry)),
+        ('all_media', 'all_media', Media),
+    )
+
+
+def compact_record(record, pool):
+    """Convert a scraped property dict into its compact form."""
+    return PropertyRecord.from_dict(record, pool)
+
+
+def expand_record(record):
+    """Plain dict for serialization; plain dicts pass through unchanged."""
+    return _expand(record)
+
+
+class CompactResults:
+    """A list-like holder that keeps records compact and expands them on iteration."""
+
+    def __init__(self):
+        self.pool = StringPool()
+        self.records = []
+
+    def append(self, record):
+        self.records.append(compact_record(record, self.pool))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __bool__(self):
+        return bool(self.records)
+
+    def __iter__(self):
+        for record in self.records:
+            yield expand_record(record)
@@ -0,0 +1,239 @@
+# Frontier deduplication: properties, detail/builder URLs and asset URLs are fetched once per crawl
+
+import copy
+import hashlib
+import math
+import os
+import struct
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config import (
+    DEDUP_MODE, DEDUP_FILE, DEDUP_CAPACITY, DEDUP_ERROR_RATE, BUILDER_CACHE_SIZE, ASSET_CACHE_SIZE,
+)
+
+# Query parameters that never change the page served
+TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'gclid', 'fbclid')
+
+BLOOM_MAGIC = b'BLM1'
+
+
+def normalize_url(url):
+    """Canonical form of a URL for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if k.lower() not in TRACKING_PARAMS))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+class ExactFilter:
+    """Set of seen keys; exact, but grows with the crawl."""
+
+    def __init__(self):
+        self.keys = set()
+        self.lock = threading.RLock()  # Reentrant: CrawlDedup holds it across several adds
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key):
+        """Add ``key``; True if it was not seen before."""
+        with self.lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            return True
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of seen keys.
+
+    Sized for ``capacity`` keys at ``error_rate`` false positives (about 2.4
+    MB per million keys at 1e-4); memory never grows beyond that. A false
+    positive makes a new key look seen, so it is skipped. With ``path`` the
+    bits are loaded from and saved to that file, carrying the filter across
+    runs of one crawl.
+    """
+
+    def __init__(self, capacity=DEDUP_CAPACITY, error_rate=DEDUP_ERROR_RATE, path=None):
+        self.path = path
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                magic, self.size, self.hashes, self.count = struct.unpack('<4sQQQ', f.read(28))
+                if magic != BLOOM_MAGIC:
+                    raise ValueError(f"{path} is not a Bloom filter file")
+                self.bits = bytearray(f.read())
+            print(f"[DEDUP] Loaded {self.count} keys from {path}")
+        else:
+            self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            self.hashes = max(1, round(self.size / capacity * math.log(2)))
+            self.count = 0
+            self.bits = bytearray((self.size + 7) // 8)
+        self._warned = False
+
+    def __len__(self):
+        return self.count
+
+    def _positions(self, key):
+        # Double hashing: k bit positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key):
+        """Add ``key``; True if it was (almost certainly) not seen before."""
+        positions = self._positions(key)
+        with self.lock:
+            new = False
+            for pos in positions:
+                mask = 1 << (pos & 7)
+                if not self.bits[pos >> 3] & mask:
+                    self.bits[pos >> 3] |= mask
+                    new = True
+            if new:
+                self.count += 1
+                if self.count > self.capacity and not self._warned:
+                    self._warned = True
+                    print(f"[WARN] Bloom filter past its capacity of {self.capacity} keys; "
+                          f"false positives will rise (raise DEDUP_CAPACITY)")
+            return new
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(struct.pack('<4sQQQ', BLOOM_MAGIC, self.size, self.hashes, self.count))
+                f.write(self.bits)
+            os.replace(tmp, self.path)
+
+
+def _listing_keys(listing):
+    keys = [f"property:{listing['project_id']}"]
+    if listing.get('url'):
+        keys.append(f"detail:{normalize_url(listing['url'])}")
+    return keys
+
+
+class CrawlDedup:
+    """Decides whether a listing tile is new to this crawl before it is scheduled.
+
+    A listing is a duplicate if its ``project_id`` or its normalized detail
+    URL was already scheduled, e.g. because listing order shifted between
+    pages mid-crawl. ``mode`` is 'exact' (a set) or 'bloom' (a fixed-size
+    Bloom filter).
+
+    With 'bloom' and a ``path``, properties are also recorded in a second,
+    persisted Bloom filter once ``mark_scraped`` confirms their scrape
+    succeeded, and a resumed crawl skips them. Properties that failed are
+    not recorded there, so the next run retries them.
+    """
+
+    def __init__(self, mode=DEDUP_MODE, path=DEDUP_FILE, capacity=DEDUP_CAPACITY, error_rate=DEDUP_ERROR_RATE):
+        if mode == 'exact':
+            self.filter = ExactFilter()
+        elif mode == 'bloom':
+            self.filter = BloomFilter(capacity, error_rate)
+        else:
+            raise ValueError(f"Unknown DEDUP_MODE '{mode}'; choose 'exact' or 'bloom'")
+        self.scraped = BloomFilter(capacity, error_rate, path) if mode == 'bloom' and path else None
+        self.duplicates = 0
+
+    def first_listing(self, listing):
+        """Mark a listing tile as scheduled; False if it was scheduled (or scraped by an earlier run) before."""
+        keys = _listing_keys(listing)
+        done = self.scraped is not None and any(key in self.scraped for key in keys)
+        # Every key is added, so a later listing matching any of them is caught
+        with self.filter.lock:
+            new = [self.filter.add(key) for key in keys]
+            if all(new) and not done:
+                return True
+            self.duplicates += 1
+            return False
+
+    def mark_scraped(self, listing):
+        """Record a successfully scraped listing in the persisted filter."""
+        if self.scraped is not None:
+            for key in _listing_keys(listing):
+                self.scraped.add(key)
+
+    def save(self):
+        if self.scraped is not None:
+            self.scraped.save()
+
+
+class FetchOnceCache:
+    """Bounded LRU of results by normalized URL, so a repeated URL is fetched once.
+
+    Concurrent callers asking for a URL that is already being fetched wait for
+    that fetch instead of starting their own. Each caller gets its own deep
+    copy, since records are modified after scraping (e.g. localized asset
+    paths).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.results = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    def get(self, url, fetch):
+        """Return ``fetch(url)``, reusing the result for a URL seen before."""
+        key = normalize_url(url)
+        while True:
+            with self.lock:
+                if key in self.results:
+                    self.results.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(self.results[key])
+                event = self.pending.get(key)
+                if event is None:
+                    event = self.pending[key] = threading.Event()
+                    break
+            event.wait()
+            with self.lock:
+                if key not in self.results:
+                    # The other fetch failed; it isn't cached, so fetch it ourselves
+                    return fetch(url)
+
+        try:
+            result = fetch(url)
+            if result:
+                with self.lock:
+                    self.results[key] = result
+                    if len(self.results) > self.size:
+                        self.results.popitem(last=False)
+                result = copy.deepcopy(result)
+            return result
+        finally:
+            with self.lock:
+                del self.pending[key]
+            event.set()
+
+
+# Builder profiles repeat across a builder's projects; asset URLs (amenity icons, logos) across properties
+builder_cache = FetchOnceCache(BUILDER_CACHE_SIZE)
+asset_cache = FetchOnceCache(ASSET_CACHE_SIZE)
@@ -0,0 +1,259 @@
+# Incremental delta crawl driven by listing-tile fingerprints
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from section_diff import DiffFeed, changed_sections
+from utils import save_to_json
+from config import FINGERPRINT_DB, DELTA_MAX_AGE, CHANGESET_FILE, ENCODING
+
+# Listing tile fields that identify a change worth re-scraping the detail page for
+FINGERPRINT_FIELDS = ('project_id', 'price_range', 'status', 'image')
+
+
+def listing_fingerprint(listing):
+    """Hash the listing tile fields that signal a changed property."""
+    raw = "\x1f".join(listing.get(field) or '' for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """Fingerprints and last scraped records from previous runs, in SQLite."""
+
+    def __init__(self, path=FINGERPRINT_DB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                property_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                record TEXT NOT NULL,
+                output_record TEXT,
+                first_seen_at REAL,
+                observations INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0,
+                last_changed_at REAL
+            )
+        """)
+        # Add columns missing from stores created by older versions
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(fingerprints)")}
+        for column, definition in self.MIGRATED_COLUMNS:
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE fingerprints ADD COLUMN {column} {definition}")
+        self.conn.commit()
+
+    MIGRATED_COLUMNS = (
+        ('output_record', 'TEXT'),
+        ('first_seen_at', 'REAL'),
+        ('observations', 'INTEGER NOT NULL DEFAULT 0'),
+        ('changes', 'INTEGER NOT NULL DEFAULT 0'),
+        ('last_changed_at', 'REAL'),
+    )
+
+    def get(self, property_id):
+        """Return (fingerprint, scraped_at, record) for a property, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, scraped_at, record FROM fingerprints WHERE property_id = ?",
+                (property_id,),
+            ).fetchone()
+        if not row:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def put(self, property_id, fingerprint, record, scraped_at=None):
+        scraped_at = scraped_at or time.time()
+        with self.lock:
+            self.conn.execute(
+                """INSERT INTO fingerprints (property_id, fingerprint, scraped_at, record, first_seen_at, last_changed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(property_id) DO UPDATE SET fingerprint = excluded.fingerprint,
+                   scraped_at = excluded.scraped_at, record = excluded.record""",
+                (property_id, fingerprint, scraped_at, json.dumps(record, ensure_ascii=False), scraped_at, scraped_at),
+            )
+            self.conn.commit()
+
+    def record_observation(self, property_id, changed):
+        """Count a re-scrape of a known property and whether anything had changed."""
+        with self.lock:
+            self.conn.execute(
+                """UPDATE fingerprints SET observations = observations + 1,
+                   changes = changes + ?, last_changed_at = CASE WHEN ? THEN ? ELSE last_changed_at END
+                   WHERE property_id = ?""",
+                (1 if changed else 0, changed, time.time(), property_id),
+            )
+            self.conn.commit()
+
+    def all_stats(self):
+        """Return {property_id: stats dict} for every stored property, for recrawl planning."""
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT property_id, fingerprint, scraped_at, first_seen_at, observations, changes,
+                   last_changed_at FROM fingerprints"""
+            ).fetchall()
+        return {
+            row[0]: {
+                'fingerprint': row[1],
+                'scraped_at': row[2],
+                'first_seen_at': row[3] or row[2],
+                'observations': row[4],
+                'changes': row[5],
+                'last_changed_at': row[6] or row[2],
+            }
+            for row in rows
+        }
+
+    def get_output(self, property_id):
+        """Return the last record written after asset localization, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT output_record FROM fingerprints WHERE property_id = ?", (property_id,),
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def put_output(self, property_id, record):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE fingerprints SET output_record = ? WHERE property_id = ?",
+                (json.dumps(record, ensure_ascii=False), property_id),
+            )
+            self.conn.commit()
+
+    def property_ids(self):
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT property_id FROM fingerprints")}
+
+    def delete(self, property_ids):
+        with self.lock:
+            self.conn.executemany("DELETE FROM fingerprints WHERE property_id = ?", [(pid,) for pid in property_ids])
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class DeltaScraper:
+    """Wraps a scraper so unchanged listings re-emit their cached record.
+
+    A property whose tile fingerprint matches the stored one, and whose stored
+    record is younger than ``max_age`` seconds, skips the detail, builder and
+    gallery requests entirely. Every outcome is tracked for the run changeset.
+
+    Re-scraped records are compared section by section against their stored
+    version; the changed sections are written to the diff feed and kept
+    for downstream stages via ``pop_changed_sections``. When the wrapped
+    scraper builds only some sections (``--fields``), they are merged into
+    the stored record, so the rest is neither reported as changed nor lost.
+    """
+
+    def __init__(self, scraper, store=None, max_age=DELTA_MAX_AGE, diff_feed=None):
+        self.scraper = scraper
+        self.store = store or FingerprintStore()
+        self.max_age = max_age
+        self.diff_feed = diff_feed or DiffFeed()
+        self.section_changes = {}
+        self.changes = {'new': [], 'changed': [], 'refreshed': [], 'unchanged': [], 'deferred': [], 'removed': []}
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Anything not overridden (base_url, get_html, ...) comes from the wrapped scraper
+        return getattr(self.scraper, name)
+
+    def _track(self, kind, property_id, sections):
+        with self.lock:
+            self.changes[kind].append(property_id)
+            self.section_changes[property_id] = sections
+
+    def pop_changed_sections(self, property_id):
+        """Sections that changed for a property this run; None if unknown (treat all as changed)."""
+        with self.lock:
+            return self.section_changes.pop(property_id, None)
+
+    def fetch_listings(self, page, base_url=None):
+        return self.scraper.fetch_listings(page, base_url=base_url)
+
+    def scrape_property(self, listing, refresh=None):
+        """Scrape a listing or re-emit its cached record.
+
+        ``refresh`` lets a scheduler override the fingerprint/age decision:
+        True always re-scrapes, False reuses any cached record.
+        """
+        property_id = listing['project_id']
+        fingerprint = listing_fingerprint(listing)
+        with self.lock:
+            # Still listed even if its detail scrape fails below
+            self.seen.add(property_id)
+        cached = self.store.get(property_id)
+
+        if cached:
+            cached_fingerprint, scraped_at, record = cached
+            if refresh is None:
+                reuse = cached_fingerprint == fingerprint and time.time() - scraped_at < self.max_age
+            else:
+                reuse = not refresh
+            if reuse:
+                # Name and location aren't fingerprinted, so refresh them from the tile
+                record['project']['name'] = listing['project_name']
+                record['project']['location'] = listing['location']
+                # A changed tile only gets reused when a scheduler ran out of budget for it
+                self._track('unchanged' if cached_fingerprint == fingerprint else 'deferred', property_id, set())
+                return record
+
+        record = self.scraper.scrape_property(listing)
+        fields = getattr(self.scraper, 'fields', None)
+        if record and cached and fields is not None and fields.is_partial:
+            record = fields.merge_into(cached[2], record)
+        if record:
+            sections = changed_sections(cached[2] if cached else None, record)
+            self.store.put(property_id, fingerprint, record)
+            if not cached:
+                self._track('new', property_id, sections)
+                self.diff_feed.record_change(property_id, 'new', sections, record)
+                return record
+
+            self.store.record_observation(property_id, bool(sections) or cached[0] != fingerprint)
+            if cached[0] != fingerprint:
+                self._track('changed', property_id, sections)
+            else:
+                # Same tile but the stored record was too old to reuse
+                self._track('refreshed', property_id, sections)
+            if sections:
+                self.diff_feed.record_change(property_id, 'changed', sections, record)
+        return record
+
+    def finish_run(self, complete=True, changeset_file=CHANGESET_FILE, search=None):
+        """Write the run changeset.
+
+        Stored properties not seen in this run are reported as removed (and
+        dropped from the store and from the ``search`` index, if given) only
+        for ``complete`` crawls, since a partial page range can't tell a
+        delisted property from an unvisited one.
+        """
+        if complete:
+            removed = sorted(self.store.property_ids() - self.seen)
+            self.store.delete(removed)
+            if search and removed:
+                print(f"Removed {search.remove(removed)} delisted properties from the search index")
+            self.changes['removed'] = removed
+            for property_id in removed:
+                self.diff_feed.record_removed(property_id)
+        self.diff_feed.close()
+
+        changeset = {
+            'run_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'complete': complete,
+            'counts': {kind: len(ids) for kind, ids in self.changes.items()},
+        }
+        changeset.update(self.changes)
+        save_to_json(changeset, changeset_file, ENCODING)
+        print(f"Changeset: {changeset['counts']} -> {changeset_file}")
+        print(f"Diff feed: {self.diff_feed.count} entries -> {self.diff_feed.filename}")
+        return changeset
@@ -0,0 +1,184 @@
+# Coordinator/worker mode for crawling from several processes or hosts
+
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+import serialization
+from scraper import PropertyScraper
+from work_queue import open_work_queue
+from fields import FieldSelection
+from record_index import save_records
+from compact import StringPool, compact_record, expand_record
+from config import BASE_URL, BASE_URL_TEMPLATE, START_PAGE, END_PAGE, SHARD_FOLDER, WORKER_POLL_INTERVAL, OUTPUT_FILE, ENCODING, COMPACT_RESULTS
+
+
+def page_key(base_url, page):
+    return f"page:{base_url}{page}"
+
+
+def property_key(project_id):
+    return f"property:{project_id}"
+
+
+def run_coordinator(queue, base_urls=None, start_page=START_PAGE):
+    """Seed the queue with the first listing page of every base URL.
+
+    Workers enqueue the following page themselves while pages keep returning
+    listings, so pagination is discovered without a fixed END_PAGE.
+    """
+    for base_url in base_urls or [BASE_URL]:
+        if queue.put('page', page_key(base_url, start_page), {'base_url': base_url, 'page': start_page}):
+            print(f"[INFO] Seeded {base_url}{start_page}")
+        else:
+            print(f"[INFO] {base_url}{start_page} already queued")
+
+
+def wait_until_drained(queue, poll_interval=WORKER_POLL_INTERVAL):
+    """Print queue progress until no items are pending or leased."""
+    while not queue.is_drained():
+        print(f"[INFO] Queue state: {queue.counts()}")
+        time.sleep(poll_interval)
+    print(f"[INFO] Queue drained: {queue.counts()}")
+
+
+class CrawlWorker:
+    """Leases page and property items, scrapes them and appends results to its own shard."""
+
+    def __init__(self, queue, worker_id=None, shard_folder=SHARD_FOLDER, end_page=END_PAGE, fields=None):
+        self.queue = queue
+        self.fields = fields
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.end_page = end_page
+        self.scrapers = {}
+        self.working = []  # Items leased and being processed, kept alive by the heartbeat
+        os.makedirs(shard_folder, exist_ok=True)
+        self.shard_path = os.path.join(shard_folder, f"{self.worker_id}.jsonl")
+
+    def _scraper(self, base_url):
+        if base_url not in self.scrapers:
+            self.scrapers[base_url] = PropertyScraper(base_url=base_url, fields=self.fields)
+        return self.scrapers[base_url]
+
+    def handle_page(self, payload):
+        base_url, page = payload['base_url'], payload['page']
+        print(f"[{self.worker_id}] Scraping page {page} of {base_url}")
+        listings = self._scraper(base_url).fetch_listings(page)
+        if listings is None:
+            raise RuntimeError(f"Failed to fetch {base_url}{page}")
+        if not listings:
+            print(f"[{self.worker_id}] No listings on page {page}, pagination ends")
+            return
+
+        if self.end_page is None or page < self.end_page:
+            self.queue.put('page', page_key(base_url, page + 1), {'base_url': base_url, 'page': page + 1})
+        for listing in listings:
+            # Keyed by project id, so a listing that shifts to another page is crawled once
+            self.queue.put('property', property_key(listing['project_id']),
+                           {'base_url': base_url, 'listing': listing})
+
+    def handle_property(self, payload, shard):
+        record = self._scraper(payload['base_url']).scrape_property(payload['listing'])
+        if record:
+            shard.write(serialization.dumps(record, pretty=False) + "\n")
+            shard.flush()
+
+    def _heartbeat(self, stop):
+        """Extend the leases of items in progress, so a slow scrape isn't redelivered."""
+        while not stop.wait(self.queue.lease_seconds / 3):
+            for item in list(self.working):
+                if not self.queue.extend(item, self.worker_id):
+                    print(f"[WARN] Lost the lease on {item.key}")
+
+    def run(self, exit_when_drained=True, poll_interval=WORKER_POLL_INTERVAL):
+        """Process items until the queue is drained (or forever)."""
+        print(f"[INFO] Worker {self.worker_id} writing to {self.shard_path}")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            self._run(exit_when_drained, poll_interval)
+        finally:
+            stop.set()
+            heartbeat.join()
+        print(f"[INFO] Worker {self.worker_id} finished")
+
+    def _run(self, exit_when_drained, poll_interval):
+        with open(self.shard_path, 'a', encoding=ENCODING) as shard:
+            while True:
+                items = self.queue.lease(self.worker_id)
+                if not items:
+                    if exit_when_drained and self.queue.is_drained():
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.working = list(items)
+                for item in items:
+                    try:
+                        if item.kind == 'page':
+                            self.handle_page(item.payload)
+                        elif item.kind == 'property':
+                            self.handle_property(item.payload, shard)
+                        if not self.queue.ack(item, self.worker_id):
+                            print(f"[WARN] Lease on {item.key} expired before ack")
+                    except Exception as e:
+                        print(f"[ERROR] {self.worker_id} failed {item.key}: {e}")
+                        traceback.print_exc()
+                        self.queue.fail(item, self.worker_id, e)
+                    self.working.remove(item)
+
+
+def merge_shards(shard_folder=SHARD_FOLDER, output_file=OUTPUT_FILE):
+    """Merge worker shards into one JSON file, keeping the last copy of a redelivered property."""
+    merged = {}
+    pool = StringPool()
+    for name in sorted(os.listdir(shard_folder)):
+        if not name.endswith('.jsonl'):
+            continue
+        with open(os.path.join(shard_folder, name), encoding=ENCODING) as f:
+            for line in f:
+                if line.strip():
+                    record = serialization.decode_record(line)
+                    merged[record['property_id']] = compact_record(record, pool) if COMPACT_RESULTS else record
+    save_records((expand_record(record) for record in merged.values()), output_file, ENCODING)
+    print(f"[INFO] Merged {len(merged)} properties into {output_file}")
+    return len(merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed property crawl")
+    sub = parser.add_subparsers(dest='role', required=True)
+    coordinator = sub.add_parser('coordinator', help="Seed the queue and wait for workers")
+    coordinator.add_argument('--no-wait', action='store_true', help="Seed and exit")
+    coordinator.add_argument('--cities', nargs='+', help="City slugs to seed (default: BASE_URL only)")
+    worker = sub.add_parser('worker', help="Lease and process items")
+    worker.add_argument('--id', dest='worker_id', help="Worker id (defaults to host-pid)")
+    worker.add_argument('--forever', action='store_true', help="Keep polling after the queue drains")
+    worker.add_argument('--fields', help="Comma-separated sections to build (default: config.FIELDS)")
+    sub.add_parser('merge', help="Merge worker shards into OUTPUT_FILE")
+    args = parser.parse_args()
+
+    if args.role == 'merge':
+        merge_shards()
+        return
+
+    queue = open_work_queue()
+    try:
+        if args.role == 'coordinator':
+            base_urls = [BASE_URL_TEMPLATE.format(city=city) for city in args.cities] if args.cities else None
+            run_coordinator(queue, base_urls)
+            if not args.no_wait:
+                wait_until_drained(queue)
+                merge_shards()
+        else:
+            fields = FieldSelection(args.fields) if args.fields else None
+            CrawlWorker(queue, worker_id=args.worker_id, fields=fields).run(exit_when_drained=not args.forever)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
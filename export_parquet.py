@@ -0,0 +1,191 @@
+# Columnar Parquet export of the scraped dataset
+
+import argparse
+import os
+from builder_information import record_builder_id
+from utils import iter_json_records
+from config import OUTPUT_FILE, PARQUET_FOLDER, PARQUET_BATCH_SIZE, PARQUET_COMPRESSION, ENCODING
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for this export
+    pa = None
+    pq = None
+
+
+def _schemas():
+    """One typed schema per entity; low-cardinality strings are dictionary encoded."""
+    category = pa.dictionary(pa.int32(), pa.string())
+    return {
+        'properties': pa.schema([
+            ('property_id', pa.string()),
+            ('name', pa.string()),
+            ('location', category),
+            ('status', category),
+            ('price', pa.string()),
+            ('thumbnail_image', pa.string()),
+            ('builder_id', category),
+            ('unit_config', pa.string()),
+            ('size', pa.string()),
+            ('units', pa.string()),
+            ('total_area', pa.string()),
+        ]),
+        'price_list': pa.schema([
+            ('property_id', category),
+            ('position', pa.int16()),
+            ('unit_type', category),
+            ('price', pa.string()),
+        ]),
+        'floor_plans': pa.schema([
+            ('property_id', category),
+            ('category', category),
+            ('position', pa.int16()),
+            ('title', category),
+            ('attribute', pa.string()),
+            ('src_2d', pa.string()),
+            ('alt', pa.string()),
+            ('src_3d', pa.string()),
+            ('price', pa.string()),
+        ]),
+        'amenities': pa.schema([
+            ('property_id', category),
+            ('category', category),
+            ('name', category),
+            ('icon', category),
+        ]),
+        'nearby_landmarks': pa.schema([
+            ('property_id', category),
+            ('category', category),
+            ('title', pa.string()),
+            ('distance', pa.string()),
+            ('distance_km', pa.float64()),
+        ]),
+    }
+
+
+def flatten_record(record, columns):
+    """Append one record's rows to the per-entity column lists."""
+    property_id = record['property_id']
+    project = record.get('project') or {}
+    information = project.get('information') or {}
+
+    def append(entity, **values):
+        for name, column in columns[entity].items():
+            column.append(values.get(name))
+
+    append('properties',
+           property_id=property_id,
+           name=project.get('name'),
+           location=project.get('location'),
+           status=project.get('status'),
+           price=project.get('price'),
+           thumbnail_image=project.get('thumbnail_image'),
+           builder_id=record_builder_id(record),
+           unit_config=information.get('unit_config'),
+           size=information.get('size'),
+           units=information.get('units'),
+           total_area=information.get('total_area'))
+
+    for position, item in enumerate(project.get('price_list') or []):
+        append('price_list', property_id=property_id, position=position,
+               unit_type=item.get('unit_type'), price=item.get('price'))
+
+    for plan_category, items in (project.get('floor_plans') or {}).items():
+        for position, item in enumerate(items):
+            append('floor_plans', property_id=property_id, category=plan_category, position=position,
+                   title=item.get('title'), attribute=item.get('attribute'), src_2d=item.get('2d_src'),
+                   alt=item.get('alt'), src_3d=item.get('3d_src'), price=item.get('price'))
+
+    for amenity_category, items in (project.get('amenities') or {}).items():
+        for item in items:
+            append('amenities', property_id=property_id, category=amenity_category,
+                   name=item.get('name'), icon=item.get('icon'))
+
+    for landmark_category, items in (project.get('nearby_landmarks') or {}).items():
+        for item in items:
+            append('nearby_landmarks', property_id=property_id, category=landmark_category,
+                   title=item.get('distance-title'), distance=item.get('distance'),
+                   distance_km=item.get('distance_km'))
+
+
+class ParquetExporter:
+    """Streams records into one Parquet file per entity, joined on ``property_id``.
+
+    Records are flattened into column lists and flushed every ``batch_size``
+    records as a row group, so memory use is bounded by the batch, not the
+    dataset.
+    """
+
+    def __init__(self, output_folder=PARQUET_FOLDER, batch_size=PARQUET_BATCH_SIZE, compression=PARQUET_COMPRESSION):
+        if pa is None:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+        os.makedirs(output_folder, exist_ok=True)
+        self.output_folder = output_folder
+        self.batch_size = batch_size
+        self.compression = compression
+        self.schemas = _schemas()
+        self.writers = {}
+        self.pending = 0
+        self.total = 0
+        self.columns = self._empty_columns()
+
+    def _empty_columns(self):
+        return {entity: {field.name: [] for field in schema} for entity, schema in self.schemas.items()}
+
+    def _writer(self, entity):
+        if entity not in self.writers:
+            path = os.path.join(self.output_folder, f"{entity}.parquet")
+            self.writers[entity] = pq.ParquetWriter(path, self.schemas[entity], compression=self.compression,
+                                                    use_dictionary=True)
+        return self.writers[entity]
+
+    def add(self, record):
+        flatten_record(record, self.columns)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        for entity, columns in self.columns.items():
+            table = pa.Table.from_pydict(columns, schema=self.schemas[entity])
+            if table.num_rows:
+                self._writer(entity).write_table(table)
+        self.total += self.pending
+        self.pending = 0
+        self.columns = self._empty_columns()
+
+    def close(self):
+        self.flush()
+        for entity in self.schemas:
+            # Every entity gets a file, even if no rows were seen
+            self._writer(entity).close()
+        print(f"Exported {self.total} properties to {self.output_folder}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_file(input_file=OUTPUT_FILE, output_folder=PARQUET_FOLDER):
+    """Export a scraped JSON/JSONL file to Parquet without loading it whole."""
+    with ParquetExporter(output_folder) as exporter:
+        for record in iter_json_records(input_file, ENCODING):
+            exporter.add(record)
+    return exporter.total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scraped properties to Parquet")
+    parser.add_argument('input', nargs='?', default=OUTPUT_FILE, help="Scraped JSON or JSONL file")
+    parser.add_argument('--out', default=PARQUET_FOLDER, help="Output folder for the .parquet files")
+    args = parser.parse_args()
+    export_file(args.input, args.out)
+
+
+if __name__ == "__main__":
+    main()
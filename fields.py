@@ -0,0 +1,102 @@
+# Field projection: which record sections to build, and which requests they need
+
+import copy
+from config import FIELDS
+
+# Sections copied from the listing tile; they cost no request of their own
+LISTING_FIELDS = {
+    'project.name': 'project_name',
+    'project.location': 'location',
+    'project.thumbnail_image': 'image',
+    'project.price': 'price_range',
+    'project.status': 'status',
+}
+
+# Extractor registry: record section -> extractor run over the detail page soup
+DETAIL_EXTRACTORS = {
+    'project.price_insights': lambda scraper, soup, url: scraper.extract_price_insights(soup, url),
+    'project.information': lambda scraper, soup, url: scraper.extract_project_specifications(soup, url),
+    'project.price_list': lambda scraper, soup, url: scraper.extract_price_list(soup),
+    'project.floor_plans': lambda scraper, soup, url: scraper.extract_floor_plans(soup),
+    'project.amenities': lambda scraper, soup, url: scraper.extract_amenities(soup, url),
+    'project.specifications': lambda scraper, soup, url: scraper.extract_property_specification(soup, url),
+    'project.about': lambda scraper, soup, url: scraper.extract_property_about(soup, url),
+    'project.nearby_landmarks': lambda scraper, soup, url: scraper.extract_nearby_landmarks(soup, url),
+    'project.location_insights': lambda scraper, soup, url: scraper.extract_location_description_and_insights(soup),
+    'project.rera': lambda scraper, soup, url: scraper.extract_rera_details(soup),
+    'faq': lambda scraper, soup, url: scraper.extract_faq(soup, url),
+}
+
+# Sections filled from a request of their own: the builder page (found on the detail page) and the gallery
+REQUEST_FIELDS = ('builder_info', 'all_media')
+
+# Every section in record order
+RECORD_LAYOUT = (
+    'project.name', 'project.location', 'project.thumbnail_image', 'project.price', 'project.price_insights',
+    'project.status', 'project.information', 'project.price_list', 'project.floor_plans', 'project.amenities',
+    'project.specifications', 'project.about', 'project.nearby_landmarks', 'project.location_insights',
+    'project.rera', 'builder_info', 'faq', 'all_media',
+)
+
+
+def parse_fields(spec):
+    """Turn a field spec ('project.price_list,project.rera', a list, or None for all) into a set of sections.
+
+    A prefix such as 'project' selects every section under it.
+    """
+    if spec is None:
+        return None
+    names = spec.split(',') if isinstance(spec, str) else spec
+    selected = set()
+    for name in (name.strip() for name in names):
+        if not name or name == 'property_id':
+            continue
+        matches = [path for path in RECORD_LAYOUT if path == name or path.startswith(name + '.')]
+        if not matches:
+            raise ValueError(f"Unknown field '{name}'; choose from: {', '.join(RECORD_LAYOUT)}")
+        selected.update(matches)
+    return frozenset(selected)
+
+
+class FieldSelection:
+    """The sections a scraper builds; ``property_id`` is always included."""
+
+    def __init__(self, spec=FIELDS):
+        self.selected = parse_fields(spec)
+
+    def wants(self, path):
+        return self.selected is None or path in self.selected
+
+    @property
+    def needs_builder_page(self):
+        return self.wants('builder_info')
+
+    @property
+    def needs_gallery(self):
+        return self.wants('all_media')
+
+    @property
+    def needs_detail_page(self):
+        return self.needs_builder_page or any(self.wants(path) for path in DETAIL_EXTRACTORS)
+
+    @property
+    def is_partial(self):
+        return self.selected is not None
+
+    def merge_into(self, base, record):
+        """A copy of ``base`` with the selected sections taken from the projected ``record``."""
+        merged = copy.deepcopy(base)
+        merged['property_id'] = record['property_id']
+        for path in RECORD_LAYOUT:
+            if not self.wants(path):
+                continue
+            if path.startswith('project.'):
+                key = path[len('project.'):]
+                merged.setdefault('project', {})[key] = (record.get('project') or {}).get(key)
+            else:
+                merged[path] = record.get(path)
+        return merged
+
+    def spec(self):
+        """A picklable spec that recreates this selection, e.g. in a worker process."""
+        return sorted(self.selected) if self.selected is not None else None
@@ -0,0 +1,79 @@
+# Freshness-aware recrawl frontier
+
+import heapq
+import math
+import time
+from delta import listing_fingerprint
+from config import RECRAWL_BUDGET, REQUESTS_PER_PROPERTY, STATUS_CHANGE_WEIGHTS
+
+DAY = 24 * 3600
+
+
+class RecrawlFrontier:
+    """Orders listings by how likely their stored record is to be stale.
+
+    Each known property's change rate is estimated from how often past
+    re-scrapes found changes (with one change per observed span as a prior,
+    so rarely observed properties aren't written off), scaled by a weight for
+    its listing status. The chance it changed since the last scrape is then
+    ``1 - exp(-rate * days_since_scrape)``. New listings and listings whose
+    tile fingerprint already differs are certain to need a scrape and come
+    first. ``plan`` spends the request budget down that order.
+    """
+
+    def __init__(self, store, budget=RECRAWL_BUDGET, requests_per_property=REQUESTS_PER_PROPERTY,
+                 status_weights=STATUS_CHANGE_WEIGHTS):
+        self.store = store
+        self.budget = budget
+        self.requests_per_property = requests_per_property
+        self.status_weights = status_weights
+
+    def status_weight(self, status):
+        status = (status or '').strip().lower()
+        for key, weight in self.status_weights.items():
+            if key in status:
+                return weight
+        return 1.0
+
+    def priority(self, listing, stats, now=None):
+        """Return the probability (0..1, or inf for new listings) that a scrape finds a change."""
+        if stats is None:
+            return math.inf
+        if stats['fingerprint'] != listing_fingerprint(listing):
+            return 1.0
+        now = now or time.time()
+        observed_days = max((now - stats['first_seen_at']) / DAY, 1.0)
+        rate = (stats['changes'] + 1) / observed_days * self.status_weight(listing.get('status'))
+        age_days = max(now - stats['scraped_at'], 0) / DAY
+        return 1.0 - math.exp(-rate * age_days)
+
+    def plan(self, listings, requests_used=0):
+        """Yield ``(listing, refresh)`` pairs in priority order.
+
+        ``refresh`` is True for listings the remaining budget pays for; the
+        rest reuse their cached record. New listings that don't fit the budget
+        are left for the next run.
+        """
+        stats = self.store.all_stats()
+        now = time.time()
+        heap = []
+        for index, listing in enumerate(listings):
+            score = self.priority(listing, stats.get(listing['project_id']), now)
+            heapq.heappush(heap, (-score, index, listing))
+
+        remaining = None if self.budget is None else self.budget - requests_used
+        deferred_new = 0
+        while heap:
+            _, _, listing = heapq.heappop(heap)
+            known = listing['project_id'] in stats
+            if remaining is None or remaining >= self.requests_per_property:
+                if remaining is not None:
+                    remaining -= self.requests_per_property
+                yield listing, True
+            elif known:
+                yield listing, False
+            else:
+                deferred_new += 1
+
+        if deferred_new:
+            print(f"[INFO] Request budget exhausted; {deferred_new} new listings deferred to the next run")
@@ -0,0 +1,99 @@
+# Single entry point for the scraper's HTTP requests, with archive capture and replay
+
+import threading
+from contextlib import contextmanager
+import requests
+from archive import ArchiveWriter, ArchiveReader, ArchivedResponse
+from proxy_pool import ProxyPool
+from config import ARCHIVE_RESPONSES, ARCHIVE_FOLDER, PROXIES
+
+# Set by enable_replay(); when present no request reaches the network
+_replay = None
+_capture = None
+_capture_lock = threading.Lock()
+# Created on first request when config.PROXIES is set
+_pool = None
+_pool_lock = threading.Lock()
+# Sticky proxy key of the property the current thread is working on
+_local = threading.local()
+
+
+def _archive_writer():
+    global _capture
+    if _capture is None:
+        with _capture_lock:
+            if _capture is None:
+                _capture = ArchiveWriter(ARCHIVE_FOLDER)
+    return _capture
+
+
+def proxy_pool():
+    """The process-wide proxy pool, or None when no proxies are configured."""
+    global _pool
+    if _pool is None and PROXIES:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProxyPool(PROXIES)
+    return _pool
+
+
+@contextmanager
+def sticky(key):
+    """Send this thread's requests for one property (``key``) through the same proxy."""
+    _local.sticky_key = key
+    try:
+        yield
+    finally:
+        _local.sticky_key = None
+        if _pool is not None:
+            _pool.forget(key)
+
+
+def _send(method, url, **kwargs):
+    pool = proxy_pool()
+    if pool is not None:
+        return pool.request(method, url, sticky_key=getattr(_local, 'sticky_key', None), **kwargs)
+    return requests.request(method, url, **kwargs)
+
+
+def enable_replay(folder=ARCHIVE_FOLDER):
+    """Serve every request in this process from the archive in ``folder``."""
+    global _replay
+    _replay = ArchiveReader(folder)
+    return _replay
+
+
+def is_replaying():
+    """True while requests are served from the archive."""
+    return _replay is not None
+
+
+def _request(kind, method, url, body=None, **kwargs):
+    if _replay is not None:
+        response = _replay.get(method, url, body)
+        if response is None:
+            print(f"[REPLAY] Not archived: {method} {url}")
+            return ArchivedResponse(url, 404, '')
+        return response
+
+    if method == 'POST':
+        kwargs['json'] = body
+    response = _send(method, url, **kwargs)
+    if ARCHIVE_RESPONSES:
+        _archive_writer().write(kind, method, url, response.status_code, response.text, body)
+    return response
+
+
+def get(url, kind, **kwargs):
+    """GET ``url``; ``kind`` ('listing', 'detail', 'builder') labels the archived response."""
+    return _request(kind, 'GET', url, **kwargs)
+
+
+def post(url, kind, json=None, **kwargs):
+    """POST a JSON body to ``url``; the body is part of the archive key."""
+    return _request(kind, 'POST', url, body=json, **kwargs)
+
+
+def stream(url, **kwargs):
+    """Streaming GET for binary assets; goes through the proxy pool but is never archived."""
+    return _send('GET', url, stream=True, **kwargs)
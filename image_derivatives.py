@@ -0,0 +1,134 @@
+# Resized/re-encoded image derivatives of downloaded assets, generated in a process pool
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from config import IMAGE_DERIVATIVES, DERIVATIVE_FOLDER, DERIVATIVE_QUALITY, DERIVATIVE_PROCESSES
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Optional dependency, only needed when IMAGE_DERIVATIVES is set
+    Image = None
+
+# File extension of each output format
+EXTENSIONS = {'webp': 'webp', 'avif': 'avif', 'jpeg': 'jpg', 'png': 'png'}
+
+
+def supported_formats():
+    """Output formats the installed Pillow can write."""
+    if Image is None:
+        return set()
+    Image.init()
+    return {name for name in EXTENSIONS if name.upper() in Image.SAVE}
+
+
+def derivative_relative_path(digest, name, width, height, image_format, quality=DERIVATIVE_QUALITY):
+    """Content-addressed path (relative to ``output/``) of one derivative of an image.
+
+    The size and quality are part of the name, so changing either generates new files.
+    """
+    return f"{DERIVATIVE_FOLDER}/{digest[:2]}/{digest}-{name}-{width}x{height}-q{quality}.{EXTENSIONS[image_format]}"
+
+
+def make_derivatives(source_path, specs, quality=DERIVATIVE_QUALITY):
+    """Write the derivatives of one image (runs in a worker process).
+
+    ``specs`` maps a derivative name to ``(max_width, max_height, format)``.
+    Derivatives are named by the hash of the source content, so a derivative
+    that already exists (e.g. of the same image under another property) is
+    not generated again. Returns ``{name: relative_path}``.
+    """
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+
+    paths = {}
+    image = None
+    for name, (width, height, image_format) in specs.items():
+        relative_path = derivative_relative_path(digest, name, width, height, image_format, quality)
+        full_path = os.path.join('output', relative_path)
+        if not os.path.exists(full_path):
+            if image is None:
+                image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+                if image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+            derivative = image.copy()
+            derivative.thumbnail((width, height), Image.LANCZOS)
+            if image_format == 'jpeg' and derivative.mode == 'RGBA':
+                derivative = derivative.convert('RGB')
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f"{full_path}.{os.getpid()}.tmp"
+            derivative.save(tmp_path, format=image_format.upper(), quality=quality)
+            os.replace(tmp_path, full_path)
+        paths[name] = relative_path
+    return paths
+
+
+def _image_fields(record):
+    """``(container, key)`` of every localized image that gets derivatives."""
+    project = record.get('project') or {}
+    yield project, 'thumbnail_image'
+    for items in (project.get('floor_plans') or {}).values():
+        for item in items:
+            yield item, '2d_src'
+    for items in ((record.get('all_media') or {}).get('images') or {}).values():
+        for item in items:
+            yield item, 'src'
+
+
+class DerivativeGenerator:
+    """Adds ``<key>_derivatives`` next to each downloaded thumbnail, floor plan and gallery image.
+
+    Images are decoded, resized and encoded in a ``ProcessPoolExecutor``;
+    ``add_derivatives`` may be called from several download threads at once.
+    Images that failed to download (still a URL) are skipped.
+    """
+
+    def __init__(self, specs=IMAGE_DERIVATIVES, processes=DERIVATIVE_PROCESSES, quality=DERIVATIVE_QUALITY):
+        if Image is None:
+            raise ImportError("Image derivatives require Pillow: pip install Pillow")
+        formats = supported_formats()
+        self.specs = {}
+        for name, (width, height, image_format) in specs.items():
+            if image_format not in formats:
+                print(f"[WARN] Skipping '{name}' derivatives: this Pillow build can't write {image_format}")
+                continue
+            self.specs[name] = (width, height, image_format)
+        self.quality = quality
+        self.executor = ProcessPoolExecutor(max_workers=processes or os.cpu_count())
+        self.generated = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def add_derivatives(self, record):
+        """Generate the record's derivatives and record their paths; returns the record."""
+        futures = []
+        for container, key in _image_fields(record):
+            relative_path = container.get(key)
+            if not relative_path or relative_path.startswith('http'):
+                continue
+            source_path = os.path.join('output', relative_path)
+            if os.path.exists(source_path):
+                futures.append((container, key, self.executor.submit(make_derivatives, source_path, self.specs, self.quality)))
+
+        for container, key, future in futures:
+            try:
+                container[f"{key}_derivatives"] = future.result()
+                with self.lock:
+                    self.generated += 1
+            except Exception as e:
+                print(f"Failed to generate derivatives of {container.get(key)}: {e}")
+                with self.lock:
+                    self.failed += 1
+        return record
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
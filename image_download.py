@@ -1,8 +1,12 @@
 import os
-import json
-import requests
+import shutil
+import serialization
+import http_fetch
 from urllib.parse import urlparse
-from tqdm import tqdm
+from utils import save_to_json
+from dedup import asset_cache
+from image_derivatives import DerivativeGenerator
+from config import IMAGE_DERIVATIVES
 
 # === Custom Paths ===
 INPUT_JSON = "output/gurgaon_properties.json"
@@ -13,6 +17,7 @@ LOG_FILE = "output/download_log.txt"
 download_log = {
     "downloaded": [],
     "skipped": [],
+    "reused": [],
     "failed": []
 }
 
@@ -23,22 +28,38 @@ def download_if_needed(url, full_path):
     if os.path.exists(full_path):
         download_log["skipped"].append(full_path)
         return True
+    # An asset shared between properties (amenity icons, builder logos) is downloaded once and copied
+    source = asset_cache.get(url, lambda url: full_path if download(url, full_path) else None)
+    if source == full_path:
+        return True
+    if source and os.path.exists(source):
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        shutil.copyfile(source, full_path)
+        download_log["reused"].append(full_path)
+        return True
+    if source and download(url, full_path):  # The first copy was removed since
+        return True
+    download_log["failed"].append((url, full_path))
+    return False
+
+def download(url, full_path):
     try:
-        response = requests.get(url, stream=True, timeout=10)
-        if response.status_code == 200:
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, "wb") as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
-            download_log["downloaded"].append(full_path)
-            return True
+        # Closing the response returns its connection to the (per-proxy) pool, whatever the outcome
+        with http_fetch.stream(url, timeout=10) as response:
+            if response.status_code == 200:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, "wb") as f:
+                    for chunk in response.iter_content(1024):
+                        f.write(chunk)
+                download_log["downloaded"].append(full_path)
+                return True
     except Exception as e:
         print(f"Failed to download {url}: {e}")
-    download_log["failed"].append((url, full_path))
     return False
 
-def get_asset_relative_path(property_id, category, filename, subfolder=None):
-    path_parts = ["assets", property_id, sanitize_folder(category)]
+def get_asset_relative_path(property_id, category, filename, subfolder=None, shard=None):
+    path_parts = ["assets", sanitize_folder(shard), property_id] if shard else ["assets", property_id]
+    path_parts.append(sanitize_folder(category))
     if subfolder:
         path_parts.append(sanitize_folder(subfolder))
     path_parts.append(filename)
@@ -47,71 +68,81 @@ def get_asset_relative_path(property_id, category, filename, subfolder=None):
 def get_full_local_path(relative_asset_path):
     return os.path.join("output", relative_asset_path).replace("\\", "/")
 
-def replace_and_download(obj):
+def replace_and_download(obj, sections=None, shard=None):
+    """Download a record's assets and point it at the local copies.
+
+    ``sections`` limits the amenities, floor plan and media passes to the
+    named sections; None processes everything. ``shard`` (e.g. a city)
+    places the assets under ``assets/<shard>/``.
+    """
     property_id = obj.get("property_id", "unknown")
 
     # === Builder Logo ===
-    if "builder_info" in obj and "image" in obj["builder_info"]:
+    if obj.get("builder_info") and obj["builder_info"].get("image"):
         url = obj["builder_info"]["image"]
         filename = os.path.basename(urlparse(url).path)
-        rel_path = get_asset_relative_path(property_id, "Builder Logo", filename)
+        rel_path = get_asset_relative_path(property_id, "Builder Logo", filename, shard=shard)
         full_path = get_full_local_path(rel_path)
         if download_if_needed(url, full_path):
             obj["builder_info"]["image"] = rel_path
 
     # === Thumbnail Image ===
     project = obj.get("project", {})
-    if "thumbnail_image" in project:
+    if project.get("thumbnail_image"):
         url = project["thumbnail_image"]
         filename = os.path.basename(urlparse(url).path)
-        rel_path = get_asset_relative_path(property_id, "Project Images/Thumbnail", filename)
+        rel_path = get_asset_relative_path(property_id, "Project Images/Thumbnail", filename, shard=shard)
         full_path = get_full_local_path(rel_path)
         if download_if_needed(url, full_path):
             project["thumbnail_image"] = rel_path
 
     # === Amenities Icons ===
-    for category, items in project.get("amenities", {}).items():
+    amenities = project.get("amenities") if sections is None or "amenities" in sections else None
+    for category, items in (amenities or {}).items():
         for item in items:
             if "icon" in item:
                 url = item["icon"]
                 filename = os.path.basename(urlparse(url).path)
-                rel_path = get_asset_relative_path(property_id, "Amenities Icon", filename)
+                rel_path = get_asset_relative_path(property_id, "Amenities Icon", filename, shard=shard)
                 full_path = get_full_local_path(rel_path)
                 if download_if_needed(url, full_path):
                     item["icon"] = rel_path
 
     # === Floor Plan Images ===
-    for plan_type, items in project.get("floor_plans", {}).items():
+    floor_plans = project.get("floor_plans") if sections is None or "floor_plans" in sections else None
+    for plan_type, items in (floor_plans or {}).items():
         for item in items:
             # 2D source: replace & download
             if "2d_src" in item and item["2d_src"]:
                 url = item["2d_src"]
                 filename = os.path.basename(urlparse(url).path)
-                rel_path = get_asset_relative_path(property_id, "Floor Plan Image", filename, subfolder=plan_type)
+                rel_path = get_asset_relative_path(property_id, "Floor Plan Image", filename, subfolder=plan_type, shard=shard)
                 full_path = get_full_local_path(rel_path)
                 if download_if_needed(url, full_path):
                     item["2d_src"] = rel_path
             # 3D source: keep as is
 
+    all_media = obj.get("all_media") if sections is None or "all_media" in sections else None
+
     # === all_media.images ===
-    all_images = obj.get("all_media", {}).get("images", {})
+    all_images = (all_media or {}).get("images", {})
     for section, items in all_images.items():
         for img in items:
             if "src" in img:
                 url = img["src"]
                 filename = os.path.basename(urlparse(url).path)
-                rel_path = get_asset_relative_path(property_id, f"Project Images/{section}", filename)
+                rel_path = get_asset_relative_path(property_id, f"Project Images/{section}", filename, shard=shard)
                 full_path = get_full_local_path(rel_path)
                 if download_if_needed(url, full_path):
                     img["src"] = rel_path
 
     # === all_media.videos ===
-    all_videos = obj.get("all_media", {}).get("videos", [])
+    all_videos = (all_media or {}).get("videos", [])
     for vid in all_videos:
-        if "src" in vid and vid["src"].startswith("http"):
+        if vid.get("src") and vid["src"].startswith("http"):
             url = vid["src"]
             filename = os.path.basename(urlparse(url).path)
-            rel_path = get_asset_relative_path(property_id, "Videos", filename)
+            rel_path = get_asset_relative_path(property_id, "Videos", filename, shard=shard)
             full_path = get_full_local_path(rel_path)
             if download_if_needed(url, full_path):
                 vid["src"] = rel_path
@@ -119,6 +150,7 @@ def replace_and_download(obj):
     return obj
 
 def write_log():
+    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
     with open(LOG_FILE, "w", encoding="utf-8") as log:
         log.write("==== Downloaded Files ====\n")
         for path in download_log["downloaded"]:
@@ -126,20 +158,30 @@ def write_log():
         log.write("\n==== Skipped Files (Already Exists) ====\n")
         for path in download_log["skipped"]:
             log.write(f"Skipped: {path}\n")
+        log.write("\n==== Reused Files (Copied From An Earlier Download) ====\n")
+        for path in download_log["reused"]:
+            log.write(f"Reused: {path}\n")
         log.write("\n==== Failed Downloads ====\n")
         for url, path in download_log["failed"]:
             log.write(f"Failed: {url} -> {path}\n")
 
 def main():
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    from tqdm import tqdm
+    with open(INPUT_JSON, "rb") as f:
+        data = serialization.loads(f.read())
+
+    derivatives = DerivativeGenerator() if IMAGE_DERIVATIVES else None
 
     updated_data = []
     for prop in tqdm(data, desc="Processing Properties"):
-        updated_data.append(replace_and_download(prop))
-
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(updated_data, f, indent=2, ensure_ascii=False)
+        prop = replace_and_download(prop)
+        if derivatives:
+            prop = derivatives.add_derivatives(prop)
+        updated_data.append(prop)
+    if derivatives:
+        derivatives.shutdown()
+
+    save_to_json(updated_data, OUTPUT_JSON)
 
     write_log()
     print(f"\n✅ JSON updated: {OUTPUT_JSON}")
@@ -1,28 +1,81 @@
 # Main script to run the property scraper
 
+import argparse
 from scraper import PropertyScraper
-from utils import save_to_json, flatten_list_of_lists
-from config import MAX_WORKERS, OUTPUT_FILE, START_PAGE, END_PAGE, ENCODING
+from pipeline import CrawlPipeline
+from process_scraper import ProcessPoolScraper
+from delta import DeltaScraper
+from storage_sqlite import SqlitePropertyStore
+from search_index import SearchIndex
+from frontier import RecrawlFrontier
+from normalize import NormalizeStage
+from record_index import save_records
+from compact import CompactResults
+from fields import FieldSelection
+from config import MAX_WORKERS, OUTPUT_FILE, START_PAGE, END_PAGE, ENCODING, EXECUTION_MODE, DELTA_CRAWL, RECRAWL_BUDGET, SQLITE_OUTPUT, SEARCH_INDEX, NORMALIZE_RECORDS, COMPACT_RESULTS
 
 def main():
     """Main function to run the property scraper."""
+    parser = argparse.ArgumentParser(description="Scrape property listings")
+    parser.add_argument('--fields', help="Comma-separated sections to build, e.g. project.price_list,project.rera "
+                                         "(default: config.FIELDS, i.e. everything)")
+    args = parser.parse_args()
+
     print("Starting Gurgaon Properties Scraper")
     print("=" * 40)
     
     # Initialize the scraper
-    scraper = PropertyScraper()
+    scraper = PropertyScraper(fields=FieldSelection(args.fields) if args.fields else None)
+    if EXECUTION_MODE == 'processes':
+        # Threads only fetch; parsing and extraction run across all cores
+        scraper = ProcessPoolScraper(scraper)
+    if DELTA_CRAWL:
+        # Unchanged listing tiles skip the detail, builder and gallery requests
+        scraper = DeltaScraper(scraper)
+    
+    if END_PAGE is None:
+        print(f"Scraping from page {START_PAGE} until pagination ends")
+    else:
+        print(f"Scraping pages {START_PAGE} to {END_PAGE}")
     
-    # Define pages to scrape
-    pages = list(range(START_PAGE, END_PAGE + 1))
-    print(f"Scraping pages {START_PAGE} to {END_PAGE}")
+    # Optional normalized SQLite output, written in batches as records arrive
+    store = SqlitePropertyStore(SQLITE_OUTPUT) if SQLITE_OUTPUT else None
+    # Optional full-text index, updated incrementally as records arrive
+    search = SearchIndex(SEARCH_INDEX) if SEARCH_INDEX else None
+    # Compact results expand back to plain dicts only when they are saved
+    results = CompactResults() if COMPACT_RESULTS else []
+
+    def collect(record):
+        results.append(record)
+        if store:
+            store.add(record)
+        if search:
+            search.add(record)
+
+    # Prices and areas are parsed a batch at a time before being collected
+    sink = NormalizeStage(collect) if NORMALIZE_RECORDS else collect
     
     # Scrape the pages
     try:
-        results = scraper.scrape_multiple_pages(pages, max_workers=MAX_WORKERS)
+        frontier = RecrawlFrontier(scraper.store) if DELTA_CRAWL and RECRAWL_BUDGET is not None else None
+        pipeline = CrawlPipeline(scraper, start_page=START_PAGE, end_page=END_PAGE,
+                                 detail_workers=MAX_WORKERS, frontier=frontier, sink=sink)
+        pipeline.run()
+        if NORMALIZE_RECORDS:
+            sink.flush()
+        if DELTA_CRAWL:
+            scraper.finish_run(complete=pipeline.complete, search=search)
+        if store:
+            store.flush()
+            print(f"Normalized tables written to: {SQLITE_OUTPUT}")
+        if search:
+            search.flush()
+            search.optimize()
+            print(f"Search index written to: {SEARCH_INDEX}")
         
         if results:
             # Save results to JSON
-            success = save_to_json(results, OUTPUT_FILE, ENCODING)
+            success = save_records(results, OUTPUT_FILE, ENCODING)
             
             if success:
                 print(f"\nScraping completed successfully!")
@@ -37,6 +90,13 @@ def main():
         print("\nScraping interrupted by user.")
     except Exception as e:
         print(f"\nAn error occurred during scraping: {e}")
+    finally:
+        if store:
+            store.close()
+        if search:
+            search.close()
+        if EXECUTION_MODE == 'processes':
+            scraper.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+# Media (gallery) backends, imported on first use
+
+import threading
+import traceback
+import http_fetch
+from config import MEDIA_BACKEND, MEDIA_FALLBACK, ARCHIVE_RESPONSES, PROXIES
+
+
+def _load_http():
+    from media_extractor import fetch_gallery_html, parse_gallery_html
+
+    def extract(project_id, url):
+        html = fetch_gallery_html(project_id, url)
+        return parse_gallery_html(html) if html is not None else None
+    return extract
+
+
+def _load_selenium():
+    # Pulls in selenium and webdriver_manager, so only when this backend is actually used
+    from media_extractor_selenium import extract_media_by_sub_tab
+
+    def extract(project_id, url):
+        return extract_media_by_sub_tab(url)
+    return extract
+
+
+# Backends other than 'http' open the site themselves, bypassing http_fetch (replay, archive, proxy pool)
+HTTP_FETCH_BACKENDS = ('http',)
+
+# Backend name -> loader returning extract(project_id, url), which gives None when the gallery couldn't be
+# fetched or parsed (a gallery with no media is an empty result, not None)
+MEDIA_BACKENDS = {
+    'http': _load_http,
+    'selenium': _load_selenium,
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def get_media_backend(name):
+    """The extract function of a backend, importing it on first use."""
+    if name not in _loaded:
+        if name not in MEDIA_BACKENDS:
+            raise ValueError(f"Unknown media backend '{name}'; choose from: {', '.join(MEDIA_BACKENDS)}")
+        with _lock:
+            if name not in _loaded:
+                _loaded[name] = MEDIA_BACKENDS[name]()
+    return _loaded[name]
+
+
+def media_fallback(fallback=MEDIA_FALLBACK):
+    """The fallback backend to use, or None.
+
+    A fallback that bypasses http_fetch is disabled while replaying (it would
+    go to the network), archiving (its responses wouldn't be captured) or
+    using the proxy pool (its requests wouldn't go through a proxy).
+    """
+    if fallback and fallback not in HTTP_FETCH_BACKENDS and (http_fetch.is_replaying() or ARCHIVE_RESPONSES or PROXIES):
+        return None
+    return fallback
+
+
+def extract_media(project_id, url, backend=MEDIA_BACKEND, fallback=MEDIA_FALLBACK):
+    """Gallery images and videos of a project, trying ``fallback`` only if ``backend`` fails to fetch or parse it."""
+    fallback = media_fallback(fallback)
+    names = [backend] + ([fallback] if fallback and fallback != backend else [])
+    for name in names:
+        try:
+            media = get_media_backend(name)(project_id, url)
+        except Exception as e:
+            print(f"[WARN] Media backend '{name}' failed for {url}: {e}")
+            traceback.print_exc()
+            continue
+        if media is not None:
+            return media
+        print(f"[WARN] Media backend '{name}' could not fetch the gallery of {url}")
+    return {'images': {}, 'videos': []}
@@ -1,12 +1,20 @@
 import random
 import time
 import traceback
-import requests
+import http_fetch
 from collections import defaultdict
 from bs4 import BeautifulSoup
 
 def extract_media_by_sub_tab(project_id, url):
+    html = fetch_gallery_html(project_id, url)
+    media = parse_gallery_html(html) if html is not None else None
+    return media if media is not None else {'images': {}, 'videos': []}
 
+def fetch_gallery_html(project_id, url):
+    """POST to the common gallery endpoint and return the raw HTML, or None on failure.
+
+    A 404 means the project has no gallery and gives empty HTML.
+    """
     request_url = 'https://www.squareyards.com/loadcommongallery'
     
     # Set the payload for the POST request
@@ -36,13 +44,19 @@ def extract_media_by_sub_tab(project_id, url):
         'User-Agent': user_agent
         }
 
-    response = requests.post(request_url, headers=headers, json=payload)
+    response = http_fetch.post(request_url, 'gallery', headers=headers, json=payload)
+    if response.status_code == 404:
+        return ''
     if response.status_code != 200:
         print(f"[ERROR] Failed to fetch data from {url}. Status code: {response.status_code}")
-        return {'images': {}, 'videos': []}
+        return None
+
+    return response.text
 
+def parse_gallery_html(html):
+    """Group the gallery's images by sub-tab and collect its videos; None if the HTML can't be parsed."""
     # Parse the HTML response with BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     
     try:
         figures = soup.select('.bxslider figure')  # Select all figure tags under .bxslider
@@ -100,4 +114,6 @@ def extract_media_by_sub_tab(project_id, url):
 
     except Exception as e:
         print(f"[ERROR] Failed to parse the response: {e}")
-        return {'images': {}, 'videos': []}
+        return None
+    finally:
+        soup.decompose()
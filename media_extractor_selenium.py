@@ -1,6 +1,5 @@
 # media_extractor.py
 import random
-import time
 import traceback
 from collections import defaultdict
 from selenium import webdriver
@@ -11,9 +10,65 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
+from config import SELENIUM_BLOCK_RESOURCES, SELENIUM_BLOCKED_URL_PATTERNS, SELENIUM_WAIT_TIMEOUT
+
+# Reads every figure under .bxslider in a single round-trip. Returns null while
+# the gallery is still empty so it can double as a WebDriverWait condition.
+READ_GALLERY_SCRIPT = """
+var figures = document.querySelectorAll('.bxslider figure');
+if (!figures.length) { return null; }
+var result = [];
+for (var i = 0; i < figures.length; i++) {
+    var fig = figures[i];
+    var entry = {sub_tab: fig.getAttribute('sub-tab'), image: null, video: null};
+    var img = fig.querySelector('img');
+    if (img) {
+        entry.image = {title: img.getAttribute('title'), src: img.src, alt: img.getAttribute('alt')};
+    } else {
+        var video = fig.querySelector('video');
+        var source = video ? video.querySelector('source') : null;
+        if (source) {
+            entry.video = {type: source.getAttribute('type'), src: source.src, alt: video.getAttribute('alt') || ""};
+        }
+    }
+    result.push(entry);
+}
+return result;
+"""
+
+
+def build_driver(user_agent, block_resources=SELENIUM_BLOCK_RESOURCES):
+    """Create a headless Chrome driver, optionally blocking heavy resources via DevTools."""
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument(f'user-agent={user_agent}')
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    # Don't wait for every subresource; the waits below are condition based
+    options.page_load_strategy = 'eager'
+
+    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    if block_resources:
+        # Images, media, fonts and stylesheets are never needed to read the gallery markup
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': SELENIUM_BLOCKED_URL_PATTERNS})
+
+    return driver
+
+
+def _document_ready(driver):
+    return driver.execute_script("return document.readyState") in ('interactive', 'complete')
+
 
+def _read_gallery(driver):
+    return driver.execute_script(READ_GALLERY_SCRIPT) or False
 
-def extract_media_by_sub_tab(url):
+
+def extract_media_by_sub_tab(url, block_resources=SELENIUM_BLOCK_RESOURCES):
     USER_AGENTS = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
@@ -28,74 +83,47 @@ def extract_media_by_sub_tab(url):
     ]
 
     user_agent = random.choice(USER_AGENTS)
-
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument(f'user-agent={user_agent}')
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-dev-shm-usage")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-    driver.get(url)
-    time.sleep(random.uniform(2, 4))
+    driver = build_driver(user_agent, block_resources=block_resources)
 
     try:
-        wait = WebDriverWait(driver, 15)
+        driver.get(url)
+        wait = WebDriverWait(driver, SELENIUM_WAIT_TIMEOUT, poll_frequency=0.2)
+        wait.until(_document_ready)
 
         try:
-            trigger = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '.load-gallery')))
-            trigger.click()
-            time.sleep(2)
+            trigger = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.load-gallery')))
+            # JS click works even when stylesheets are blocked and the trigger has no layout
+            driver.execute_script("arguments[0].click();", trigger)
         except TimeoutException:
             print(f"[TIMEOUT] Could not click '.load-gallery' on {url}")
             driver.save_screenshot("timeout_error.png")
             return {'images': {}, 'videos': []}
 
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.bxslider figure')))
-        figures = driver.find_elements(By.CSS_SELECTOR, '.bxslider figure')
+        try:
+            entries = wait.until(_read_gallery)
+        except TimeoutException:
+            print(f"[TIMEOUT] Gallery did not load on {url}")
+            return {'images': {}, 'videos': []}
 
         images = defaultdict(list)
         videos = []
 
-        for fig in figures:
+        for entry in entries:
             try:
-                sub_tab = fig.get_attribute("sub-tab")
-
-                img_tags = fig.find_elements(By.TAG_NAME, 'img')
-                if img_tags:
-                    img = img_tags[0]
-                    title = img.get_attribute("title")
-                    src = img.get_attribute("src")
-                    alt = img.get_attribute("alt")
-
-                    if sub_tab and src:
+                sub_tab = entry.get("sub_tab")
+                image = entry.get("image")
+                if image:
+                    if sub_tab and image.get("src"):
                         images[sub_tab].append({
-                            "title": title,
-                            "src": src.split('?')[0],
-                            "alt": alt
+                            "title": image.get("title"),
+                            "src": image["src"].split('?')[0],
+                            "alt": image.get("alt")
                         })
                     continue
 
-                video_tags = fig.find_elements(By.TAG_NAME, 'video')
-                if video_tags:
-                    video_tag = video_tags[0]
-                    source_tags = video_tag.find_elements(By.TAG_NAME, 'source')
-                    if not source_tags:
-                        continue
-                    source = source_tags[0]
-                    video_src = source.get_attribute("src")
-                    video_type = source.get_attribute("type")
-                    alt = video_tag.get_attribute("alt") or ""
-
-                    videos.append({
-                        "type": video_type,
-                        "src": video_src,
-                        "alt": alt
-                    })
+                video = entry.get("video")
+                if video:
+                    videos.append(video)
 
             except Exception as e:
                 print(f"[WARN] Failed to extract one figure: {e}")
@@ -109,4 +137,4 @@ def extract_media_by_sub_tab(url):
 
     finally:
         driver.quit()
-        print(f"[INFO] Finished extracting media from {url}")
\ No newline at end of file
+        print(f"[INFO] Finished extracting media from {url}")
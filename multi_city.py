@@ -0,0 +1,275 @@
+# Multi-city crawling with per-city shards and round-robin scheduling
+
+import argparse
+import itertools
+import queue
+import threading
+import time
+import traceback
+import requests
+import image_download
+from scraper import PropertyScraper
+from delta import DeltaScraper
+from fields import FieldSelection
+from dedup import CrawlDedup
+from image_derivatives import DerivativeGenerator
+from record_index import open_output_writer
+from utils import BoundedExecutor, save_to_json
+from config import (
+    CITIES, BASE_URL_TEMPLATE, START_PAGE, END_PAGE, MAX_WORKERS, PAGE_FETCH_RETRIES, MAX_FAILED_PAGES,
+    CITY_QUEUE_SIZE, LISTING_QUEUE_SIZE, RESULT_QUEUE_SIZE, CITY_OUTPUT_FILE, MERGED_INDEX_FILE,
+    DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE, DELTA_CRAWL, ENCODING, DEDUP_MODE, IMAGE_DERIVATIVES,
+)
+
+_DONE = object()
+
+
+def city_base_url(city):
+    return BASE_URL_TEMPLATE.format(city=city)
+
+
+class MultiCityCrawl:
+    """Crawls several cities concurrently through one scraper engine.
+
+    Each city has its own page producer following its pagination into a
+    bounded per-city queue, until an empty page or ``max_failed_pages``
+    failed pages in a row. A dispatcher takes one listing from each city in
+    turn and feeds the shared detail workers, so a city with thousands of
+    listings can't starve the others. Finished records go to
+    ``sink(city, record)``. Listings already scheduled, in any city, are
+    skipped (see ``dedup.CrawlDedup``).
+    """
+
+    def __init__(self, scraper, cities=CITIES, sink=None, start_page=START_PAGE, end_page=END_PAGE,
+                 detail_workers=MAX_WORKERS, city_queue_size=CITY_QUEUE_SIZE,
+                 listing_queue_size=LISTING_QUEUE_SIZE, result_queue_size=RESULT_QUEUE_SIZE, dedup=None,
+                 max_failed_pages=MAX_FAILED_PAGES):
+        self.scraper = scraper
+        self.cities = list(cities)
+        self.sink = sink
+        self.start_page = start_page
+        self.end_page = end_page
+        self.detail_workers = max(1, detail_workers)
+        self.max_failed_pages = max(1, max_failed_pages)
+        self.city_queues = {city: queue.Queue(maxsize=city_queue_size) for city in self.cities}
+        self.listing_queue = queue.Queue(maxsize=listing_queue_size)
+        self.result_queue = queue.Queue(maxsize=result_queue_size)
+        self.stats = {city: {'pages': 0, 'listings': 0, 'records': 0, 'failed_pages': 0, 'reached_end': False}
+                      for city in self.cities}
+        self.errors = 0
+        self.dedup = dedup if dedup is not None or not DEDUP_MODE else CrawlDedup()
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self):
+        """True if every city was crawled from page 1 to an empty page, with no page given up on."""
+        return self.start_page == 1 and all(stats['reached_end'] and not stats['failed_pages']
+                                            for stats in self.stats.values())
+
+    def _fetch_listings(self, city, page):
+        base_url = city_base_url(city)
+        for attempt in range(PAGE_FETCH_RETRIES + 1):
+            try:
+                listings = self.scraper.fetch_listings(page, base_url=base_url)
+            except requests.RequestException as e:
+                print(f"[{city}] Request error fetching page {page} (attempt {attempt + 1}): {e}")
+                continue
+            if listings is not None:
+                return listings
+        return None
+
+    # === Stage 1: one page producer per city ===
+    def _city_producer(self, city):
+        city_queue = self.city_queues[city]
+        failed_streak = 0
+        try:
+            for page in itertools.count(self.start_page):
+                if self.end_page is not None and page > self.end_page:
+                    break
+                print(f"[{city}] Scraping page {page}")
+                listings = self._fetch_listings(city, page)
+                if listings is None:
+                    print(f"[{city}] Giving up on page {page}")
+                    with self._lock:
+                        self.errors += 1
+                        self.stats[city]['failed_pages'] += 1
+                    failed_streak += 1
+                    if failed_streak >= self.max_failed_pages:
+                        print(f"[{city}] {failed_streak} pages failed in a row, stopping pagination")
+                        break
+                    continue
+                failed_streak = 0
+                if not listings:
+                    print(f"[{city}] No listings on page {page}, stopping pagination")
+                    self.stats[city]['reached_end'] = True
+                    break
+                with self._lock:
+                    self.stats[city]['pages'] += 1
+                    self.stats[city]['listings'] += len(listings)
+                for listing in listings:
+                    if not self.dedup or self.dedup.first_listing(listing):
+                        city_queue.put(listing)
+        finally:
+            city_queue.put(_DONE)
+
+    # === Stage 2: round-robin dispatcher ===
+    def _dispatcher(self):
+        active = list(self.cities)
+        while active:
+            dispatched = False
+            for city in list(active):
+                try:
+                    listing = self.city_queues[city].get_nowait()
+                except queue.Empty:
+                    continue
+                if listing is _DONE:
+                    active.remove(city)
+                    continue
+                # Blocks while the detail workers are busy; the other cities wait their turn
+                self.listing_queue.put((city, listing))
+                dispatched = True
+            if not dispatched:
+                time.sleep(0.05)
+        for _ in range(self.detail_workers):
+            self.listing_queue.put(_DONE)
+
+    # === Stage 3: shared detail workers ===
+    def _detail_worker(self):
+        while True:
+            item = self.listing_queue.get()
+            if item is _DONE:
+                return
+            city, listing = item
+            try:
+                record = self.scraper.scrape_property(listing)
+                if record:
+                    if self.dedup:
+                        self.dedup.mark_scraped(listing)
+                    self.result_queue.put((city, record))
+            except Exception as e:
+                print(f"[{city}] Error scraping property {listing.get('project_id')}: {e}")
+                traceback.print_exc()
+                with self._lock:
+                    self.errors += 1
+
+    # === Stage 4: output ===
+    def _output_worker(self):
+        while True:
+            item = self.result_queue.get()
+            if item is _DONE:
+                return
+            city, record = item
+            self.stats[city]['records'] += 1
+            try:
+                self.sink(city, record)
+            except Exception as e:
+                print(f"[{city}] Error writing property {record.get('property_id')}: {e}")
+                traceback.print_exc()
+                with self._lock:
+                    self.errors += 1
+
+    def run(self):
+        producers = [threading.Thread(target=self._city_producer, args=(city,), name=f"pages-{city}")
+                     for city in self.cities]
+        dispatcher = threading.Thread(target=self._dispatcher, name="dispatcher")
+        workers = [threading.Thread(target=self._detail_worker, name=f"detail-{i}")
+                   for i in range(self.detail_workers)]
+        output = threading.Thread(target=self._output_worker, name="output")
+
+        for thread in producers + [dispatcher] + workers + [output]:
+            thread.start()
+        for thread in producers + [dispatcher] + workers:
+            thread.join()
+        self.result_queue.put(_DONE)
+        output.join()
+        if self.dedup:
+            self.dedup.save()
+
+        for city, stats in self.stats.items():
+            print(f"[{city}] {stats['pages']} pages, {stats['listings']} listings, {stats['records']} records")
+        duplicates = self.dedup.duplicates if self.dedup else 0
+        print(f"Multi-city crawl finished with {duplicates} duplicates skipped, {self.errors} errors")
+        return self.stats
+
+
+class CityShardWriter:
+    """Writes each city's records to its own file and keeps a merged property index."""
+
+    def __init__(self, cities, output_template=CITY_OUTPUT_FILE, index_file=MERGED_INDEX_FILE):
+        self.files = {city: output_template.format(city=city) for city in cities}
+        self.writers = {city: open_output_writer(path, ENCODING) for city, path in self.files.items()}
+        self.index_file = index_file
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def write(self, city, record):
+        with self.lock:
+            writer = self.writers[city]
+            position = writer.count
+            offset, length = writer.write(record)
+            self.index[record['property_id']] = {
+                'city': city,
+                'file': self.files[city],
+                'position': position,
+                'offset': offset,
+                'length': length,
+            }
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        save_to_json({
+            'shards': {city: {'file': path, 'count': self.writers[city].count} for city, path in self.files.items()},
+            'properties': self.index,
+        }, self.index_file, ENCODING)
+        print(f"Merged index of {len(self.index)} properties written to {self.index_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl several cities concurrently")
+    parser.add_argument('cities', nargs='*', default=CITIES, help="City slugs (default: config.CITIES)")
+    parser.add_argument('--assets', action='store_true', help="Download assets into per-city asset shards")
+    parser.add_argument('--fields', help="Comma-separated sections to build (default: config.FIELDS)")
+    args = parser.parse_args()
+
+    scraper = PropertyScraper(fields=FieldSelection(args.fields) if args.fields else None)
+    if DELTA_CRAWL:
+        scraper = DeltaScraper(scraper)
+    shards = CityShardWriter(args.cities)
+
+    if args.assets:
+        downloads = BoundedExecutor(DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE)
+        derivatives = DerivativeGenerator() if IMAGE_DERIVATIVES else None
+
+        def localize_and_write(city, record):
+            try:
+                record = image_download.replace_and_download(record, shard=city)
+                if derivatives:
+                    record = derivatives.add_derivatives(record)
+                shards.write(city, record)
+            except Exception as e:
+                print(f"[{city}] Error localizing assets for {record.get('property_id')}: {e}")
+                traceback.print_exc()
+
+        sink = lambda city, record: downloads.submit(localize_and_write, city, record)
+    else:
+        downloads = derivatives = None
+        sink = shards.write
+
+    crawl = None
+    try:
+        crawl = MultiCityCrawl(scraper, cities=args.cities, sink=sink)
+        crawl.run()
+    finally:
+        if downloads:
+            downloads.shutdown()
+            image_download.write_log()
+        if derivatives:
+            derivatives.shutdown()
+        shards.close()
+        if DELTA_CRAWL:
+            scraper.finish_run(complete=crawl is not None and crawl.complete)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# Vectorized price and area normalization into numeric columns
+
+import re
+import numpy as np
+from config import NORMALIZE_BATCH_SIZE
+
+# Unit alternatives are ordered longest first so 'crore' wins over 'cr', 'lakh' over 'l'
+PRICE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(crore|cr|lakhs?|lacs?|l|k)?\b', re.IGNORECASE)
+AREA_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(sq\.?\s*f(?:ee|oo)?t|sq\.?\s*m(?:tr|eter|etre)?s?|sq\.?\s*y(?:ar)?ds?|acres?)?',
+    re.IGNORECASE,
+)
+# A number followed by a word that isn't a distance unit ('5 mins') is not a distance
+DISTANCE_PATTERN = re.compile(
+    r'(?<![\d.])(\d+(?:\.\d+)?)(?![\d.])\s*(?:(kms?|kilomet(?:er|re)s?|mi(?:les?)?|m(?:tr|eter|etre)?s?)\b|(?!\s*[a-z]))',
+    re.IGNORECASE,
+)
+
+# Canonical unit names, their multiplier to the base unit (rupees / square feet)
+PRICE_UNITS = [(None, 1.0), ('Cr', 1e7), ('Lakh', 1e5), ('K', 1e3)]
+AREA_UNITS = [(None, 1.0), ('sq ft', 1.0), ('sq m', 10.7639), ('sq yd', 9.0), ('acre', 43560.0)]
+DISTANCE_UNITS = [(None, 1.0), ('km', 1.0), ('m', 0.001), ('mi', 1.609344)]
+
+
+def _price_unit_code(unit):
+    unit = unit.lower()
+    if unit.startswith('cr'):
+        return 1
+    if unit.startswith('l'):
+        return 2
+    return 3
+
+
+def _area_unit_code(unit):
+    unit = re.sub(r'[\s.]', '', unit.lower())
+    if unit.startswith('acre'):
+        return 4
+    if unit.startswith('sqf'):
+        return 1
+    if unit.startswith('sqm'):
+        return 2
+    return 3
+
+
+def _distance_unit_code(unit):
+    unit = unit.lower()
+    if unit.startswith('k'):
+        return 1
+    if unit.startswith('mi'):
+        return 3
+    return 2
+
+
+def _parse_column(texts, pattern, unit_code, units):
+    """Parse a whole column of free text into numeric arrays.
+
+    The column is joined into one string and scanned with a single regex
+    pass; line membership, unit inheritance and min/max reduction are then
+    done with array operations rather than per-record Python loops.
+    Returns ``(minimum, maximum, unit_codes)`` arrays, NaN/0 where nothing
+    was found.
+    """
+    count = len(texts)
+    minimum = np.full(count, np.nan)
+    maximum = np.full(count, np.nan)
+    codes_out = np.zeros(count, dtype=np.int8)
+    if not count:
+        return minimum, maximum, codes_out
+
+    cleaned = [(text or '').replace('\n', ' ') for text in texts]
+    joined = '\n'.join(cleaned).replace(',', '')
+    # Offsets of each line's end in the comma-stripped text
+    line_ends = np.cumsum([len(text) - text.count(',') + 1 for text in cleaned])
+
+    matches = [(m.start(), m.group(1), m.group(2)) for m in pattern.finditer(joined)]
+    if not matches:
+        return minimum, maximum, codes_out
+    starts = np.array([start for start, _, _ in matches], dtype=np.int64)
+    numbers = np.array([float(number) for _, number, _ in matches])
+    codes = np.array([unit_code(unit) if unit else 0 for _, _, unit in matches], dtype=np.int8)
+    lines = np.searchsorted(line_ends, starts, side='right')
+
+    # '50 - 80 Lac': a bare number takes the next unit given on the same line
+    size = len(codes)
+    positions = np.where(codes > 0, np.arange(size), size)
+    next_unit = np.minimum.accumulate(positions[::-1])[::-1]
+    has_next = next_unit < size
+    next_index = np.where(has_next, next_unit, 0)
+    inherit = (codes == 0) & has_next & (lines[next_index] == lines)
+    codes = np.where(inherit, codes[next_index], codes)
+
+    factors = np.array([factor for _, factor in units])
+    values = numbers * factors[codes]
+
+    lows = np.full(count, np.inf)
+    highs = np.full(count, -np.inf)
+    np.minimum.at(lows, lines, values)
+    np.maximum.at(highs, lines, values)
+    found = np.isfinite(lows)
+    minimum[found] = lows[found]
+    maximum[found] = highs[found]
+    # Unit of the last number on each line
+    codes_out[lines] = codes
+    return minimum, maximum, codes_out
+
+
+def parse_price_column(texts):
+    """Parse prices like '₹ 2.1 Cr - 4.5 Cr' into rupee min/max arrays and unit codes."""
+    return _parse_column(texts, PRICE_PATTERN, _price_unit_code, PRICE_UNITS)
+
+
+def parse_area_column(texts):
+    """Parse areas like '1800 - 2500 sq ft' into square-foot min/max arrays and unit codes."""
+    return _parse_column(texts, AREA_PATTERN, _area_unit_code, AREA_UNITS)
+
+
+def parse_distance_column(texts):
+    """Parse landmark distances like '0.36 KM' or '850 m' into kilometre arrays.
+
+    Bare numbers are km; numbers with another unit ('5 mins') are ignored.
+    """
+    minimum, _, _ = _parse_column(texts, DISTANCE_PATTERN, _distance_unit_code, DISTANCE_UNITS)
+    return minimum
+
+
+def parse_price(text):
+    """Scalar convenience: (min, max) rupees for one price string, or (None, None)."""
+    minimum, maximum, _ = parse_price_column([text])
+    if np.isnan(minimum[0]):
+        return None, None
+    return float(minimum[0]), float(maximum[0])
+
+
+def _price_fields(record):
+    project = record.get('project') or {}
+    yield project, 'price'
+    for item in project.get('price_list') or []:
+        yield item, 'price'
+    for items in (project.get('floor_plans') or {}).values():
+        for item in items:
+            yield item, 'price'
+
+
+def _rate_fields(record):
+    insights = (record.get('project') or {}).get('price_insights') or {}
+    for item in insights.get('comparable_projects') or []:
+        yield item, 'pricePerSqFt'
+
+
+def _area_fields(record):
+    information = (record.get('project') or {}).get('information')
+    if information:
+        yield information, 'size'
+
+
+def _distance_fields(record):
+    for items in ((record.get('project') or {}).get('nearby_landmarks') or {}).values():
+        for item in items:
+            yield item, 'distance'
+
+
+# (column parser, unit table, generator of (container, key) pairs in a record)
+COLUMNS = (
+    (parse_price_column, PRICE_UNITS, _price_fields),
+    (parse_price_column, PRICE_UNITS, _rate_fields),
+    (parse_area_column, AREA_UNITS, _area_fields),
+)
+
+
+def normalize_records(records):
+    """Add ``<field>_min``, ``<field>_max`` and ``<field>_unit`` next to every free-text price and area.
+
+    Each field type is gathered across the whole batch into one column and
+    parsed at once; prices are in rupees, areas in square feet, and the unit
+    records what the source text used (e.g. 'Cr', 'sq m'). Landmark
+    distances get a single ``distance_km``.
+    """
+    for parse, units, fields in COLUMNS:
+        targets = [(container, key) for record in records for container, key in fields(record)]
+        if not targets:
+            continue
+        minimum, maximum, codes = parse([container.get(key) for container, key in targets])
+        found = ~np.isnan(minimum)
+        for (container, key), ok, low, high, code in zip(targets, found.tolist(), minimum.tolist(),
+                                                          maximum.tolist(), codes.tolist()):
+            container[f"{key}_min"] = low if ok else None
+            container[f"{key}_max"] = high if ok else None
+            container[f"{key}_unit"] = units[code][0] if ok else None
+
+    targets = [container for record in records for container, _ in _distance_fields(record)]
+    if targets:
+        distances = parse_distance_column([container.get('distance') for container in targets])
+        for container, km in zip(targets, distances.tolist()):
+            container['distance_km'] = None if km != km else km  # NaN where no distance was found
+    return records
+
+
+class NormalizeStage:
+    """Buffers records, normalizes them a batch at a time and passes them on to ``sink``."""
+
+    def __init__(self, sink, batch_size=NORMALIZE_BATCH_SIZE):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.pending = []
+
+    def __call__(self, record):
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            batch, self.pending = self.pending, []
+            for record in normalize_records(batch):
+                self.sink(record)
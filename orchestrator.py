@@ -0,0 +1,129 @@
+# In-process scrape -> asset download -> write orchestrator
+
+import threading
+import traceback
+import image_download
+from pipeline import CrawlPipeline
+from scraper import PropertyScraper
+from delta import DeltaScraper
+from frontier import RecrawlFrontier
+from normalize import NormalizeStage
+from section_diff import ASSET_SECTIONS, get_section, set_section
+from record_index import open_output_writer
+from search_index import SearchIndex
+from image_derivatives import DerivativeGenerator
+from utils import BoundedExecutor
+from config import START_PAGE, END_PAGE, MAX_WORKERS, DOWNLOAD_WORKERS, DOWNLOAD_QUEUE_SIZE, ENCODING, DELTA_CRAWL, RECRAWL_BUDGET, NORMALIZE_RECORDS, SEARCH_INDEX, IMAGE_DERIVATIVES
+
+
+class ScrapeAndDownloadOrchestrator:
+    """Feeds each scraped record straight into the asset download stage.
+
+    The crawl pipeline's output stage submits every record to a pool of
+    download workers as soon as it is produced; once a record's assets are
+    localized it is appended to the output file. Scraping and downloading
+    overlap, and no intermediate JSON is written or re-read.
+    """
+
+    def __init__(self, scraper=None, output_file=image_download.OUTPUT_JSON,
+                 start_page=START_PAGE, end_page=END_PAGE, detail_workers=MAX_WORKERS,
+                 download_workers=DOWNLOAD_WORKERS, download_queue_size=DOWNLOAD_QUEUE_SIZE):
+        self.scraper = scraper or PropertyScraper()
+        if DELTA_CRAWL and not isinstance(self.scraper, DeltaScraper):
+            self.scraper = DeltaScraper(self.scraper)
+        self.output_file = output_file
+        self.start_page = start_page
+        self.end_page = end_page
+        self.detail_workers = detail_workers
+        self.download_workers = download_workers
+        self.download_queue_size = download_queue_size
+        self._write_lock = threading.Lock()
+        self.writer = None
+        self.executor = None
+        self.search = None
+        self.derivatives = None
+        self.complete = False
+        self.failed = 0
+        self._failed_lock = threading.Lock()
+
+    def _reuse_localized_sections(self, record):
+        """Copy unchanged asset sections from the last localized record.
+
+        Returns the sections that still need downloading, or None for all.
+        """
+        if not isinstance(self.scraper, DeltaScraper):
+            return None
+        property_id = record.get('property_id')
+        changed = self.scraper.pop_changed_sections(property_id)
+        previous = self.scraper.store.get_output(property_id)
+        if changed is None or previous is None:
+            return None
+        for name in ASSET_SECTIONS:
+            if name not in changed:
+                set_section(record, name, get_section(previous, name))
+        return changed
+
+    def _localize_and_write(self, record):
+        try:
+            sections = self._reuse_localized_sections(record)
+            record = image_download.replace_and_download(record, sections=sections)
+            if self.derivatives:
+                record = self.derivatives.add_derivatives(record)
+            if isinstance(self.scraper, DeltaScraper):
+                self.scraper.store.put_output(record['property_id'], record)
+            with self._write_lock:
+                self.writer.write(record)
+            if self.search:
+                self.search.add(record)
+        except Exception as e:
+            print(f"Error localizing assets for {record.get('property_id')}: {e}")
+            traceback.print_exc()
+            with self._failed_lock:
+                self.failed += 1
+
+    def _submit(self, record):
+        # Blocks once download_queue_size records are pending, so the crawl backs off when downloads lag
+        self.executor.submit(self._localize_and_write, record)
+
+    def run(self):
+        """Run the crawl and download stages together; returns the number of records written."""
+        with open_output_writer(self.output_file, ENCODING) as writer, \
+                BoundedExecutor(self.download_workers, self.download_queue_size) as executor:
+            self.writer = writer
+            self.executor = executor
+            self.search = SearchIndex(SEARCH_INDEX) if SEARCH_INDEX else None
+            self.derivatives = DerivativeGenerator() if IMAGE_DERIVATIVES else None
+            frontier = None
+            if isinstance(self.scraper, DeltaScraper) and RECRAWL_BUDGET is not None:
+                frontier = RecrawlFrontier(self.scraper.store)
+            # Records are normalized a batch at a time on the output thread before being handed to the downloaders
+            sink = NormalizeStage(self._submit) if NORMALIZE_RECORDS else self._submit
+            pipeline = CrawlPipeline(self.scraper, start_page=self.start_page, end_page=self.end_page,
+                                     detail_workers=self.detail_workers, sink=sink, frontier=frontier)
+            pipeline.run()
+            if NORMALIZE_RECORDS:
+                sink.flush()
+            self.complete = pipeline.complete
+            executor.shutdown(wait=True)
+            if self.derivatives:
+                self.derivatives.shutdown()
+
+        if isinstance(self.scraper, DeltaScraper):
+            self.scraper.finish_run(complete=self.complete, search=self.search)
+        if self.search:
+            self.search.flush()
+            self.search.optimize()
+            self.search.close()
+
+        image_download.write_log()
+        print(f"\n✅ JSON written: {self.output_file} ({writer.count} properties, {self.failed} failed)")
+        print(f"📄 Download log: {image_download.LOG_FILE}")
+        return writer.count
+
+
+def main():
+    ScrapeAndDownloadOrchestrator().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# Staged producer/consumer crawl pipeline
+
+import itertools
+import queue
+import threading
+import traceback
+import requests
+from dedup import CrawlDedup
+from config import (
+    START_PAGE, END_PAGE, MAX_WORKERS, PAGE_WORKERS, PAGE_FETCH_RETRIES, MAX_FAILED_PAGES,
+    LISTING_QUEUE_SIZE, RESULT_QUEUE_SIZE, DEDUP_MODE,
+)
+
+# Marks the end of a stage's stream
+_DONE = object()
+
+
+class CrawlPipeline:
+    """Overlapping page -> detail -> output stages connected by bounded queues.
+
+    Page workers follow pagination until they reach an empty page (or
+    ``end_page``, or ``max_failed_pages`` pages in a row that fail even
+    after retries), detail workers scrape each listing tile, and a single
+    output stage hands finished records to ``sink``. Because the queues are
+    bounded, a slow stage blocks the stage feeding it instead of letting
+    listings or records pile up in memory.
+
+    With a ``frontier`` (see ``frontier.RecrawlFrontier``) the listing tiles
+    are collected first and handed to the detail workers in the frontier's
+    priority order, each with its refresh decision; ``scraper`` must then be
+    a ``DeltaScraper``.
+
+    Listings are checked against ``dedup`` (a ``dedup.CrawlDedup``; one is
+    created from DEDUP_MODE by default) before they are scheduled, so a
+    property that shows up on two pages is scraped once.
+    """
+
+    def __init__(self, scraper, start_page=START_PAGE, end_page=END_PAGE,
+                 page_workers=PAGE_WORKERS, detail_workers=MAX_WORKERS,
+                 listing_queue_size=LISTING_QUEUE_SIZE, result_queue_size=RESULT_QUEUE_SIZE,
+                 sink=None, frontier=None, dedup=None, max_failed_pages=MAX_FAILED_PAGES):
+        self.scraper = scraper
+        self.start_page = start_page
+        self.end_page = end_page
+        self.page_workers = max(1, page_workers)
+        self.detail_workers = max(1, detail_workers)
+        self.listing_queue = queue.Queue(maxsize=listing_queue_size)
+        self.result_queue = queue.Queue(maxsize=result_queue_size)
+        self.sink = sink
+        self.frontier = frontier
+        self.dedup = dedup if dedup is not None or not DEDUP_MODE else CrawlDedup()
+        self._collected = []  # Listing tiles held for the frontier
+
+        self._pages = itertools.count(start_page)
+        self._pages_lock = threading.Lock()
+        self._last_page = None  # First page found empty, once known
+        self.max_failed_pages = max(1, max_failed_pages)
+        self._failed_streak = 0  # Pages failed in a row
+        self.reached_end = False  # Pagination ended at an empty page
+        self.stats = {'pages': 0, 'listings': 0, 'records': 0, 'errors': 0, 'duplicates': 0, 'failed_pages': 0,
+                      'listing_requests': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def complete(self):
+        """True if the run saw every listing: from page 1 to an empty page, with no page given up on."""
+        return self.start_page == 1 and self.reached_end and not self.stats['failed_pages']
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _next_page(self):
+        """Hand out the next page number, or None once pagination has ended."""
+        with self._pages_lock:
+            page = next(self._pages)
+            if self.end_page is not None and page > self.end_page:
+                return None
+            if self._last_page is not None and page >= self._last_page:
+                return None
+            return page
+
+    def _mark_last_page(self, page):
+        with self._pages_lock:
+            if self._last_page is None or page < self._last_page:
+                self._last_page = page
+
+    def _page_failed(self, page):
+        """Count a page that failed after retries; True once pagination should stop."""
+        with self._pages_lock:
+            self._failed_streak += 1
+            return self._failed_streak >= self.max_failed_pages
+
+    def _page_succeeded(self):
+        with self._pages_lock:
+            self._failed_streak = 0
+
+    def _fetch_listings(self, page):
+        """Fetch one listing page, retrying transient failures."""
+        for attempt in range(PAGE_FETCH_RETRIES + 1):
+            self._count('listing_requests')
+            try:
+                listings = self.scraper.fetch_listings(page)
+            except requests.RequestException as e:
+                print(f"Request error fetching page {page} (attempt {attempt + 1}): {e}")
+                continue
+            if listings is not None:
+                return listings
+        return None
+
+    # === Stage 1: pages ===
+    def _page_worker(self):
+        while True:
+            page = self._next_page()
+            if page is None:
+                return
+
+            print(f"Scraping page {page}")
+            listings = self._fetch_listings(page)
+            if listings is None:
+                print(f"Giving up on page {page}")
+                self._count('errors')
+                self._count('failed_pages')
+                if self._page_failed(page):
+                    print(f"{self.max_failed_pages} pages failed in a row, stopping pagination at page {page}")
+                    self._mark_last_page(page)
+                    return
+                continue
+            self._page_succeeded()
+            if not listings:
+                print(f"No listings found on page {page}, stopping pagination")
+                self.reached_end = True
+                self._mark_last_page(page)
+                return
+
+            self._count('pages')
+            self._count('listings', len(listings))
+            if self.dedup:
+                new = [listing for listing in listings if self.dedup.first_listing(listing)]
+                self._count('duplicates', len(listings) - len(new))
+                listings = new
+            if self.frontier:
+                with self._stats_lock:
+                    self._collected.extend(listings)
+                continue
+            for listing in listings:
+                # Blocks while detail workers are behind
+                self.listing_queue.put(listing)
+
+    # === Stage 2: property details ===
+    def _detail_worker(self):
+        while True:
+            listing = self.listing_queue.get()
+            if listing is _DONE:
+                return
+            try:
+                if isinstance(listing, tuple):
+                    listing, refresh = listing
+                    record = self.scraper.scrape_property(listing, refresh=refresh)
+                else:
+                    record = self.scraper.scrape_property(listing)
+                if record:
+                    if self.dedup:
+                        self.dedup.mark_scraped(listing)
+                    self.result_queue.put(record)
+            except Exception as e:
+                print(f"Error scraping property {listing.get('project_id')}: {e}")
+                traceback.print_exc()
+                self._count('errors')
+
+    # === Stage 3: output ===
+    def _output_worker(self, results):
+        while True:
+            record = self.result_queue.get()
+            if record is _DONE:
+                return
+            self._count('records')
+            try:
+                if self.sink:
+                    self.sink(record)
+                else:
+                    results.append(record)
+            except Exception as e:
+                print(f"Error writing property {record.get('property_id')}: {e}")
+                traceback.print_exc()
+                self._count('errors')
+
+    def run(self):
+        """Run all stages to completion and return the collected records.
+
+        When a ``sink`` was given, records are passed to it as they are
+        produced and the returned list is empty.
+        """
+        results = []
+        page_threads = [threading.Thread(target=self._page_worker, name=f"page-{i}")
+                        for i in range(self.page_workers)]
+        detail_threads = [threading.Thread(target=self._detail_worker, name=f"detail-{i}")
+                          for i in range(self.detail_workers)]
+        output_thread = threading.Thread(target=self._output_worker, args=(results,), name="output")
+
+        for thread in page_threads + detail_threads + [output_thread]:
+            thread.start()
+
+        for thread in page_threads:
+            thread.join()
+        if self.frontier:
+            # Every listing request (retries, failed and empty pages included) came out of the budget
+            for planned in self.frontier.plan(self._collected, requests_used=self.stats['listing_requests']):
+                self.listing_queue.put(planned)
+            self._collected = []
+        for _ in detail_threads:
+            self.listing_queue.put(_DONE)
+        for thread in detail_threads:
+            thread.join()
+        self.result_queue.put(_DONE)
+        output_thread.join()
+        if self.dedup:
+            self.dedup.save()
+
+        print(f"Pipeline finished: {self.stats['pages']} pages, {self.stats['listings']} listings, "
+              f"{self.stats['records']} records, {self.stats['duplicates']} duplicates skipped, "
+              f"{self.stats['errors']} errors")
+        return results
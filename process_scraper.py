@@ -0,0 +1,125 @@
+# Process-pool offload of HTML parsing and extraction
+
+import os
+import http_fetch
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+from builder_information import get_builder_page_url, parse_builder_information, get_html as get_builder_html
+from media_extractor import fetch_gallery_html, parse_gallery_html
+from media_backends import extract_media, media_fallback
+from scraper import PropertyScraper
+from fields import FieldSelection
+from dedup import builder_cache
+from config import PARSE_PROCESSES, MEDIA_BACKEND
+
+# One scraper per worker process; only its (stateless) extractors are used
+_worker_scraper = None
+
+
+def _init_worker(fields=None):
+    global _worker_scraper
+    _worker_scraper = PropertyScraper(fields=FieldSelection(fields))
+
+
+def parse_listings_html(html):
+    """Parse a listing page into plain listing dicts (runs in a worker process)."""
+    return _worker_scraper.parse_listings_html(html)
+
+
+def parse_detail_html(listing, html):
+    """Run the detail page extractors (runs in a worker process).
+
+    Returns the record without builder info or media, plus the builder page URL.
+    """
+    soup = BeautifulSoup(html, 'html.parser') if html is not None else None
+    builder_url = get_builder_page_url(soup, listing['url']) if soup and _worker_scraper.fields.needs_builder_page else None
+    record = _worker_scraper.build_property_record(listing, soup)
+    if soup:
+        soup.decompose()
+    return record, builder_url
+
+
+def parse_builder_html(html, url=None):
+    """Run the builder page extractors (runs in a worker process)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    builder_info = parse_builder_information(soup, url)
+    soup.decompose()
+    return builder_info
+
+
+class ProcessPoolScraper:
+    """Drop-in for PropertyScraper that fetches in the calling thread and parses in processes.
+
+    The calling threads (e.g. ``CrawlPipeline`` page and detail workers) only
+    do network I/O; BeautifulSoup parsing and every ``extract_*`` method run
+    in a ``ProcessPoolExecutor`` and come back as plain dicts, so extraction
+    is not serialized by the GIL.
+    """
+
+    def __init__(self, scraper=None, processes=PARSE_PROCESSES):
+        self.scraper = scraper or PropertyScraper()
+        self.processes = processes or os.cpu_count()
+        self.fields = self.scraper.fields
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                            initargs=(self.fields.spec(),))
+
+    def fetch_listings(self, page, base_url=None):
+        """Fetch a listing page and parse its tiles in the process pool."""
+        url = (base_url or self.scraper.base_url) + str(page)
+        html = self.scraper.get_html(url, kind='listing')
+        if html is None:
+            return None
+        return self.executor.submit(parse_listings_html, html).result()
+
+    def scrape_property(self, listing):
+        """Fetch detail, gallery and builder HTML, parsing each in the process pool.
+
+        Requests for sections outside the scraper's field selection are skipped.
+        """
+        with http_fetch.sticky(listing['project_id']):
+            return self._scrape_property(listing)
+
+    def _scrape_property(self, listing):
+        detail_future = None
+        if self.fields.needs_detail_page:
+            detail_html = self.scraper.get_html(listing['url'])
+            detail_future = self.executor.submit(parse_detail_html, listing, detail_html)
+
+        # The gallery only needs the project id, so fetch it while the detail page parses
+        gallery_future = None
+        if self.fields.needs_gallery and MEDIA_BACKEND == 'http':
+            gallery_html = fetch_gallery_html(listing['project_id'], listing['url'])
+            gallery_future = self.executor.submit(parse_gallery_html, gallery_html) if gallery_html is not None else None
+
+        if detail_future:
+            record, builder_url = detail_future.result()
+        else:
+            # Listing-only sections (and the gallery) don't need the detail page
+            record, builder_url = self.scraper.build_property_record(listing, None), None
+
+        if self.fields.needs_builder_page:
+            record['builder_info'] = builder_cache.get(builder_url, self._fetch_builder) if builder_url else {}
+        if self.fields.needs_gallery:
+            media = gallery_future.result() if gallery_future else None
+            if MEDIA_BACKEND != 'http':
+                media = extract_media(listing['project_id'], listing['url'])
+            elif media is None and media_fallback():
+                # The HTTP gallery request or its parse failed; only the fallback backend is left to try
+                media = extract_media(listing['project_id'], listing['url'], backend=media_fallback(), fallback=None)
+            record['all_media'] = media if media is not None else {'images': {}, 'videos': []}
+        return record
+
+    def _fetch_builder(self, builder_url):
+        builder_html = get_builder_html(builder_url)
+        if builder_html is None:
+            return {}
+        return self.executor.submit(parse_builder_html, builder_html, builder_url).result()
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
@@ -0,0 +1,198 @@
+# Proxy pool: per-proxy keep-alive sessions, health scoring, eviction and sticky assignment
+
+import argparse
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    PROXIES, PROXY_CONNECTIONS, PROXY_RETRIES, PROXY_EVICT_AFTER, PROXY_COOLDOWN, PROXY_MAX_COOLDOWN,
+    PROXY_THROTTLE_STATUSES, HEADERS, REQUEST_TIMEOUT,
+)
+
+# Smoothing factor of the latency and error moving averages
+EWMA_ALPHA = 0.2
+# Latency (seconds) at which a healthy proxy's score halves
+LATENCY_SCALE = 2.0
+
+
+class ProxyError(requests.RequestException):
+    """No proxy could complete the request."""
+
+
+class Proxy:
+    """One egress proxy with its own keep-alive connection pool and health statistics."""
+
+    def __init__(self, url, connections=PROXY_CONNECTIONS):
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.proxies = {'http': url, 'https': url}
+        # Environment proxies (HTTP_PROXY, ...) would otherwise take precedence over the pool's
+        self.session.trust_env = False
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0  # Consecutive
+        self.evictions = 0
+        self.evicted_until = 0.0
+        self.requests = 0
+        self.in_flight = 0
+
+    @property
+    def evicted(self):
+        return time.time() < self.evicted_until
+
+    def score(self):
+        """Higher is better: penalized by recent errors and by latency."""
+        latency = self.latency if self.latency is not None else 0.0
+        return (1.0 - self.error_rate) / (1.0 + latency / LATENCY_SCALE) / (1 + self.in_flight)
+
+    def record(self, ok, latency):
+        self.requests += 1
+        self.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok:
+            self.failures = 0
+            self.latency = latency if self.latency is None else self.latency + EWMA_ALPHA * (latency - self.latency)
+        else:
+            self.failures += 1
+
+    def __repr__(self):
+        return f"Proxy({self.url})"
+
+
+class ProxyPool:
+    """Spreads requests over a set of proxies.
+
+    Each request goes to a healthy proxy chosen by score, weighted at random
+    so load spreads across comparable proxies. A proxy failing
+    ``evict_after`` times in a row (connection errors or throttling statuses)
+    is evicted for a cooldown that doubles with every eviction, then
+    re-admitted on probation. Requests made under the same sticky key (e.g. a
+    property id) keep using the same proxy while it stays healthy.
+    """
+
+    def __init__(self, proxy_urls=PROXIES, connections=PROXY_CONNECTIONS, retries=PROXY_RETRIES,
+                 evict_after=PROXY_EVICT_AFTER, cooldown=PROXY_COOLDOWN, max_cooldown=PROXY_MAX_COOLDOWN,
+                 throttle_statuses=PROXY_THROTTLE_STATUSES):
+        if not proxy_urls:
+            raise ValueError("ProxyPool needs at least one proxy URL")
+        self.proxies = [Proxy(url, connections) for url in proxy_urls]
+        self.retries = retries
+        self.evict_after = evict_after
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.throttle_statuses = set(throttle_statuses)
+        self.sticky = {}
+        self.lock = threading.Lock()
+
+    def _readmit(self, proxy):
+        # Back on probation: one more failure evicts it again
+        proxy.evicted_until = 0.0
+        proxy.failures = self.evict_after - 1
+        print(f"[PROXY] Re-admitted {proxy.url}")
+
+    def acquire(self, sticky_key=None, exclude=()):
+        """Pick a proxy for a request and mark it in flight."""
+        with self.lock:
+            for proxy in self.proxies:
+                if proxy.evicted_until and not proxy.evicted:
+                    self._readmit(proxy)
+
+            proxy = self.sticky.get(sticky_key) if sticky_key is not None else None
+            if proxy is None or proxy.evicted or proxy in exclude:
+                candidates = [p for p in self.proxies if not p.evicted and p not in exclude]
+                if candidates:
+                    proxy = random.choices(candidates, weights=[max(p.score(), 0.01) for p in candidates])[0]
+                else:
+                    # Everything is evicted: use the proxy that comes back first rather than stall
+                    remaining = [p for p in self.proxies if p not in exclude] or self.proxies
+                    proxy = min(remaining, key=lambda p: p.evicted_until)
+                if sticky_key is not None:
+                    self.sticky[sticky_key] = proxy
+            proxy.in_flight += 1
+            return proxy
+
+    def release(self, proxy, ok, latency):
+        """Record the outcome of a request, evicting the proxy if it keeps failing."""
+        with self.lock:
+            proxy.in_flight -= 1
+            proxy.record(ok, latency)
+            if not ok and proxy.failures >= self.evict_after and not proxy.evicted:
+                cooldown = min(self.cooldown * 2 ** proxy.evictions, self.max_cooldown)
+                proxy.evictions += 1
+                proxy.evicted_until = time.time() + cooldown
+                print(f"[PROXY] Evicted {proxy.url} for {cooldown:.0f}s after {proxy.failures} failures")
+
+    def forget(self, sticky_key):
+        """Drop a sticky assignment once its property is done."""
+        with self.lock:
+            self.sticky.pop(sticky_key, None)
+
+    def request(self, method, url, sticky_key=None, **kwargs):
+        """Send a request through the pool, retrying on other proxies after a failure."""
+        tried = []
+        last_error = None
+        for attempt in range(self.retries + 1):
+            proxy = self.acquire(sticky_key, exclude=tried)
+            start = time.perf_counter()
+            try:
+                response = proxy.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self.release(proxy, False, time.perf_counter() - start)
+                print(f"[PROXY] {proxy.url} failed for {url}: {e}")
+                tried.append(proxy)
+                last_error = e
+                if sticky_key is not None:
+                    self.forget(sticky_key)
+                continue
+
+            throttled = response.status_code in self.throttle_statuses
+            self.release(proxy, not throttled, time.perf_counter() - start)
+            if throttled and attempt < self.retries:
+                tried.append(proxy)
+                if sticky_key is not None:
+                    self.forget(sticky_key)
+                continue
+            return response
+        raise ProxyError(f"All proxies failed for {url}: {last_error}")
+
+    def stats(self):
+        with self.lock:
+            return [{
+                'proxy': proxy.url,
+                'score': round(proxy.score(), 3),
+                'latency': round(proxy.latency, 3) if proxy.latency is not None else None,
+                'error_rate': round(proxy.error_rate, 3),
+                'requests': proxy.requests,
+                'evicted': proxy.evicted,
+            } for proxy in self.proxies]
+
+    def close(self):
+        for proxy in self.proxies:
+            proxy.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the configured proxies against a URL")
+    parser.add_argument('url', nargs='?', default='https://www.squareyards.com/')
+    parser.add_argument('--requests', type=int, default=10, help="Requests to send through the pool")
+    parser.add_argument('--proxies', nargs='+', default=PROXIES, help="Proxy URLs (default: config.PROXIES)")
+    args = parser.parse_args()
+
+    pool = ProxyPool(args.proxies)
+    for _ in range(args.requests):
+        try:
+            response = pool.request('GET', args.url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+            print(f"{response.status_code} {args.url}")
+        except ProxyError as e:
+            print(e)
+    for row in pool.stats():
+        print(row)
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
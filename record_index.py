@@ -0,0 +1,202 @@
+# Sidecar offset index for random access into large output files
+
+import argparse
+import mmap
+import os
+import serialization
+from builder_information import record_builder_id
+from builder_entities import BuilderSplitWriter, inline_builder, load_builders
+from utils import JsonArrayWriter, JsonLinesWriter, iter_json_spans, save_to_json
+from config import OUTPUT_FILE, OUTPUT_INDEX, INDEX_SUFFIX, SEPARATE_BUILDERS, ENCODING
+
+
+def index_path(data_file):
+    return data_file + INDEX_SUFFIX
+
+
+class RecordIndex:
+    """Maps ``property_id`` to the ``[offset, length]`` of its bytes in a data file,
+    and each builder id to the property ids it appears in."""
+
+    def __init__(self):
+        self.properties = {}
+        self.builders = {}
+
+    def add(self, record, offset, length):
+        property_id = record['property_id']
+        self.properties[property_id] = [offset, length]
+        builder_id = record_builder_id(record)
+        if builder_id:
+            self.builders.setdefault(builder_id, []).append(property_id)
+
+    def save(self, data_file, encoding=ENCODING):
+        """Write the index next to ``data_file``, stamped with the data file's size."""
+        save_to_json({
+            'data_file': os.path.basename(data_file),
+            'size': os.path.getsize(data_file),
+            'encoding': encoding,
+            'properties': self.properties,
+            'builders': self.builders,
+        }, index_path(data_file), ENCODING)
+
+
+class IndexedWriter:
+    """Wraps a JSON/JSONL writer and records each record's byte span as it is written."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.index = RecordIndex()
+
+    @property
+    def count(self):
+        return self.writer.count
+
+    def write(self, record):
+        offset, length = self.writer.write(record)
+        self.index.add(record, offset, length)
+        return offset, length
+
+    def close(self):
+        self.writer.close()
+        self.index.save(self.writer.filename, self.writer.encoding)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_output_writer(filename, encoding=ENCODING, index=OUTPUT_INDEX, separate_builders=SEPARATE_BUILDERS):
+    """A streaming writer for ``filename``: JSON Lines for ``.jsonl``, otherwise a JSON array.
+
+    ``separate_builders`` writes each builder profile once to a builders
+    collection next to the file and leaves only ``builder_id`` in the records.
+    """
+    writer_class = JsonLinesWriter if filename.endswith('.jsonl') else JsonArrayWriter
+    writer = writer_class(filename, encoding)
+    if separate_builders:
+        writer = BuilderSplitWriter(writer)
+    return IndexedWriter(writer) if index else writer
+
+
+def save_records(records, filename, encoding=ENCODING, index=OUTPUT_INDEX, separate_builders=SEPARATE_BUILDERS):
+    """Like save_to_json for a list of records, plus the sidecar index; returns success."""
+    try:
+        with open_output_writer(filename, encoding, index, separate_builders) as writer:
+            for record in records:
+                writer.write(record)
+        return True
+    except Exception as e:
+        print(f"Error saving to JSON: {e}")
+        return False
+
+
+def build_index(data_file, encoding=ENCODING):
+    """Index an existing JSON or JSONL output file in one streaming pass."""
+    index = RecordIndex()
+    for record, offset, length in iter_json_spans(data_file, encoding):
+        index.add(record, offset, length)
+    index.save(data_file, encoding)
+    return len(index.properties)
+
+
+class IndexedRecordReader:
+    """Random access to single records of a large output file.
+
+    The data file is memory-mapped and only the requested record's bytes are
+    decoded, so a lookup costs one dictionary probe and one record decode
+    no matter how large the file is. If builders were written separately,
+    ``inline_builders`` puts each record's builder profile back in place.
+    """
+
+    def __init__(self, data_file, index_file=None, inline_builders=True):
+        with open(index_file or index_path(data_file), 'rb') as f:
+            index = serialization.loads(f.read())
+        size = os.path.getsize(data_file)
+        if index['size'] != size:
+            raise ValueError(f"Index for {data_file} is stale ({index['size']} bytes indexed, file has {size})")
+        self.encoding = index['encoding']
+        self.properties = index['properties']
+        self.builders = index['builders']
+        self.builder_profiles = load_builders(data_file, self.encoding)
+        self.inline_builders = inline_builders
+        self.file = open(data_file, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __len__(self):
+        return len(self.properties)
+
+    def __contains__(self, property_id):
+        return property_id in self.properties
+
+    def property_ids(self):
+        return list(self.properties)
+
+    def get_raw(self, property_id):
+        """The record's encoded bytes, or None."""
+        span = self.properties.get(property_id)
+        if span is None:
+            return None
+        offset, length = span
+        return self.data[offset:offset + length]
+
+    def get(self, property_id):
+        """Decode and return one record, or None."""
+        raw = self.get_raw(property_id)
+        if raw is None:
+            return None
+        record = serialization.decode_record(raw.decode(self.encoding))
+        return inline_builder(record, self.builder_profiles) if self.inline_builders else record
+
+    def get_builder(self, builder_id):
+        """A builder profile from the separate builders collection, or None."""
+        return self.builder_profiles.get(builder_id)
+
+    def by_builder(self, builder_id):
+        """All records of one builder (see builder_information.get_builder_id)."""
+        return [self.get(property_id) for property_id in self.builders.get(builder_id, [])]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offset index of an output file")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Index an existing JSON or JSONL file")
+    build.add_argument('data_file', nargs='?', default=OUTPUT_FILE)
+    get = sub.add_parser('get', help="Print one property")
+    get.add_argument('property_id')
+    get.add_argument('--file', dest='data_file', default=OUTPUT_FILE)
+    builder = sub.add_parser('builder', help="Print the property ids of one builder")
+    builder.add_argument('builder_id')
+    builder.add_argument('--file', dest='data_file', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_index(args.data_file)
+        print(f"Indexed {count} properties in {index_path(args.data_file)}")
+        return
+
+    with IndexedRecordReader(args.data_file) as reader:
+        if args.command == 'get':
+            record = reader.get(args.property_id)
+            if record is None:
+                print(f"Property {args.property_id} not found")
+            else:
+                print(serialization.dumps(record, pretty=True))
+        else:
+            print("\n".join(reader.builders.get(args.builder_id, [])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Offline re-extraction: run the current extractors over the response archive
+
+import argparse
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import http_fetch
+from archive import ArchiveReader
+from scraper import PropertyScraper
+from fields import FieldSelection
+from normalize import NormalizeStage
+from record_index import open_output_writer
+from config import ARCHIVE_FOLDER, REPLAY_OUTPUT_FILE, PARSE_PROCESSES, NORMALIZE_RECORDS, ENCODING
+
+# One archive reader and scraper per worker process
+_worker_scraper = None
+_worker_archive = None
+
+
+def _init_worker(folder, fields=None):
+    global _worker_scraper, _worker_archive
+    _worker_archive = http_fetch.enable_replay(folder)
+    _worker_scraper = PropertyScraper(fields=FieldSelection(fields) if fields is not None else None)
+
+
+def _replay_listing_page(entry):
+    """Parse one archived listing page into listing tiles (runs in a worker process)."""
+    response = _worker_archive.read(entry)
+    if response.status_code != 200:
+        return []
+    return _worker_scraper.parse_listings_html(response.text)
+
+
+def _replay_property(listing):
+    """Rebuild one property record from its archived responses (runs in a worker process)."""
+    try:
+        return _worker_scraper.scrape_property(listing)
+    except Exception as e:
+        print(f"[REPLAY] Error rebuilding property {listing.get('project_id')}: {e}")
+        traceback.print_exc()
+        return None
+
+
+def replay(folder=ARCHIVE_FOLDER, output_file=REPLAY_OUTPUT_FILE, processes=PARSE_PROCESSES, fields=None):
+    """Re-extract every archived property across all cores, without touching the network.
+
+    Listing pages are parsed first to recover the listing tiles, then each
+    property's detail, builder and gallery responses are looked up in the
+    archive by the same requests a live crawl would make.
+    """
+    processes = processes or os.cpu_count()
+    entries = ArchiveReader(folder).entries('listing')
+    print(f"[REPLAY] {len(entries)} archived listing pages in {folder}, {processes} processes")
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(folder, fields)) as pool, \
+            open_output_writer(output_file, ENCODING) as writer:
+        listings = {}
+        for page_listings in pool.map(_replay_listing_page, entries):
+            for listing in page_listings:
+                # A property listed on two pages is rebuilt once
+                listings.setdefault(listing['project_id'], listing)
+
+        sink = NormalizeStage(writer.write) if NORMALIZE_RECORDS else writer.write
+        for record in pool.map(_replay_property, listings.values(), chunksize=8):
+            if record:
+                sink(record)
+                written += 1
+        if NORMALIZE_RECORDS:
+            sink.flush()
+
+    print(f"[REPLAY] Rebuilt {written} of {len(listings)} properties into {output_file}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract properties from the response archive")
+    parser.add_argument('--archive', default=ARCHIVE_FOLDER, help="Folder of .warc.gz files")
+    parser.add_argument('--out', default=REPLAY_OUTPUT_FILE, help="Output JSON or JSONL file")
+    parser.add_argument('--processes', type=int, default=PARSE_PROCESSES, help="Worker processes (default: all cores)")
+    parser.add_argument('--fields', help="Comma-separated sections to rebuild (default: config.FIELDS)")
+    args = parser.parse_args()
+    replay(args.archive, args.out, args.processes, FieldSelection(args.fields).spec() if args.fields else None)
+
+
+if __name__ == "__main__":
+    main()
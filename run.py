@@ -1,16 +1,13 @@
-import subprocess
+# Scrape properties and localize their assets in one process
 
-# Run the first script
-result1 = subprocess.run(["python", "main.py"])
+from orchestrator import ScrapeAndDownloadOrchestrator
 
-# Check if the first script was successful
-if result1.returncode == 0:
-    # If successful, run the second script
-    result2 = subprocess.run(["python", "image_download.py"])
-    
-    if result2.returncode == 0:
-        print("Both scripts executed successfully.")
-    else:
-        print("Script 2 failed.")
-else:
-    print("Script 1 failed.")
\ No newline at end of file
+try:
+    # Records go straight from the scraper into the download stage
+    ScrapeAndDownloadOrchestrator().run()
+    print("Scraping and asset download completed successfully.")
+except KeyboardInterrupt:
+    print("Run interrupted by user.")
+except Exception as e:
+    print(f"Run failed: {e}")
+    raise SystemExit(1)
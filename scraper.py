@@ -3,55 +3,73 @@
 import time
 import traceback
 import requests
+import http_fetch
 from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor
 from config import HEADERS, BASE_URL, REQUEST_TIMEOUT
-from media_extractor import extract_media_by_sub_tab
-from builder_information import extract_builder_information
-from utils import safe_get_text, safe_get_attribute
+from media_backends import extract_media
+from builder_information import get_builder_page_url, get_builder_information
+from utils import safe_get_text, safe_get_attribute, bounded_html
+from fields import FieldSelection, RECORD_LAYOUT, LISTING_FIELDS, DETAIL_EXTRACTORS
 import re
 import random
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from collections import defaultdict
-from tqdm import tqdm
 
 class PropertyScraper:
     """A class to scrape property listings from SquareYards."""
     
-    def __init__(self, headers=None, base_url=None, timeout=None):
+    def __init__(self, headers=None, base_url=None, timeout=None, fields=None):
         self.headers = headers or HEADERS
         self.base_url = base_url or BASE_URL
         self.timeout = timeout or REQUEST_TIMEOUT
+        # Which record sections to build; defaults to config.FIELDS (None = all)
+        self.fields = fields or FieldSelection()
     
+    def fetch_listings(self, page, base_url=None):
+        """Fetch a listing page and return its parsed listing tiles.
+
+        Returns an empty list when the page has no listings (end of pagination)
+        and None when the page could not be fetched. ``base_url`` overrides
+        the scraper's own, e.g. to crawl another city with the same engine.
+        """
+        url = (base_url or self.base_url) + str(page)
+        response = http_fetch.get(url, 'listing', headers=self.headers, timeout=self.timeout)
+
+        if response.status_code != 200:
+            print(f"Failed to fetch page {page}: Status {response.status_code}")
+            return None
+
+        return self.parse_listings_html(response.text)
+
+    def parse_listings_html(self, html):
+        """Parse the listing tiles out of a listing page's HTML."""
+        soup = BeautifulSoup(html, 'html.parser')
+        listings = []
+        for item in soup.find_all('div', class_='npTile'):
+            listing = self.parse_listing_tile(item)
+            if listing:
+                listings.append(listing)
+        soup.decompose()
+        return listings
+
     def scrape_page(self, page):
         """Scrape a single page and return property data."""
         try:
             print(f"Scraping page {page}")
-            url = self.base_url + str(page)
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            listings = self.fetch_listings(page)
 
-            if response.status_code != 200:
-                print(f"Failed to fetch page {page}: Status {response.status_code}")
+            if listings is None:
                 return []
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            listings = soup.find_all('div', class_='npTile')
-            
             if not listings:
                 print(f"No listings found on page {page}")
                 return []
 
+            from tqdm import tqdm  # Progress bar for this interactive helper only
+
             page_data = []
-            for item in tqdm(listings[9:12]):
+            for listing in tqdm(listings):
                 try:
-                    property_data = self._extract_property_data(item)
+                    property_data = self.scrape_property(listing)
                     if property_data:
                         page_data.append(property_data)
                 except Exception as e:
@@ -69,9 +87,8 @@ class PropertyScraper:
             print(f"Error scraping page {page}: {e}")
             return []
 
-    def _extract_property_data(self, item):
-        """Extract property data from a listing item."""
-        # Get basic elements
+    def parse_listing_tile(self, item):
+        """Extract the basic listing fields from a listing tile."""
         fav_btn = item.select_one('.npFavBtn')
         project_name_elem = item.select_one('.npProjectName a strong')
         url_elem = item.select_one('.npProjectName a')
@@ -79,70 +96,99 @@ class PropertyScraper:
         price_elem = item.select_one('.npPriceBox')
         image_elem = item.select_one('.npFavBtn.shortlistcontainerlink')
 
-        # Extract data with safety checks
-        project_id = safe_get_attribute(fav_btn, 'data-projectid')
-        project_name = safe_get_text(project_name_elem)
-        url = safe_get_attribute(url_elem, 'href')
-        location = safe_get_text(location_elem)
-        price_range = safe_get_text(price_elem)
-        status = safe_get_attribute(fav_btn, 'data-propstatus')
-        image = safe_get_attribute(image_elem, 'data-image')
+        listing = {
+            'project_id': safe_get_attribute(fav_btn, 'data-projectid'),
+            'project_name': safe_get_text(project_name_elem),
+            'url': safe_get_attribute(url_elem, 'href'),
+            'location': safe_get_text(location_elem),
+            'price_range': safe_get_text(price_elem),
+            'status': safe_get_attribute(fav_btn, 'data-propstatus'),
+            'image': safe_get_attribute(image_elem, 'data-image'),
+        }
 
         # Skip if essential data is missing
-        if not project_id or not project_name:
+        if not listing['project_id'] or not listing['project_name']:
             return None
+        return listing
 
-        soup = self.get_soup(url)  # Call only once per page
-        project_spec = self.extract_project_specifications(soup, url)
-        amenities = self.extract_amenities(soup, url)
-        builder_info = extract_builder_information(soup, url)
-        # builder_info = self.extract_builder_information(soup, url)
-        property_spec = self.extract_property_specification(soup, url)
-        property_about = self.extract_property_about(soup, url)
-        price_insights = self.extract_price_insights(soup, url)
-        nearby_landmarks = self.extract_nearby_landmarks(soup, url)
-        faq = self.extract_faq(soup, url)
-        price_list = self.extract_price_list(soup)
-        rera = self.extract_rera_details(soup)
-        location_insights = self.extract_location_description_and_insights(soup)
-        floor_plan = self.extract_floor_plans(soup)
-        all_media = extract_media_by_sub_tab(project_id, url)
-
-        return {
-            'property_id': project_id,
-            'project': {
-                'name': project_name,
-                'location': location,
-                'thumbnail_image': "https://static.squareyards.com/" + image if image else None,
-                'price': price_range,
-                'price_insights': price_insights,
-                'status': status,
-                "information": project_spec,
-                'price_list': price_list,
-                'floor_plans': floor_plan,
-                'amenities': amenities,
-                'specifications': property_spec,
-                'about': property_about,
-                'nearby_landmarks': nearby_landmarks,
-                'location_insights': location_insights,
-                'rera': rera,
-            },
+    def _extract_property_data(self, item):
+        """Extract property data from a listing item."""
+        listing = self.parse_listing_tile(item)
+        if not listing:
+            return None
+        return self.scrape_property(listing)
+
+    def scrape_property(self, listing):
+        """Fetch the detail, builder and gallery data for a parsed listing tile.
+
+        Requests whose sections aren't in ``self.fields`` are skipped.
+        """
+        project_id = listing['project_id']
+        url = listing['url']
+
+        # With a proxy pool, all of a property's requests leave through one proxy
+        with http_fetch.sticky(project_id):
+            soup = self.get_soup(url) if self.fields.needs_detail_page else None  # Call only once per page
+            try:
+                builder_url = get_builder_page_url(soup, url) if soup and self.fields.needs_builder_page else None
+                record = self.build_property_record(listing, soup)
+            finally:
+                # Free the parse tree before waiting on the builder and gallery requests
+                if soup:
+                    soup.decompose()
+            # builder_info = self.extract_builder_information(soup, url)
+            if self.fields.needs_builder_page:
+                record['builder_info'] = get_builder_information(builder_url) if builder_url else {}
+            if self.fields.needs_gallery:
+                record['all_media'] = extract_media(project_id, url)
+        return record
+
+    def build_property_record(self, listing, soup, builder_info=None, all_media=None):
+        """Run the selected detail page extractors and assemble the property record."""
+        url = listing['url']
+        image = listing['image']
+        sections = {
             'builder_info': builder_info,
-            'faq': faq,
             'all_media': all_media,
         }
+
+        record = {'property_id': listing['project_id'], 'project': {}}
+        for path in RECORD_LAYOUT:
+            if not self.fields.wants(path):
+                continue
+            if path == 'project.thumbnail_image':
+                value = "https://static.squareyards.com/" + image if image else None
+            elif path in LISTING_FIELDS:
+                value = listing[LISTING_FIELDS[path]]
+            elif path in DETAIL_EXTRACTORS:
+                value = DETAIL_EXTRACTORS[path](self, soup, url)
+            else:
+                value = sections[path]
+
+            if path.startswith('project.'):
+                record['project'][path[len('project.'):]] = value
+            else:
+                record[path] = value
+        return record
     
-    def get_soup(self, url):
-        """Reusable method to perform GET request and return parsed HTML soup."""
+    def get_html(self, url, kind='detail'):
+        """Perform a GET request and return the response text, or None on failure."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = http_fetch.get(url, kind, headers=self.headers, timeout=self.timeout)
             if response.status_code != 200:
                 print(f"[ERROR] Failed to fetch page: {url} | Status Code: {response.status_code}")
                 return None
-            return BeautifulSoup(response.text, 'html.parser')
+            return response.text
         except Exception as e:
             print(f"[EXCEPTION] While fetching {url}: {e}")
             return None
+
+    def get_soup(self, url):
+        """Reusable method to perform GET request and return parsed HTML soup."""
+        html = self.get_html(url)
+        if html is None:
+            return None
+        return BeautifulSoup(html, 'html.parser')
         
     def scrape_multiple_pages(self, pages, max_workers=10):
         """Scrape multiple pages concurrently."""
@@ -289,7 +335,7 @@ class PropertyScraper:
             about_element = soup.select_one('section.about-project-section#aboutProject .content-box')
 
             # Extract text using a helper or directly
-            about_info = about_element.decode_contents() if about_element else ""
+            about_info = bounded_html(about_element) if about_element else ""
 
             return about_info.strip("\n")
         except Exception as e:
@@ -313,7 +359,7 @@ class PropertyScraper:
             if asking_price_info and asking_price_data:
                 insights_data["asking_price"] = {
                     "ininsight_info": safe_get_text(asking_price_info),
-                    "data": asking_price_data.decode_contents().replace("\n", "") if asking_price_data else None,
+                    "data": bounded_html(asking_price_data).replace("\n", "") if asking_price_data else None,
                     "data-median": asking_price_data['data-median'] if asking_price_data and 'data-median' in asking_price_data.attrs else None,
                     "data-medianLabel": asking_price_data['data-medianLabel'] if asking_price_data and 'data-medianLabel' in asking_price_data.attrs else None,
                 }
@@ -491,7 +537,7 @@ class PropertyScraper:
 
             # Description
             description_tag = section.select_one(".key-insights-header .key-insights-heading .content-box")
-            description = description_tag.decode_contents() if description_tag else None
+            description = bounded_html(description_tag) if description_tag else None
   
             # Insights
             insights = []
@@ -0,0 +1,259 @@
+# Full-text search over scraped descriptions, FAQs and builder profiles (SQLite FTS5)
+
+import argparse
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+from builder_information import record_builder_id
+from builder_entities import iter_inlined_records
+from config import SEARCH_INDEX, SEARCH_BATCH_SIZE, OUTPUT_FILE, ENCODING
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    property_id TEXT UNIQUE NOT NULL,
+    name TEXT,
+    location TEXT,
+    status TEXT,
+    builder_id TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_location ON documents (location);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status);
+CREATE INDEX IF NOT EXISTS idx_documents_builder ON documents (builder_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    name, about, faq, specifications, location, builder,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# bm25 weight of each search column, in column order: a match in the project name counts most
+COLUMN_WEIGHTS = (10.0, 3.0, 2.0, 1.0, 2.0, 1.0)
+
+_SCRIPT_RE = re.compile(r'<(script|style)\b.*?</\1>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def strip_html(text):
+    """Plain text of an HTML fragment: tags removed, entities decoded, whitespace collapsed."""
+    if not text:
+        return ''
+    text = _TAG_RE.sub(' ', _SCRIPT_RE.sub(' ', text))
+    return _SPACE_RE.sub(' ', html.unescape(text)).strip()
+
+
+def _join(parts):
+    return ' '.join(part for part in parts if part)
+
+
+def document_row(record):
+    """The searchable text of a record, one value per ``search`` column."""
+    project = record.get('project') or {}
+    builder_info = record.get('builder_info') or {}
+    location_insights = project.get('location_insights') or {}
+    builder_id = record_builder_id(record)
+    return (
+        project.get('name') or '',
+        strip_html(project.get('about')),
+        _join(f"{faq.get('question')} {faq.get('answer')}" for faq in record.get('faq') or []),
+        _join(f"{spec.get('title')} {spec.get('value')}" for spec in project.get('specifications') or []),
+        _join([project.get('location'), strip_html(location_insights.get('description'))]),
+        _join([(builder_id or '').replace('-', ' '), strip_html(builder_info.get('overview')),
+               strip_html(builder_info.get('key_service_and_specialities'))]),
+    )
+
+
+def match_expression(query):
+    """FTS5 query for plain search text: every word must match, the last one also as a prefix."""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """Incremental FTS5 index of property text, with location/status/builder filters.
+
+    ``add`` buffers records and indexes them ``batch_size`` at a time in one
+    transaction; a re-scraped property replaces its previous document. Text
+    fields are indexed with HTML stripped.
+    """
+
+    def __init__(self, path=SEARCH_INDEX, batch_size=SEARCH_BATCH_SIZE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def index_many(self, records):
+        """Index (or re-index) a batch of records in one transaction."""
+        now = time.time()
+        with self.lock, self.conn:
+            for record in records:
+                project = record.get('project') or {}
+                row = self.conn.execute("SELECT id FROM documents WHERE property_id = ?",
+                                        (record['property_id'],)).fetchone()
+                if row:
+                    self.conn.execute("DELETE FROM search WHERE rowid = ?", row)
+                    self.conn.execute("DELETE FROM documents WHERE id = ?", row)
+                cursor = self.conn.execute(
+                    "INSERT INTO documents (property_id, name, location, status, builder_id, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (record['property_id'], project.get('name'), project.get('location'), project.get('status'),
+                     record_builder_id(record), now),
+                )
+                self.conn.execute("INSERT INTO search (rowid, name, about, faq, specifications, location, builder) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?)", (cursor.lastrowid,) + document_row(record))
+        return len(records)
+
+    def add(self, record):
+        """Buffer a record, indexing once a full batch is pending."""
+        with self.lock:
+            self.pending.append(record)
+            if len(self.pending) < self.batch_size:
+                return
+            records, self.pending = self.pending, []
+        self.index_many(records)
+
+    def remove(self, property_ids):
+        """Delete properties (e.g. delisted ones) from the index; returns how many were indexed."""
+        property_ids = set(property_ids)
+        removed = 0
+        with self.lock, self.conn:
+            self.pending = [record for record in self.pending if record['property_id'] not in property_ids]
+            for property_id in property_ids:
+                row = self.conn.execute("SELECT id FROM documents WHERE property_id = ?", (property_id,)).fetchone()
+                if row:
+                    self.conn.execute("DELETE FROM search WHERE rowid = ?", row)
+                    self.conn.execute("DELETE FROM documents WHERE id = ?", row)
+                    removed += 1
+        return removed
+
+    def flush(self):
+        with self.lock:
+            records, self.pending = self.pending, []
+        if records:
+            self.index_many(records)
+
+    def optimize(self):
+        """Merge the index's segments; worth doing after a full crawl."""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO search (search) VALUES ('optimize')")
+
+    def search(self, query, location=None, status=None, builder_id=None, limit=20, raw=False):
+        """Best matches for ``query`` as dicts, best first.
+
+        ``query`` is plain text (all words must match) unless ``raw``, in which
+        case it is passed to FTS5 as is (phrases, OR, NEAR, column filters).
+        ``location`` and ``status`` match case-insensitive substrings;
+        ``builder_id`` is exact.
+        """
+        expression = query if raw else match_expression(query)
+        if not expression:
+            return []
+        clauses, params = ["search MATCH ?"], [expression]
+        if location:
+            clauses.append("d.location LIKE ?")
+            params.append(f"%{location}%")
+        if status:
+            clauses.append("d.status LIKE ?")
+            params.append(f"%{status}%")
+        if builder_id:
+            clauses.append("d.builder_id = ?")
+            params.append(builder_id)
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        rows = self.conn.execute(
+            f"SELECT d.property_id, d.name, d.location, d.status, d.builder_id, bm25(search, {weights}) AS rank, "
+            f"snippet(search, -1, '[', ']', '...', 12) "
+            f"FROM search JOIN documents d ON d.id = search.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY rank LIMIT ?",
+            params + [limit],
+        )
+        return [{
+            'property_id': row[0],
+            'name': row[1],
+            'location': row[2],
+            'status': row[3],
+            'builder_id': row[4],
+            'score': round(-row[5], 3),
+            'snippet': row[6],
+        } for row in rows]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def build_search_index(data_file, path=SEARCH_INDEX, encoding=ENCODING):
+    """Index every record of an existing JSON or JSONL output file."""
+    with SearchIndex(path) as index:
+        count = 0
+        for record in iter_inlined_records(data_file, encoding):
+            index.add(record)
+            count += 1
+        index.flush()
+        index.optimize()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index")
+    parser.add_argument('--index', default=SEARCH_INDEX or 'output/search.db', help="Search index database")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Index an existing JSON or JSONL file")
+    build.add_argument('data_file', nargs='?', default=OUTPUT_FILE)
+    query = sub.add_parser('query', help="Search the index")
+    query.add_argument('text')
+    query.add_argument('--location')
+    query.add_argument('--status')
+    query.add_argument('--builder', help="Builder id, e.g. godrej-properties")
+    query.add_argument('--limit', type=int, default=20)
+    query.add_argument('--raw', action='store_true', help="Pass the text to FTS5 as a query expression")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        count = build_search_index(args.data_file, args.index)
+        print(f"Indexed {count} properties in {args.index} ({time.perf_counter() - started:.1f}s)")
+        return
+
+    with SearchIndex(args.index) as index:
+        started = time.perf_counter()
+        try:
+            results = index.search(args.text, location=args.location, status=args.status,
+                                   builder_id=args.builder, limit=args.limit, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            if not args.raw:
+                raise
+            parser.error(f"invalid FTS5 query {args.text!r}: {e}")
+        elapsed = (time.perf_counter() - started) * 1000
+        for result in results:
+            print(f"{result['score']:8.2f}  {result['property_id']}  {result['name']} ({result['location']}, "
+                  f"{result['status']})\n          {result['snippet']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
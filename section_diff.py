@@ -0,0 +1,98 @@
+# Section-level change detection for property records
+
+import hashlib
+import json
+import os
+import threading
+import time
+from config import DIFF_FEED_FILE, ENCODING
+
+# Section name -> path to it inside a property record
+TRACKED_SECTIONS = {
+    'price_list': ('project', 'price_list'),
+    'floor_plans': ('project', 'floor_plans'),
+    'rera': ('project', 'rera'),
+    'price_insights': ('project', 'price_insights'),
+    'amenities': ('project', 'amenities'),
+    'all_media': ('all_media',),
+}
+
+# Sections whose content is localized by the asset download stage
+ASSET_SECTIONS = ('floor_plans', 'amenities', 'all_media')
+
+
+def get_section(record, name):
+    """Return a tracked section's value, or None if the record doesn't have it."""
+    value = record
+    for key in TRACKED_SECTIONS[name]:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def set_section(record, name, value):
+    """Replace a tracked section's value in place."""
+    *parents, last = TRACKED_SECTIONS[name]
+    target = record
+    for key in parents:
+        target = target.setdefault(key, {})
+    target[last] = value
+
+
+def section_hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def section_hashes(record):
+    """Hash every tracked section of a record."""
+    return {name: section_hash(get_section(record, name)) for name in TRACKED_SECTIONS}
+
+
+def changed_sections(old_record, new_record):
+    """Names of the tracked sections that differ between two versions of a record."""
+    if old_record is None:
+        return set(TRACKED_SECTIONS)
+    old_hashes = section_hashes(old_record)
+    new_hashes = section_hashes(new_record)
+    return {name for name in TRACKED_SECTIONS if old_hashes[name] != new_hashes[name]}
+
+
+class DiffFeed:
+    """Appends one compact JSON line per new, changed or removed property.
+
+    Each line carries only the changed section names and their new values,
+    so consumers can re-index just those sections.
+    """
+
+    def __init__(self, filename=DIFF_FEED_FILE, encoding=ENCODING):
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.filename = filename
+        self.file = open(filename, 'w', encoding=encoding)
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.file.write(line + "\n")
+            self.count += 1
+
+    def record_change(self, property_id, change, sections, record):
+        self._write({
+            'property_id': property_id,
+            'change': change,
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sections': {name: get_section(record, name) for name in sorted(sections)},
+        })
+
+    def record_removed(self, property_id):
+        self._write({
+            'property_id': property_id,
+            'change': 'removed',
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+
+    def close(self):
+        self.file.close()
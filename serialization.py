@@ -0,0 +1,62 @@
+# JSON encoding and decoding of property records, with orjson when available
+
+import json
+from compact import PropertyRecord
+from config import JSON_PRETTY, JSON_VALIDATE
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; the stdlib encoder is slower
+    orjson = None
+
+
+def dumpb(value, pretty=JSON_PRETTY):
+    """Encode to UTF-8 JSON bytes: 2-space indented when ``pretty``, otherwise without whitespace.
+
+    The two encoders agree on records, but not on every value: orjson writes
+    NaN and infinity as ``null`` where the json module writes ``NaN``, and
+    may format floats differently. Non-string dict keys are stringified by
+    both.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(value, option=option)
+    if pretty:
+        return json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(value, pretty=JSON_PRETTY):
+    """Like dumpb, as text."""
+    return dumpb(value, pretty).decode('utf-8')
+
+
+def encode(value, pretty=JSON_PRETTY, encoding='utf-8'):
+    """Encode to JSON bytes in ``encoding``."""
+    data = dumpb(value, pretty)
+    return data if encoding.lower().replace('-', '') == 'utf8' else data.decode('utf-8').encode(encoding)
+
+
+def loads(data):
+    """Decode JSON from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_record(data, validate=JSON_VALIDATE):
+    """Decode one property record, checking it against the record schema (compact.PropertyRecord).
+
+    Raises compact.SchemaError for a record of the wrong shape.
+    """
+    record = loads(data)
+    if validate:
+        PropertyRecord.validate(record)
+    return record
+
+
+def validate_record(record, validate=JSON_VALIDATE):
+    """Schema check for records decoded by other means (e.g. streaming array decoding)."""
+    if validate:
+        PropertyRecord.validate(record)
+    return record
@@ -0,0 +1,287 @@
+# Spatial queries over builder offices and landmark distances (NumPy-backed)
+
+import argparse
+import re
+import numpy as np
+from builder_information import record_builder_id
+from builder_entities import iter_inlined_records
+from normalize import parse_distance_column
+from config import SPATIAL_CELL_KM, SPATIAL_BRUTE_FORCE_PAIRS, OUTPUT_FILE, ENCODING
+
+EARTH_RADIUS_KM = 6371.0088
+# Cell coordinates are packed into one int64 key, 21 bits per axis
+_KEY_OFFSET = 1 << 20
+
+
+def _to_xyz(lats, lons):
+    """Points on a sphere of the Earth's radius, in km; chord distance orders like great-circle distance."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1) * EARTH_RADIUS_KM
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / (2 * EARTH_RADIUS_KM), 1.0))
+
+
+def _km_to_chord(km):
+    return 2 * EARTH_RADIUS_KM * np.sin(min(km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def _pack(cells):
+    cells = cells + _KEY_OFFSET
+    return (cells[..., 0] << 42) | (cells[..., 1] << 21) | cells[..., 2]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; arguments broadcast like NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """Radius and k-nearest queries over (lat, lon) points.
+
+    Points are mapped onto a sphere in 3-D and bucketed into cubic cells of
+    ``cell_km``. A query only looks at the cells around it, and distances are
+    computed for those candidates in one vectorized pass. Straight-line
+    (chord) distance in 3-D orders points exactly like great-circle
+    distance, so no projection error creeps in. Bulk queries over small
+    point sets skip the grid and compare every pair at once.
+    """
+
+    def __init__(self, ids, lats, lons, cell_km=SPATIAL_CELL_KM):
+        self.ids = np.asarray(ids, dtype=object)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.cell_km = cell_km
+        self.xyz = _to_xyz(self.lats, self.lons).reshape(-1, 3)
+        keys = _pack(np.floor(self.xyz / cell_km).astype(np.int64))
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, point, reach):
+        """Indices of the points in cells within ``reach`` cells of ``point`` along every axis."""
+        if (2 * reach + 1) ** 3 > max(len(self.cell_keys), 1) * 8:
+            return np.arange(len(self.ids))  # Cheaper to scan everything than to probe that many cells
+        center = np.floor(point / self.cell_km).astype(np.int64)
+        steps = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+        probes = _pack(center + offsets)
+        slots = np.searchsorted(self.cell_keys, probes)
+        inside = slots < len(self.cell_keys)
+        slots, probes = slots[inside], probes[inside]
+        slots = slots[self.cell_keys[slots] == probes]
+        if not len(slots):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[start:start + count]
+                               for start, count in zip(self.cell_starts[slots], self.cell_counts[slots])])
+
+    def within(self, lat, lon, km):
+        """``(ids, distances_km)`` of the points within ``km`` of a location, nearest first."""
+        point = _to_xyz(lat, lon)
+        candidates = self._candidates(point, int(np.ceil(_km_to_chord(km) / self.cell_km)))
+        chords = np.linalg.norm(self.xyz[candidates] - point, axis=1)
+        keep = chords <= _km_to_chord(km)
+        candidates, chords = candidates[keep], chords[keep]
+        order = np.argsort(chords)
+        return self.ids[candidates[order]], _chord_to_km(chords[order])
+
+    def nearest(self, lat, lon, k=1):
+        """``(ids, distances_km)`` of the ``k`` points nearest to a location, nearest first."""
+        point = _to_xyz(lat, lon)
+        k = min(k, len(self.ids))
+        if k < 1:
+            return self.ids[:0], np.empty(0)
+        reach = 1
+        while True:
+            candidates = self._candidates(point, reach)
+            chords = np.linalg.norm(self.xyz[candidates] - point, axis=1)
+            # Every point within reach * cell_km is among the candidates, so a k-th distance inside that is final
+            if len(candidates) == len(self.ids) or (len(candidates) >= k and np.partition(chords, k - 1)[k - 1] <= reach * self.cell_km):
+                break
+            reach *= 2
+        top = np.argsort(chords)[:k]
+        return self.ids[candidates[top]], _chord_to_km(chords[top])
+
+    def _pairwise(self, lats, lons):
+        points = _to_xyz(lats, lons).reshape(-1, 3)
+        return points, len(points) * len(self.ids) <= SPATIAL_BRUTE_FORCE_PAIRS
+
+    def within_many(self, lats, lons, km):
+        """``within`` for many locations at once; returns a list of ``(ids, distances_km)``."""
+        points, brute_force = self._pairwise(lats, lons)
+        if not brute_force:
+            return [self.within(lat, lon, km) for lat, lon in zip(np.ravel(lats), np.ravel(lons))]
+        chords = np.linalg.norm(points[:, None, :] - self.xyz[None, :, :], axis=2)
+        limit = _km_to_chord(km)
+        results = []
+        for row in chords:
+            hits = np.flatnonzero(row <= limit)
+            hits = hits[np.argsort(row[hits])]
+            results.append((self.ids[hits], _chord_to_km(row[hits])))
+        return results
+
+    def nearest_many(self, lats, lons, k=1):
+        """``nearest`` for many locations at once; returns ``(ids, distances_km)`` arrays of shape (n, k)."""
+        points, brute_force = self._pairwise(lats, lons)
+        k = min(k, len(self.ids))
+        if k < 1:
+            return np.empty((len(points), 0), dtype=object), np.empty((len(points), 0))
+        if not brute_force:
+            pairs = [self.nearest(lat, lon, k) for lat, lon in zip(np.ravel(lats), np.ravel(lons))]
+            return np.array([ids for ids, _ in pairs], dtype=object), np.array([km for _, km in pairs])
+        chords = np.linalg.norm(points[:, None, :] - self.xyz[None, :, :], axis=2)
+        top = np.argpartition(chords, k - 1, axis=1)[:, :k] if k < len(self.ids) else np.tile(np.arange(k), (len(points), 1))
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(chords, top, axis=1), axis=1), axis=1)
+        return self.ids[top], _chord_to_km(np.take_along_axis(chords, top, axis=1))
+
+
+def _coordinate(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value else None
+
+
+def office_points(records):
+    """Unique ``(builder_id, kind, city, lat, lon)`` offices of the builders in ``records``."""
+    seen = set()
+    for record in records:
+        builder_info = record.get('builder_info') or {}
+        builder_id = record_builder_id(record)
+        head = builder_info.get('head_office_address') or {}
+        offices = [('head', head.get('city'), head.get('latitude'), head.get('longitude'))] if head else []
+        offices += [('branch', office.get('city'), office.get('latitude'), office.get('longitude'))
+                    for office in builder_info.get('branch_office_address') or []]
+        for kind, city, lat, lon in offices:
+            lat, lon = _coordinate(lat), _coordinate(lon)
+            if lat is None or lon is None or (builder_id, lat, lon) in seen:
+                continue
+            seen.add((builder_id, lat, lon))
+            yield builder_id, kind, city, lat, lon
+
+
+class OfficeIndex(GridIndex):
+    """Builder head and branch offices, queryable by location."""
+
+    def __init__(self, records, cell_km=SPATIAL_CELL_KM):
+        offices = list(office_points(records))
+        self.offices = offices
+        super().__init__(range(len(offices)), [office[3] for office in offices],
+                         [office[4] for office in offices], cell_km)
+
+    def _describe(self, positions, distances):
+        return [{'builder_id': self.offices[i][0], 'kind': self.offices[i][1], 'city': self.offices[i][2],
+                 'latitude': self.offices[i][3], 'longitude': self.offices[i][4], 'distance_km': round(float(km), 3)}
+                for i, km in zip(positions, distances)]
+
+    def offices_within(self, lat, lon, km):
+        return self._describe(*self.within(lat, lon, km))
+
+    def nearest_offices(self, lat, lon, k=5):
+        return self._describe(*self.nearest(lat, lon, k))
+
+
+def landmark_key(name):
+    return re.sub(r'\s+', ' ', (name or '').strip().lower())
+
+
+class LandmarkIndex:
+    """Landmark -> properties, ordered by their numeric distance to it.
+
+    Property records carry no coordinates of their own, only the distance
+    of each nearby landmark, so "properties within X km of a landmark" is
+    answered from those distances: every landmark's properties are stored
+    sorted by distance and a query is a binary search.
+    """
+
+    def __init__(self, records):
+        names, categories, property_ids, distances, texts = [], [], [], [], []
+        for record in records:
+            for category, items in ((record.get('project') or {}).get('nearby_landmarks') or {}).items():
+                for item in items:
+                    names.append(landmark_key(item.get('distance-title')))
+                    categories.append(category)
+                    property_ids.append(record['property_id'])
+                    distances.append(item.get('distance_km'))
+                    texts.append(item.get('distance'))
+
+        distances = np.array([np.nan if km is None else km for km in distances], dtype=float)
+        missing = np.isnan(distances)
+        if missing.any():
+            # Records that didn't pass through the normalization stage
+            distances[missing] = parse_distance_column([texts[i] for i in np.flatnonzero(missing)])
+        keep = ~np.isnan(distances) & np.array([bool(name) for name in names], dtype=bool)
+
+        names = np.array(names, dtype=object)[keep]
+        order = np.lexsort((distances[keep], names))
+        self.names = names[order]
+        self.categories = np.array(categories, dtype=object)[keep][order]
+        self.property_ids = np.array(property_ids, dtype=object)[keep][order]
+        self.distances = distances[keep][order]
+        unique, starts, counts = np.unique(self.names, return_index=True, return_counts=True) if len(self.names) else ([], [], [])
+        self.spans = {name: (start, start + count) for name, start, count in zip(unique, starts, counts)}
+
+    def __len__(self):
+        return len(self.spans)
+
+    def landmarks(self, text='', category=None):
+        """Known landmark names containing ``text``, optionally of one category (e.g. 'School')."""
+        text = landmark_key(text)
+        return sorted(name for name, (start, _) in self.spans.items()
+                      if text in name and (category is None or self.categories[start] == category))
+
+    def properties_within(self, landmark, km):
+        """``(property_ids, distances_km)`` of the properties within ``km`` of a landmark, nearest first."""
+        start, end = self.spans.get(landmark_key(landmark), (0, 0))
+        stop = start + np.searchsorted(self.distances[start:end], km, side='right')
+        return self.property_ids[start:stop], self.distances[start:stop]
+
+    def nearest_properties(self, landmark, k=10):
+        start, end = self.spans.get(landmark_key(landmark), (0, 0))
+        return self.property_ids[start:min(start + k, end)], self.distances[start:min(start + k, end)]
+
+    def within_many(self, landmarks, km):
+        """``properties_within`` for many landmarks; returns ``{landmark: (property_ids, distances_km)}``."""
+        return {landmark: self.properties_within(landmark, km) for landmark in landmarks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query landmarks and builder offices of an output file")
+    parser.add_argument('--file', dest='data_file', default=OUTPUT_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    near = sub.add_parser('landmark', help="Properties within a distance of a landmark")
+    near.add_argument('name')
+    near.add_argument('--km', type=float, default=2.0)
+    offices = sub.add_parser('offices', help="Builder offices nearest to a location")
+    offices.add_argument('lat', type=float)
+    offices.add_argument('lon', type=float)
+    offices.add_argument('--km', type=float, help="All offices within this distance instead of the nearest")
+    offices.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    records = list(iter_inlined_records(args.data_file, ENCODING))
+    if args.command == 'landmark':
+        index = LandmarkIndex(records)
+        property_ids, distances = index.properties_within(args.name, args.km)
+        if not len(property_ids):
+            print(f"No properties within {args.km} km of '{args.name}'; similar landmarks: "
+                  f"{', '.join(index.landmarks(args.name.split()[0])[:10]) if args.name.split() else '-'}")
+        for property_id, km in zip(property_ids, distances):
+            print(f"{km:6.2f} km  {property_id}")
+    else:
+        index = OfficeIndex(records)
+        found = index.offices_within(args.lat, args.lon, args.km) if args.km else index.nearest_offices(args.lat, args.lon, args.k)
+        for office in found:
+            print(f"{office['distance_km']:8.2f} km  {office['builder_id']}  {office['kind']} office, {office['city']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# SQLite storage backend with normalized tables and batched upserts
+
+import json
+import os
+import sqlite3
+import threading
+from builder_information import get_builder_id
+from normalize import parse_price
+from config import SQLITE_OUTPUT, SQLITE_BATCH_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builders (
+    builder_id TEXT PRIMARY KEY,
+    url TEXT,
+    overview TEXT,
+    head_office_address TEXT,
+    branch_office_address TEXT,
+    company_size TEXT,
+    management_team TEXT,
+    key_service_and_specialities TEXT,
+    awards_and_recognition TEXT,
+    customer_care_number TEXT,
+    faq TEXT,
+    projects_in_top_cities TEXT
+);
+CREATE TABLE IF NOT EXISTS properties (
+    property_id TEXT PRIMARY KEY,
+    name TEXT,
+    location TEXT,
+    status TEXT,
+    price TEXT,
+    price_min REAL,
+    price_max REAL,
+    thumbnail_image TEXT,
+    builder_id TEXT REFERENCES builders (builder_id),
+    information TEXT,
+    price_insights TEXT,
+    specifications TEXT,
+    about TEXT,
+    nearby_landmarks TEXT,
+    location_insights TEXT,
+    faq TEXT,
+    square_yards_rera TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS price_list (
+    property_id TEXT NOT NULL REFERENCES properties (property_id),
+    position INTEGER NOT NULL,
+    unit_type TEXT,
+    price TEXT,
+    price_min REAL,
+    price_max REAL,
+    PRIMARY KEY (property_id, position)
+);
+CREATE TABLE IF NOT EXISTS floor_plans (
+    property_id TEXT NOT NULL REFERENCES properties (property_id),
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT,
+    attribute TEXT,
+    src_2d TEXT,
+    alt TEXT,
+    src_3d TEXT,
+    price TEXT,
+    PRIMARY KEY (property_id, category, position)
+);
+CREATE TABLE IF NOT EXISTS amenities (
+    property_id TEXT NOT NULL REFERENCES properties (property_id),
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    icon TEXT,
+    PRIMARY KEY (property_id, category, name)
+);
+CREATE TABLE IF NOT EXISTS rera (
+    property_id TEXT NOT NULL REFERENCES properties (property_id),
+    position INTEGER NOT NULL,
+    rera_id TEXT,
+    project_name TEXT,
+    PRIMARY KEY (property_id, position)
+);
+CREATE TABLE IF NOT EXISTS media (
+    property_id TEXT NOT NULL REFERENCES properties (property_id),
+    kind TEXT NOT NULL,
+    section TEXT,
+    position INTEGER NOT NULL,
+    title TEXT,
+    src TEXT,
+    alt TEXT,
+    type TEXT,
+    PRIMARY KEY (property_id, kind, position)
+);
+CREATE INDEX IF NOT EXISTS idx_properties_builder ON properties (builder_id);
+CREATE INDEX IF NOT EXISTS idx_properties_location ON properties (location);
+CREATE INDEX IF NOT EXISTS idx_properties_status ON properties (status);
+CREATE INDEX IF NOT EXISTS idx_properties_price ON properties (price_min, price_max);
+CREATE INDEX IF NOT EXISTS idx_price_list_price ON price_list (price_min);
+CREATE INDEX IF NOT EXISTS idx_rera_rera_id ON rera (rera_id);
+"""
+
+# Child tables replaced wholesale whenever their property is upserted
+CHILD_TABLES = ('price_list', 'floor_plans', 'amenities', 'rera', 'media')
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False) if value is not None else None
+
+
+def _builder_row(builder_info):
+    builder_id = get_builder_id(builder_info)
+    if not builder_id:
+        return None
+    return (
+        builder_id,
+        builder_info.get('url'),
+        builder_info.get('overview'),
+        _json(builder_info.get('head_office_address')),
+        _json(builder_info.get('branch_office_address')),
+        _json(builder_info.get('company_size')),
+        _json(builder_info.get('management_team')),
+        builder_info.get('key_service_and_specialities'),
+        builder_info.get('awards_and_recognition'),
+        builder_info.get('customer_care_number'),
+        _json(builder_info.get('faq')),
+        _json(builder_info.get('projects_in_top_cities')),
+    )
+
+
+def _price_bounds(container):
+    """Numeric price bounds, from the normalization stage if it already ran."""
+    if 'price_min' in container:
+        return container['price_min'], container['price_max']
+    return parse_price(container.get('price'))
+
+
+def normalize_record(record):
+    """Split a property record into rows for each table."""
+    property_id = record['property_id']
+    project = record.get('project') or {}
+    builder = _builder_row(record.get('builder_info') or {})
+    rera = project.get('rera') or {}
+    price_min, price_max = _price_bounds(project)
+
+    rows = {table: [] for table in CHILD_TABLES}
+    rows['builders'] = [builder] if builder else []
+    rows['properties'] = [(
+        property_id,
+        project.get('name'),
+        project.get('location'),
+        project.get('status'),
+        project.get('price'),
+        price_min,
+        price_max,
+        project.get('thumbnail_image'),
+        builder[0] if builder else None,
+        _json(project.get('information')),
+        _json(project.get('price_insights')),
+        _json(project.get('specifications')),
+        project.get('about'),
+        _json(project.get('nearby_landmarks')),
+        _json(project.get('location_insights')),
+        _json(record.get('faq')),
+        rera.get('square_yards_rera'),
+        json.dumps(record, ensure_ascii=False),
+    )]
+
+    for position, item in enumerate(project.get('price_list') or []):
+        item_min, item_max = _price_bounds(item)
+        rows['price_list'].append((property_id, position, item.get('unit_type'), item.get('price'), item_min, item_max))
+
+    for category, items in (project.get('floor_plans') or {}).items():
+        for position, item in enumerate(items):
+            rows['floor_plans'].append((
+                property_id, category, position, item.get('title'), item.get('attribute'),
+                item.get('2d_src'), item.get('alt'), item.get('3d_src'), item.get('price'),
+            ))
+
+    for category, items in (project.get('amenities') or {}).items():
+        for item in items:
+            rows['amenities'].append((property_id, category, item.get('name'), item.get('icon')))
+
+    for position, item in enumerate(rera.get('project_rera') or []):
+        rows['rera'].append((property_id, position, item.get('rera_id'), item.get('project_name')))
+
+    media = record.get('all_media') or {}
+    position = 0
+    for section, images in (media.get('images') or {}).items():
+        for image in images:
+            rows['media'].append((property_id, 'image', section, position, image.get('title'),
+                                  image.get('src'), image.get('alt'), None))
+            position += 1
+    for video in media.get('videos') or []:
+        rows['media'].append((property_id, 'video', None, position, None,
+                              video.get('src'), video.get('alt'), video.get('type')))
+        position += 1
+
+    return rows
+
+
+class SqlitePropertyStore:
+    """Normalized property tables keyed by ``property_id``.
+
+    ``add`` buffers records and writes them ``batch_size`` at a time in a
+    single transaction; re-scraped properties replace their previous rows.
+    """
+
+    INSERT_SQL = {
+        'builders': "INSERT OR REPLACE INTO builders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        'properties': "INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        'price_list': "INSERT OR REPLACE INTO price_list VALUES (?, ?, ?, ?, ?, ?)",
+        'floor_plans': "INSERT OR REPLACE INTO floor_plans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        'amenities': "INSERT OR REPLACE INTO amenities VALUES (?, ?, ?, ?)",
+        'rera': "INSERT OR REPLACE INTO rera VALUES (?, ?, ?, ?)",
+        'media': "INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    }
+
+    def __init__(self, path=SQLITE_OUTPUT, batch_size=SQLITE_BATCH_SIZE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def upsert_many(self, records):
+        """Upsert a batch of records in one transaction."""
+        batch = {table: [] for table in self.INSERT_SQL}
+        property_ids = []
+        for record in records:
+            property_ids.append((record['property_id'],))
+            for table, rows in normalize_record(record).items():
+                batch[table].extend(rows)
+
+        with self.lock, self.conn:
+            for table in CHILD_TABLES:
+                self.conn.executemany(f"DELETE FROM {table} WHERE property_id = ?", property_ids)
+            for table, sql in self.INSERT_SQL.items():
+                if batch[table]:
+                    self.conn.executemany(sql, batch[table])
+        return len(property_ids)
+
+    def add(self, record):
+        """Buffer a record, flushing once a full batch is pending."""
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            records, self.pending = self.pending, []
+            self.upsert_many(records)
+
+    def get_property(self, property_id):
+        """Return the stored record for a property, or None."""
+        row = self.conn.execute("SELECT record FROM properties WHERE property_id = ?", (property_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_property_ids(self, builder_id=None, location=None, status=None, min_price=None, max_price=None, limit=100):
+        """Property ids matching the given filters, using the table indexes."""
+        clauses, params = [], []
+        if builder_id:
+            clauses.append("builder_id = ?")
+            params.append(builder_id)
+        if location:
+            clauses.append("location = ?")
+            params.append(location)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if min_price is not None:
+            clauses.append("price_max >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append("price_min <= ?")
+            params.append(max_price)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(f"SELECT property_id FROM properties {where} LIMIT ?", params + [limit])
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,29 @@
+import sys
+import threading
+import pytest
+from dedup import CrawlDedup
+
+
+@pytest.mark.parametrize('mode', ['exact', 'bloom'])
+def test_concurrent_listings_are_counted_once(mode):
+    # Switch threads as often as possible to surface unsynchronized updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        dedup = CrawlDedup(mode=mode, path=None, capacity=10_000)
+        listings = [{'project_id': str(i % 500), 'url': f"https://example.com/p/{i % 500}"} for i in range(4000)]
+        first = []
+
+        def worker(chunk):
+            first.extend(listing['project_id'] for listing in chunk if dedup.first_listing(listing))
+
+        threads = [threading.Thread(target=worker, args=(listings[i::8],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert sorted(first, key=int) == [str(i) for i in range(500)]
+    assert dedup.duplicates == 3500
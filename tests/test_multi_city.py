@@ -0,0 +1,31 @@
+import threading
+from multi_city import MultiCityCrawl, city_base_url
+
+
+class StubScraper:
+    """Listing pages by (city, page); pages not listed fail."""
+
+    def __init__(self, pages):
+        self.pages = {(city_base_url(city), page): listings for (city, page), listings in pages.items()}
+
+    def fetch_listings(self, page, base_url=None):
+        return self.pages.get((base_url, page))
+
+    def scrape_property(self, listing):
+        return {'property_id': listing['project_id']}
+
+
+def test_failing_city_stops_after_consecutive_failed_pages():
+    scraper = StubScraper({('noida', 1): [{'project_id': '1'}], ('noida', 2): []})
+    written = []
+    crawl = MultiCityCrawl(scraper, cities=['gurgaon', 'noida'], start_page=1, end_page=None, dedup=False,
+                           sink=lambda city, record: written.append((city, record['property_id'])),
+                           max_failed_pages=3)
+    thread = threading.Thread(target=crawl.run, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), "crawl did not stop"
+    assert written == [('noida', '1')]
+    assert crawl.stats['gurgaon']['failed_pages'] == 3
+    assert crawl.stats['noida']['reached_end']
+    assert not crawl.complete
@@ -0,0 +1,33 @@
+import math
+import pytest
+from normalize import parse_distance_column, normalize_records
+
+
+@pytest.mark.parametrize('text, km', [
+    ('0.36 KM', 0.36),
+    ('850 m', 0.85),
+    ('1,200 m', 1.2),
+    ('2.5km', 2.5),
+    ('12 Miles', 12 * 1.609344),
+    ('3', 3.0),
+    ('1 - 2 km', 1.0),
+    ('5 km (10 mins)', 5.0),
+])
+def test_distance_units(text, km):
+    assert parse_distance_column([text])[0] == pytest.approx(km)
+
+
+@pytest.mark.parametrize('text', ['5 mins', '15 min drive', 'nearby', '', None])
+def test_values_without_a_distance_unit_are_skipped(text):
+    assert math.isnan(parse_distance_column([text])[0])
+
+
+def test_normalize_records_adds_distance_km():
+    record = {'property_id': '1', 'project': {'nearby_landmarks': {
+        'Hospital': [{'distance-title': 'Medanta', 'distance': '850 m'}],
+        'Metro': [{'distance-title': 'Sector 55', 'distance': '5 mins'}],
+    }}}
+    normalize_records([record])
+    landmarks = record['project']['nearby_landmarks']
+    assert landmarks['Hospital'][0]['distance_km'] == pytest.approx(0.85)
+    assert landmarks['Metro'][0]['distance_km'] is None
@@ -0,0 +1,55 @@
+import json
+import threading
+import image_download
+import normalize
+import orchestrator
+from orchestrator import ScrapeAndDownloadOrchestrator
+
+
+class StubScraper:
+    """One page of ``count`` listings, each scraped into a record with a free-text price."""
+
+    def __init__(self, count):
+        self.count = count
+
+    def fetch_listings(self, page):
+        if page > 1:
+            return []
+        return [{'project_id': str(i), 'url': f"https://example.com/p/{i}"} for i in range(self.count)]
+
+    def scrape_property(self, listing):
+        return {'property_id': listing['project_id'], 'project': {'price': '₹1.2 Cr'}}
+
+
+def test_normalizes_in_batches_and_counts_failures(monkeypatch, tmp_path):
+    batches = []
+    normalize_records = normalize.normalize_records
+
+    def record_batch(records):
+        batches.append(len(records))
+        return normalize_records(records)
+
+    def localize(record, sections=None):
+        assert 'price_min' in record['project'], "record reached the downloaders before normalization"
+        if int(record['property_id']) % 3 == 0:
+            raise RuntimeError('download failed')
+        return record
+
+    monkeypatch.setattr(orchestrator, 'NORMALIZE_RECORDS', True)
+    monkeypatch.setattr(normalize, 'normalize_records', record_batch)
+    monkeypatch.setattr(image_download, 'replace_and_download', localize)
+    monkeypatch.setattr(image_download, 'write_log', lambda: None)
+    monkeypatch.setattr(orchestrator, 'NormalizeStage', lambda sink: normalize.NormalizeStage(sink, batch_size=50))
+
+    output = tmp_path / 'out.jsonl'
+    run = ScrapeAndDownloadOrchestrator(StubScraper(120), output_file=str(output), start_page=1, end_page=None,
+                                        download_workers=8)
+    thread = threading.Thread(target=run.run, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), "orchestrator did not stop"
+
+    assert batches == [50, 50, 20]
+    assert run.failed == 40
+    written = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert len(written) == 80
@@ -0,0 +1,96 @@
+import threading
+from pipeline import CrawlPipeline
+
+
+class StubScraper:
+    """Serves ``pages`` (page number -> listings, or None for a failed page); later pages fail."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def fetch_listings(self, page):
+        with self.lock:
+            self.fetched.append(page)
+        return self.pages.get(page)
+
+    def scrape_property(self, listing):
+        return {'property_id': listing['project_id']}
+
+
+def listings(*ids):
+    return [{'project_id': str(i), 'url': f"https://example.com/p/{i}"} for i in ids]
+
+
+def run(pipeline, timeout=10):
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(pipeline.run()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not stop"
+    return results
+
+
+def test_stops_after_consecutive_failed_pages():
+    scraper = StubScraper({})
+    pipeline = CrawlPipeline(scraper, start_page=1, end_page=None, page_workers=2, max_failed_pages=3, dedup=False)
+    assert run(pipeline) == []
+    # Pages in flight when the cutoff is hit may still be fetched, but pagination ends
+    assert 3 <= pipeline.stats['errors'] <= 4
+    assert max(scraper.fetched) <= 4
+
+
+def test_failed_pages_after_listings_end_the_crawl():
+    scraper = StubScraper({1: listings(1, 2), 2: listings(3)})
+    pipeline = CrawlPipeline(scraper, start_page=1, end_page=None, page_workers=1, max_failed_pages=2, dedup=False)
+    results = run(pipeline)
+    assert sorted(record['property_id'] for record in results) == ['1', '2', '3']
+    assert sorted(set(scraper.fetched)) == [1, 2, 3, 4]
+
+
+def test_isolated_failure_does_not_stop_pagination():
+    scraper = StubScraper({1: listings(1), 2: None, 3: listings(2), 4: []})
+    pipeline = CrawlPipeline(scraper, start_page=1, end_page=None, page_workers=1, max_failed_pages=2, dedup=False)
+    results = run(pipeline)
+    assert sorted(record['property_id'] for record in results) == ['1', '2']
+    assert pipeline.stats['errors'] == 1
+
+
+def test_complete_only_when_every_page_was_seen():
+    pages = {1: listings(1), 2: listings(2), 3: []}
+    pipeline = CrawlPipeline(StubScraper(pages), start_page=1, end_page=None, page_workers=1, dedup=False)
+    run(pipeline)
+    assert pipeline.complete
+
+    pipeline = CrawlPipeline(StubScraper(pages), start_page=2, end_page=None, page_workers=1, dedup=False)
+    run(pipeline)
+    assert not pipeline.complete
+
+    pipeline = CrawlPipeline(StubScraper(pages), start_page=1, end_page=2, page_workers=1, dedup=False)
+    run(pipeline)
+    assert not pipeline.complete
+
+    failed = {1: listings(1), 2: None, 3: listings(2), 4: []}
+    pipeline = CrawlPipeline(StubScraper(failed), start_page=1, end_page=None, page_workers=1, dedup=False)
+    run(pipeline)
+    assert not pipeline.complete
+
+
+def test_frontier_budget_is_charged_for_every_listing_request():
+    class Frontier:
+        def plan(self, collected, requests_used=0):
+            self.requests_used = requests_used
+            return [(listing, True) for listing in collected]
+
+    class Scraper(StubScraper):
+        def scrape_property(self, listing, refresh=None):
+            return {'property_id': listing['project_id']}
+
+    # Page 2 fails on every attempt, page 3 is the empty last page
+    scraper = Scraper({1: listings(1), 3: listings(2), 4: []})
+    frontier = Frontier()
+    pipeline = CrawlPipeline(scraper, start_page=1, end_page=None, page_workers=1, frontier=frontier, dedup=False)
+    run(pipeline)
+    assert frontier.requests_used == len(scraper.fetched) == pipeline.stats['listing_requests']
+    assert frontier.requests_used > pipeline.stats['pages']
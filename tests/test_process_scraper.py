@@ -0,0 +1,37 @@
+import pytest
+import media_backends
+import media_extractor
+import process_scraper
+from fields import FieldSelection
+from process_scraper import ProcessPoolScraper
+from scraper import PropertyScraper
+
+GALLERY_HTML = ('<div class="bxslider"><figure sub-tab="Exterior"><img src="https://img.example/a.jpg?w=1" '
+                'title="Tower" alt="Tower A"></figure></div>')
+
+LISTING = {'project_id': '42', 'project_name': 'Tower', 'location': 'Sector 65', 'url': 'https://example.com/p/42',
+           'image': 'img/42.jpg', 'price_range': '1 Cr', 'status': 'New Launch'}
+
+
+@pytest.fixture
+def stub_requests(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(PropertyScraper, 'get_html', fail)
+    monkeypatch.setattr(media_extractor, 'fetch_gallery_html', lambda project_id, url: GALLERY_HTML)
+    monkeypatch.setattr(process_scraper, 'fetch_gallery_html', lambda project_id, url: GALLERY_HTML)
+    monkeypatch.setattr(media_backends, '_loaded', {})
+
+
+@pytest.mark.parametrize('fields', ['all_media', 'all_media,project.price', 'project.price'])
+def test_process_mode_matches_thread_mode_without_the_detail_page(stub_requests, fields):
+    threaded = PropertyScraper(fields=FieldSelection(fields)).scrape_property(dict(LISTING))
+    pooled_scraper = ProcessPoolScraper(PropertyScraper(fields=FieldSelection(fields)), processes=1)
+    try:
+        pooled = pooled_scraper.scrape_property(dict(LISTING))
+    finally:
+        pooled_scraper.executor.shutdown()
+    assert pooled == threaded
+    if 'all_media' in fields:
+        assert pooled['all_media']['images']['Exterior'][0]['src'] == 'https://img.example/a.jpg'
@@ -0,0 +1,136 @@
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from proxy_pool import ProxyPool, ProxyError
+
+TARGET = 'http://listings.example/page'
+
+
+class StandInProxy(BaseHTTPRequestHandler):
+    """Answers every proxied request itself, naming the proxy in the body."""
+
+    def do_GET(self):
+        body = self.server.name.encode()
+        self.server.hits += 1
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_proxy(name):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInProxy)
+    server.name = name
+    server.hits = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def dead_proxy_url():
+    # A port nothing listens on: connections are refused
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+@pytest.fixture
+def healthy():
+    server = start_proxy('healthy')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def first_candidate(monkeypatch):
+    """Make the weighted choice deterministic: always the first candidate."""
+    monkeypatch.setattr(random, 'choices', lambda candidates, weights=None: [candidates[0]])
+
+
+def test_failed_request_is_retried_on_another_proxy(healthy, first_candidate):
+    pool = ProxyPool([dead_proxy_url(), healthy.url], retries=1, evict_after=5)
+    response = pool.request('GET', TARGET, timeout=5)
+    assert response.status_code == 200
+    assert response.text == 'healthy'
+    dead, live = pool.proxies
+    assert dead.failures == 1 and live.requests == 1
+    pool.close()
+
+
+def test_proxy_is_evicted_after_consecutive_failures(healthy, first_candidate):
+    pool = ProxyPool([dead_proxy_url(), healthy.url], retries=0, evict_after=2, cooldown=60)
+    dead = pool.proxies[0]
+    for _ in range(2):
+        with pytest.raises(ProxyError):
+            pool.request('GET', TARGET, timeout=5)
+    assert dead.evicted
+    # With the dead proxy evicted, the first candidate is now the healthy one
+    assert pool.request('GET', TARGET, timeout=5).text == 'healthy'
+    assert healthy.hits == 1
+    pool.close()
+
+
+def test_evicted_proxy_is_readmitted_on_probation_after_cooldown(healthy, first_candidate):
+    pool = ProxyPool([dead_proxy_url(), healthy.url], retries=0, evict_after=2, cooldown=0.2, max_cooldown=10)
+    dead = pool.proxies[0]
+    for _ in range(2):
+        with pytest.raises(ProxyError):
+            pool.request('GET', TARGET, timeout=5)
+    assert dead.evicted
+    time.sleep(0.3)
+
+    assert pool.acquire() is dead
+    assert not dead.evicted
+    pool.release(dead, True, 0.0)
+
+    # On probation a single failure evicts it again, for twice the cooldown
+    dead.failures = pool.evict_after - 1
+    with pytest.raises(ProxyError):
+        pool.request('GET', TARGET, timeout=5)
+    assert dead.evicted
+    assert dead.evicted_until - time.time() > 0.2
+    pool.close()
+
+
+def test_sticky_key_keeps_one_proxy_until_it_fails(healthy):
+    other = start_proxy('other')
+    try:
+        pool = ProxyPool([healthy.url, other.url], retries=1)
+        names = {pool.request('GET', TARGET, sticky_key='property-1', timeout=5).text for _ in range(10)}
+        assert len(names) == 1
+        pool.forget('property-1')
+        pool.close()
+    finally:
+        other.shutdown()
+        other.server_close()
+
+
+def test_sticky_key_moves_off_a_failing_proxy(healthy, first_candidate):
+    pool = ProxyPool([dead_proxy_url(), healthy.url], retries=1, evict_after=5)
+    assert pool.request('GET', TARGET, sticky_key='property-1', timeout=5).text == 'healthy'
+    assert pool.sticky['property-1'] is pool.proxies[1]
+    # Subsequent requests stay on the healthy proxy even though the dead one is listed first
+    assert pool.request('GET', TARGET, sticky_key='property-1', timeout=5).text == 'healthy'
+    assert pool.proxies[0].failures == 1
+    pool.close()
+
+
+def test_environment_proxies_do_not_bypass_the_pool(healthy, monkeypatch):
+    environment = start_proxy('environment')
+    try:
+        for name in ('HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'http_proxy', 'https_proxy', 'all_proxy'):
+            monkeypatch.setenv(name, environment.url)
+        pool = ProxyPool([healthy.url])
+        assert pool.request('GET', TARGET, timeout=5).text == 'healthy'
+        assert environment.hits == 0
+        pool.close()
+    finally:
+        environment.shutdown()
+        environment.server_close()
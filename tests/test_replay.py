@@ -0,0 +1,36 @@
+import pytest
+import http_fetch
+import media_backends
+from archive import ArchiveWriter, ArchiveReader
+
+GALLERY_URL = 'https://www.squareyards.com/loadcommongallery'
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """Replay from an archive holding a failed (500) gallery response for project 1."""
+    writer = ArchiveWriter(str(tmp_path))
+    writer.write('gallery', 'POST', GALLERY_URL, 500, 'error', {'projectId': '1', 'type': 'Project'})
+    writer.close()
+    monkeypatch.setattr(http_fetch, '_replay', ArchiveReader(str(tmp_path)))
+    monkeypatch.setattr(media_backends, '_loaded', {})
+
+
+def fail_network(*args, **kwargs):
+    raise AssertionError("replay reached the network")
+
+
+@pytest.mark.parametrize('project_id', ['1', '2'])  # Archived non-200, and not archived at all
+def test_replay_never_loads_the_fallback_backend(replay, monkeypatch, project_id):
+    loaded = []
+
+    def load_selenium():
+        loaded.append('selenium')
+        return lambda project_id, url: {'images': {'live': []}, 'videos': []}
+
+    monkeypatch.setitem(media_backends.MEDIA_BACKENDS, 'selenium', load_selenium)
+    monkeypatch.setattr(http_fetch, '_send', fail_network)
+    media = media_backends.extract_media(project_id, 'https://www.squareyards.com/project', backend='http',
+                                         fallback='selenium')
+    assert media == {'images': {}, 'videos': []}
+    assert not loaded
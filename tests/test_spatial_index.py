@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from spatial_index import GridIndex, LandmarkIndex, haversine_km
+
+
+@pytest.fixture(scope='module')
+def points():
+    # 20k points around Delhi NCR, plus a sparse spread across India
+    rng = np.random.default_rng(7)
+    lats = np.concatenate([rng.normal(28.5, 0.3, 18000), rng.uniform(8, 35, 2000)])
+    lons = np.concatenate([rng.normal(77.1, 0.3, 18000), rng.uniform(68, 97, 2000)])
+    return np.arange(len(lats)), lats, lons
+
+
+@pytest.fixture(scope='module')
+def queries():
+    rng = np.random.default_rng(11)
+    return np.concatenate([rng.normal(28.5, 0.3, 40), rng.uniform(8, 35, 10)]), \
+        np.concatenate([rng.normal(77.1, 0.3, 40), rng.uniform(68, 97, 10)])
+
+
+def brute_within(lats, lons, lat, lon, km):
+    distances = haversine_km(lat, lon, lats, lons)
+    hits = np.flatnonzero(distances <= km)
+    return set(hits.tolist()), distances
+
+
+def test_within_matches_brute_force(points, queries):
+    ids, lats, lons = points
+    index = GridIndex(ids, lats, lons, cell_km=5.0)
+    for lat, lon in zip(*queries):
+        for km in (0.5, 3, 25):
+            found, distances = index.within(lat, lon, km)
+            expected, exact = brute_within(lats, lons, lat, lon, km)
+            # Points exactly on the radius may fall either way through rounding
+            boundary = {i for i in expected ^ set(found.tolist()) if abs(exact[i] - km) > 1e-9}
+            assert not boundary
+            assert np.all(np.diff(distances) >= 0)
+            np.testing.assert_allclose(distances, exact[found.astype(int)], atol=1e-6)
+
+
+def test_nearest_matches_brute_force(points, queries):
+    ids, lats, lons = points
+    index = GridIndex(ids, lats, lons, cell_km=5.0)
+    for lat, lon in zip(*queries):
+        found, distances = index.nearest(lat, lon, k=10)
+        exact = np.sort(haversine_km(lat, lon, lats, lons))[:10]
+        np.testing.assert_allclose(distances, exact, atol=1e-6)
+
+
+def test_bulk_queries_match_single_queries(points, queries, monkeypatch):
+    ids, lats, lons = points
+    index = GridIndex(ids, lats, lons, cell_km=5.0)
+    q_lats, q_lons = queries
+    for brute_force_pairs in (0, 10 ** 9):
+        monkeypatch.setattr('spatial_index.SPATIAL_BRUTE_FORCE_PAIRS', brute_force_pairs)
+        many_ids, many_km = index.nearest_many(q_lats, q_lons, k=5)
+        for row, (lat, lon) in enumerate(zip(q_lats, q_lons)):
+            _, km = index.nearest(lat, lon, k=5)
+            np.testing.assert_allclose(many_km[row], km, atol=1e-6)
+        for (found, km), (lat, lon) in zip(index.within_many(q_lats, q_lons, 2.0), zip(q_lats, q_lons)):
+            single, _ = index.within(lat, lon, 2.0)
+            assert set(found.tolist()) == set(single.tolist())
+
+
+def test_nearest_with_fewer_points_than_k():
+    index = GridIndex(['a', 'b'], [28.4, 28.5], [77.0, 77.1])
+    found, distances = index.nearest(28.4, 77.0, k=5)
+    assert list(found) == ['a', 'b']
+    assert distances[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_landmark_index_matches_brute_force():
+    rng = np.random.default_rng(3)
+    names = [f"Landmark {i}" for i in range(30)]
+    records = []
+    for pid in range(500):
+        chosen = rng.choice(len(names), 5, replace=False)
+        records.append({'property_id': str(pid), 'project': {'nearby_landmarks': {'Places': [
+            {'distance-title': names[i], 'distance': f"{rng.uniform(0.1, 9):.2f} km"} for i in chosen
+        ]}}})
+    index = LandmarkIndex(records)
+    for name in names:
+        expected = sorted(
+            (float(item['distance'].split()[0]), record['property_id'])
+            for record in records for item in record['project']['nearby_landmarks']['Places']
+            if item['distance-title'] == name and float(item['distance'].split()[0]) <= 2.5
+        )
+        found, distances = index.properties_within(name.upper(), 2.5)
+        assert sorted(zip(distances.tolist(), found.tolist())) == expected
+        _, nearest = index.nearest_properties(name, k=3)
+        # Distances are compared, since properties at the same distance may come in either order
+        assert nearest.tolist() == sorted(
+            float(item['distance'].split()[0])
+            for record in records for item in record['project']['nearby_landmarks']['Places']
+            if item['distance-title'] == name)[:3]
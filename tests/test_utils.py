@@ -0,0 +1,46 @@
+import pytest
+from bs4 import BeautifulSoup
+from utils import bounded_html
+
+TEXT = 'Spacious 3 BHK & balcony. ' * 20
+
+CLASSES = ' '.join(['project-description'] * 5)
+
+INPUTS = {
+    'nested': f'<div><p>Intro</p><section class="details highlight"><ul><li><b>{TEXT}</b></li></ul></section></div>',
+    'wrapper_only': f'<div><div><div><div><span>{TEXT}</span></div></div></div></div>',
+    'long_class': f'<div><section class="{CLASSES}">{TEXT}</section></div>',
+    'void': '<div>' + '<img src="https://img.example/photo.jpg" alt="Front elevation">' * 10 + '</div>',
+}
+
+
+def element(html):
+    return BeautifulSoup(html, 'html.parser').div
+
+
+@pytest.mark.parametrize('name', INPUTS)
+@pytest.mark.parametrize('limit', [0, 5, 10, 30, 60, 100, 250])
+@pytest.mark.parametrize('outer', [False, True])
+def test_bounded_html_respects_limit(name, limit, outer):
+    html = bounded_html(element(INPUTS[name]), limit=limit, outer=outer)
+    assert len(html) <= limit
+    # Whatever survives is still well-formed: re-parsing doesn't change it
+    assert str(BeautifulSoup(html, 'html.parser')) == html
+
+
+@pytest.mark.parametrize('name', INPUTS)
+def test_uncut_html_matches_the_parser_serialization(name):
+    div = element(INPUTS[name])
+    assert bounded_html(div, limit=None) == div.decode_contents()
+    assert bounded_html(div, limit=None, outer=True) == str(div)
+
+
+def test_cut_keeps_leading_content_with_the_original_tags():
+    html = bounded_html(element(INPUTS['long_class']), limit=200)
+    assert html.startswith(f'<section class="{CLASSES}">Spacious 3 BHK &amp; balcony.')
+    assert html.endswith('</section>')
+
+
+def test_scripts_styles_and_comments_are_dropped():
+    div = element('<div><script>x()</script><style>p{}</style><!-- note --><p>Kept</p></div>')
+    assert bounded_html(div, outer=True) == '<div><p>Kept</p></div>'
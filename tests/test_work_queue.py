@@ -0,0 +1,61 @@
+import threading
+import time
+import pytest
+from work_queue import SqliteWorkQueue, RedisWorkQueue
+
+
+def lease_expiry(queue, item):
+    return queue.conn.execute("SELECT lease_expires FROM work_items WHERE id = ?", (item.id,)).fetchone()[0]
+
+
+def test_heartbeat_extension_survives_a_rolled_back_lease(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / 'queue.db'), lease_seconds=60)
+    queue.put('property', 'property:1', {'project_id': '1'})
+    [item] = queue.lease('worker')
+    expires = lease_expiry(queue, item)
+
+    # The worker's connection is mid-transaction when the heartbeat fires
+    queue.conn.execute("BEGIN IMMEDIATE")
+    heartbeat = threading.Thread(target=queue.extend, args=(item, 'worker'))
+    heartbeat.start()
+    time.sleep(0.2)
+    queue.conn.execute("ROLLBACK")
+    heartbeat.join(10)
+
+    assert lease_expiry(queue, item) > expires
+    queue.close()
+
+
+@pytest.fixture
+def redis_queue(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url',
+                        lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+    queue = RedisWorkQueue('redis://localhost', lease_seconds=60)
+    yield queue
+    queue.close()
+
+
+def test_redis_put_is_unique_by_key(redis_queue):
+    results = []
+
+    def put(i):
+        results.append(redis_queue.put('property', f"property:{i % 10}", {'n': i}))
+
+    threads = [threading.Thread(target=put, args=(i,)) for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 10
+    assert redis_queue.counts() == {'pending': 10}
+    items = redis_queue.lease('worker', limit=20)
+    assert sorted(item.key for item in items) == sorted(f"property:{i}" for i in range(10))
+    assert all(item.attempts == 1 for item in items)
+    # Duplicates no longer use up ids
+    assert sorted(int(item.id) for item in items) == list(range(1, 11))
@@ -2,20 +2,181 @@
 
 import json
 import os
+import threading
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
+import serialization
+from bs4 import Comment, Tag
+from config import MAX_HTML_FIELD_CHARS
 
-def save_to_json(data, filename, encoding='utf-8'):
+def save_to_json(data, filename, encoding='utf-8', pretty=serialization.JSON_PRETTY):
     """Save data to a JSON file with proper encoding."""
     try:
         # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
         
-        with open(filename, 'w', encoding=encoding) as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(serialization.encode(data, pretty, encoding))
         return True
     except Exception as e:
         print(f"Error saving to JSON: {e}")
         return False
 
+class JsonArrayWriter:
+    """Write records one at a time as a JSON array, in the same layout as a pretty save_to_json.
+
+    ``write`` returns the ``(offset, length)`` of the record's bytes in the
+    file, which is what the offset index in record_index.py stores. Compact
+    mode puts one record per line.
+    """
+
+    def __init__(self, filename, encoding='utf-8', pretty=serialization.JSON_PRETTY):
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.filename = filename
+        self.encoding = encoding
+        self.pretty = pretty
+        self.file = open(filename, 'wb')
+        self.offset = 0
+        self.count = 0
+
+    def _write(self, text):
+        data = text.encode(self.encoding) if isinstance(text, str) else text
+        self.file.write(data)
+        self.offset += len(data)
+        return len(data)
+
+    def write(self, record):
+        data = serialization.encode(record, self.pretty, self.encoding)
+        if self.pretty:
+            self._write("[\n  " if self.count == 0 else ",\n  ")
+            data = data.replace("\n".encode(self.encoding), "\n  ".encode(self.encoding))
+        else:
+            self._write("[" if self.count == 0 else ",\n")
+        offset = self.offset
+        length = self._write(data)
+        self.count += 1
+        return offset, length
+
+    def close(self):
+        if self.pretty:
+            self._write("\n]" if self.count else "[]")
+        else:
+            self._write("]" if self.count else "[]")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class JsonLinesWriter(JsonArrayWriter):
+    """Write records one per line (JSON Lines); ``write`` returns the line's ``(offset, length)``."""
+
+    def write(self, record):
+        offset = self.offset
+        length = self._write(serialization.encode(record, False, self.encoding))
+        self._write("\n")
+        self.count += 1
+        return offset, length
+
+    def close(self):
+        self.file.close()
+
+class BoundedExecutor:
+    """A thread pool whose submit() blocks once ``max_pending`` tasks are queued or running."""
+
+    def __init__(self, max_workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, args):
+        try:
+            return fn(*args)
+        finally:
+            self.slots.release()
+
+    def submit(self, fn, *args):
+        self.slots.acquire()
+        try:
+            return self.executor.submit(self._run, fn, args)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+def iter_json_spans(filename, encoding='utf-8', chunk_size=1 << 20, validate=serialization.JSON_VALIDATE):
+    """Yield ``(record, offset, length)`` from a JSON Lines or JSON array file.
+
+    ``offset`` and ``length`` locate the record's bytes in the file. JSON
+    arrays are decoded incrementally, so neither format is ever loaded into
+    memory in full. With ``validate`` each record is checked against the
+    record schema.
+    """
+    if filename.endswith('.jsonl'):
+        with open(filename, 'rb') as f:
+            offset = 0
+            for line in f:
+                text = line.decode(encoding)
+                if text.strip():
+                    stripped = text.rstrip('\r\n')
+                    yield serialization.decode_record(stripped, validate), offset, len(stripped.encode(encoding))
+                offset += len(line)
+        return
+
+    with open(filename, 'r', encoding=encoding, newline='') as f:
+        decoder = json.JSONDecoder()
+        buffer = ''
+        buffer_offset = 0  # Byte offset of buffer[0] in the file
+        started = False
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            position = 0
+            cursor, cursor_offset = 0, buffer_offset
+            while True:
+                # Skip whitespace, the opening bracket and separators between records
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if not started and position < len(buffer):
+                    if buffer[position] != '[':
+                        raise ValueError(f"{filename} is not a JSON array")
+                    started = True
+                    position += 1
+                    continue
+                if position < len(buffer) and buffer[position] == ']':
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        if buffer[position:].strip():
+                            raise
+                        return
+                    break  # Record continues in the next chunk
+                offset = cursor_offset + len(buffer[cursor:position].encode(encoding))
+                length = len(buffer[position:end].encode(encoding))
+                yield serialization.validate_record(record, validate), offset, length
+                cursor, cursor_offset = end, offset + length
+                position = end
+            buffer_offset = cursor_offset + len(buffer[cursor:position].encode(encoding))
+            buffer = buffer[position:]
+
+def iter_json_records(filename, encoding='utf-8', chunk_size=1 << 20, validate=serialization.JSON_VALIDATE):
+    """Yield records one by one from a JSON Lines file or a JSON array file, without loading it whole."""
+    for record, _, _ in iter_json_spans(filename, encoding, chunk_size, validate):
+        yield record
+
 def flatten_list_of_lists(list_of_lists):
     """Flatten a list of lists into a single list."""
     result = []
@@ -32,6 +193,67 @@ def safe_get_text(element, default=''):
         return element.get_text(strip=True)
     return default
 
+def _tag_shell(element):
+    """Opening and closing tag of ``element``, serialized exactly as ``str(element)`` would."""
+    close_tag = f"</{element.name}>"
+    empty = Tag(name=element.name, attrs=dict(element.attrs), can_be_empty_element=False).decode()
+    return empty[:-len(close_tag)], close_tag
+
+
+def _cut_text(text, budget):
+    """Escaped text cut to ``budget`` characters without splitting an entity."""
+    text = escape(text, quote=False)[:max(budget, 0)]
+    amp = text.rfind('&')
+    if amp > text.rfind(';'):
+        text = text[:amp]
+    return text
+
+
+def _bounded_children(element, budget):
+    """Inner HTML of ``element`` within ``budget`` characters, and whether anything was cut.
+
+    Children that fit are kept whole; the first one that doesn't is descended
+    into (or, for text, truncated), so an oversized wrapper still keeps its
+    leading content. A tag whose own open and close tags don't fit is dropped.
+    """
+    parts = []
+    for child in element.children:
+        if isinstance(child, Comment) or child.name in ('script', 'style'):
+            continue
+        child_html = child.output_ready() if child.name is None else str(child)
+        if len(child_html) <= budget:
+            parts.append(child_html)
+            budget -= len(child_html)
+            continue
+        if child.name is None:
+            parts.append(_cut_text(str(child), budget))
+        elif not child.is_empty_element:
+            open_tag, close_tag = _tag_shell(child)
+            if len(open_tag) + len(close_tag) < budget:
+                inner, _ = _bounded_children(child, budget - len(open_tag) - len(close_tag))
+                if inner:
+                    parts.append(open_tag + inner + close_tag)
+        return ''.join(parts), True
+    return ''.join(parts), False
+
+
+def bounded_html(element, limit=MAX_HTML_FIELD_CHARS, outer=False):
+    """Inner HTML of an element (with its own tag if ``outer``), bounded to ``limit`` characters.
+
+    Scripts, styles and comments are dropped. Past the limit the HTML is cut
+    inside the first child that doesn't fit, keeping every tag closed, so the
+    result stays well-formed.
+    """
+    open_tag, close_tag = _tag_shell(element) if outer else ('', '')
+    budget = float('inf') if limit is None else limit - len(open_tag) - len(close_tag)
+    if budget < 0:
+        print(f"[WARN] Dropped <{element.name}> HTML: its tags alone exceed {limit} characters (MAX_HTML_FIELD_CHARS)")
+        return ''
+    inner, cut = _bounded_children(element, budget)
+    if cut:
+        print(f"[WARN] Cut <{element.name}> HTML at {len(inner)} characters (MAX_HTML_FIELD_CHARS)")
+    return f"{open_tag}{inner}{close_tag}"
+
 def safe_get_attribute(element, attribute, default=''):
     """Safely get an attribute from a BeautifulSoup element."""
     if element:
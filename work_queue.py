@@ -0,0 +1,309 @@
+# Durable work queues with leases for distributed crawling
+
+import json
+import os
+import sqlite3
+import time
+from config import WORK_QUEUE_BACKEND, WORK_QUEUE_PATH, REDIS_URL, LEASE_SECONDS, MAX_ATTEMPTS
+
+
+class WorkItem:
+    """A leased unit of work."""
+
+    __slots__ = ('id', 'kind', 'key', 'payload', 'attempts')
+
+    def __init__(self, id, kind, key, payload, attempts):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"WorkItem({self.kind}, {self.key}, attempts={self.attempts})"
+
+
+class SqliteWorkQueue:
+    """A lease-based work queue stored in a SQLite file.
+
+    Items are unique by ``key``, so the same listing page or property can be
+    enqueued by several workers without being crawled twice. A leased item
+    that is not acked before its lease expires is handed out again.
+    Suitable for several worker processes on one host or a shared volume.
+    """
+
+    def __init__(self, path=WORK_QUEUE_PATH, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = self._connect()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_state ON work_items (state, lease_expires)")
+        # extend() is called from the heartbeat thread; on the worker's connection its update
+        # would join (and be rolled back or committed with) a lease transaction in progress
+        self._heartbeat_conn = self._connect()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+
+    def put(self, kind, key, payload):
+        """Enqueue an item; returns False if an item with the same key already exists."""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO work_items (kind, key, payload) VALUES (?, ?, ?)",
+            (kind, key, json.dumps(payload, ensure_ascii=False)),
+        )
+        return cursor.rowcount == 1
+
+    def lease(self, worker_id, limit=1):
+        """Lease up to ``limit`` pending items, redelivering (or parking, at ``max_attempts``) expired leases."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired lease already used its attempt; park it instead of redelivering past the limit
+            self.conn.execute(
+                """UPDATE work_items SET state = 'failed', lease_owner = NULL, lease_expires = NULL,
+                   error = 'lease expired' WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, self.max_attempts),
+            )
+            rows = self.conn.execute(
+                """SELECT id, kind, key, payload, attempts FROM work_items
+                   WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)
+                   ORDER BY id LIMIT ?""",
+                (now, limit),
+            ).fetchall()
+            items = []
+            for item_id, kind, key, payload, attempts in rows:
+                self.conn.execute(
+                    """UPDATE work_items SET state = 'leased', lease_owner = ?, lease_expires = ?,
+                       attempts = attempts + 1 WHERE id = ?""",
+                    (worker_id, now + self.lease_seconds, item_id),
+                )
+                items.append(WorkItem(item_id, kind, key, json.loads(payload), attempts + 1))
+            self.conn.execute("COMMIT")
+            return items
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def extend(self, item, worker_id):
+        """Renew the lease on an item still being worked on; safe to call from another thread."""
+        cursor = self._heartbeat_conn.execute(
+            "UPDATE work_items SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, item.id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def ack(self, item, worker_id):
+        """Mark an item done. Returns False if the lease was lost to another worker."""
+        cursor = self.conn.execute(
+            "UPDATE work_items SET state = 'done', lease_expires = NULL WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+            (item.id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, item, worker_id, error=None):
+        """Release a failed item for redelivery, or park it once it hits ``max_attempts``."""
+        state = 'failed' if item.attempts >= self.max_attempts else 'pending'
+        self.conn.execute(
+            """UPDATE work_items SET state = ?, lease_owner = NULL, lease_expires = NULL, error = ?
+               WHERE id = ? AND lease_owner = ?""",
+            (state, str(error) if error else None, item.id, worker_id),
+        )
+
+    def counts(self):
+        """Return the number of items per state."""
+        rows = self.conn.execute("SELECT state, COUNT(*) FROM work_items GROUP BY state").fetchall()
+        return dict(rows)
+
+    def is_drained(self):
+        """True once nothing is pending or leased."""
+        counts = self.counts()
+        return not counts.get('pending') and not counts.get('leased')
+
+    def close(self):
+        self._heartbeat_conn.close()
+        self.conn.close()
+
+
+# Lua scripts run atomically on the Redis server, so a put, lease, ack or fail never
+# interleaves with a requeue of the same item.
+# KEYS: next_id, keys, items, attempts, state, pending; ARGV: key, item JSON
+_PUT_SCRIPT = """
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    return 0
+end
+local id = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], ARGV[1], id)
+redis.call('HSET', KEYS[3], id, ARGV[2])
+redis.call('HSET', KEYS[4], id, 0)
+redis.call('HSET', KEYS[5], id, 'pending')
+redis.call('RPUSH', KEYS[6], id)
+return 1
+"""
+
+# KEYS: pending, leases, state, owner, attempts, errors
+_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    if redis.call('HGET', KEYS[3], id) == 'leased' then
+        redis.call('HDEL', KEYS[4], id)
+        if tonumber(redis.call('HGET', KEYS[5], id) or 0) >= tonumber(ARGV[5]) then
+            redis.call('HSET', KEYS[3], id, 'failed')
+            redis.call('HSET', KEYS[6], id, 'lease expired')
+        else
+            redis.call('HSET', KEYS[3], id, 'pending')
+            redis.call('RPUSH', KEYS[1], id)
+        end
+    end
+end
+local leased = {}
+while #leased < tonumber(ARGV[4]) do
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then
+        break
+    end
+    if redis.call('HGET', KEYS[3], id) == 'pending' then
+        redis.call('HSET', KEYS[3], id, 'leased')
+        redis.call('HSET', KEYS[4], id, ARGV[1])
+        local attempts = redis.call('HINCRBY', KEYS[5], id, 1)
+        redis.call('ZADD', KEYS[2], ARGV[3], id)
+        table.insert(leased, {id, attempts})
+    end
+end
+return leased
+"""
+
+# KEYS: leases, state, owner; ARGV: id, worker, new expiry
+_EXTEND_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= 'leased' or redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: leases, state, owner; ARGV: id, worker
+_ACK_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= 'leased' or redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], 'done')
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS: pending, leases, state, owner, attempts, errors; ARGV: id, worker, max attempts, error
+_FAIL_SCRIPT = """
+if redis.call('HGET', KEYS[3], ARGV[1]) ~= 'leased' or redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[6], ARGV[1], ARGV[4])
+end
+if tonumber(redis.call('HGET', KEYS[5], ARGV[1]) or 0) >= tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[3], ARGV[1], 'failed')
+else
+    redis.call('HSET', KEYS[3], ARGV[1], 'pending')
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+class RedisWorkQueue:
+    """The same lease semantics on Redis, for workers spread across hosts.
+
+    Keys under ``namespace``: ``pending`` (list of item ids), ``leases``
+    (sorted set scored by lease expiry), ``items`` (hash of id -> kind, key
+    and payload JSON), ``state``, ``owner``, ``attempts`` and ``errors``
+    (hashes by id) and ``keys`` (hash of item key -> id, for
+    de-duplication). State changes run as Lua scripts, so they are atomic.
+    """
+
+    def __init__(self, url=REDIS_URL, namespace='crawl', lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ns = namespace
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._put_script = self.redis.register_script(_PUT_SCRIPT)
+        self._lease_script = self.redis.register_script(_LEASE_SCRIPT)
+        self._extend_script = self.redis.register_script(_EXTEND_SCRIPT)
+        self._ack_script = self.redis.register_script(_ACK_SCRIPT)
+        self._fail_script = self.redis.register_script(_FAIL_SCRIPT)
+
+    def _key(self, name):
+        return f"{self.ns}:{name}"
+
+    def _keys(self, *names):
+        return [self._key(name) for name in names]
+
+    def put(self, kind, key, payload):
+        item = json.dumps({'kind': kind, 'key': key, 'payload': payload}, ensure_ascii=False)
+        return bool(self._put_script(keys=self._keys('next_id', 'keys', 'items', 'attempts', 'state', 'pending'),
+                                     args=[key, item]))
+
+    def lease(self, worker_id, limit=1):
+        """Lease up to ``limit`` pending items, redelivering (or parking, at ``max_attempts``) expired leases."""
+        now = time.time()
+        leased = self._lease_script(
+            keys=self._keys('pending', 'leases', 'state', 'owner', 'attempts', 'errors'),
+            args=[worker_id, now, now + self.lease_seconds, limit, self.max_attempts],
+        )
+        if not leased:
+            return []
+        items = []
+        for (item_id, attempts), data in zip(leased, self.redis.hmget(self._key('items'), [row[0] for row in leased])):
+            data = json.loads(data)
+            items.append(WorkItem(item_id, data['kind'], data['key'], data['payload'], int(attempts)))
+        return items
+
+    def extend(self, item, worker_id):
+        return bool(self._extend_script(keys=self._keys('leases', 'state', 'owner'),
+                                        args=[item.id, worker_id, time.time() + self.lease_seconds]))
+
+    def ack(self, item, worker_id):
+        return bool(self._ack_script(keys=self._keys('leases', 'state', 'owner'), args=[item.id, worker_id]))
+
+    def fail(self, item, worker_id, error=None):
+        self._fail_script(keys=self._keys('pending', 'leases', 'state', 'owner', 'attempts', 'errors'),
+                          args=[item.id, worker_id, self.max_attempts, str(error) if error else ''])
+
+    def counts(self):
+        counts = {}
+        for state in self.redis.hvals(self._key('state')):
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def is_drained(self):
+        return not self.redis.llen(self._key('pending')) and not self.redis.zcard(self._key('leases'))
+
+    def close(self):
+        self.redis.close()
+
+
+def open_work_queue(backend=WORK_QUEUE_BACKEND):
+    """Open the configured work queue backend ('sqlite' or 'redis')."""
+    if backend == 'redis':
+        return RedisWorkQueue()
+    return SqliteWorkQueue()